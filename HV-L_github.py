@@ -5,9 +5,18 @@ import os
 import re
 import uuid
 import time
+import random
 import requests
 import hashlib
-from datetime import datetime
+import threading
+import sqlite3
+import base64
+import struct
+import zlib
+import lzma
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from datetime import datetime, timedelta
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -31,69 +40,2174 @@ TABLE_WIDTH = 1330
 MEMO_WIDTH = 640
 LEFT_PANEL_WIDTH = 350
 
+# 로컬 저장 방식: "json" (스냅샷 + 저널) 또는 "sqlite"
+LOCAL_STORAGE_BACKEND = "json"
+
+# 백업 스냅샷 파일 형식
+SNAPSHOT_MAGIC = b'HVSNAP'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_CODEC_ZLIB = 1
+SNAPSHOT_CODEC_LZMA = 2
+SNAPSHOT_SECTION_END = 0
+SNAPSHOT_SECTION_META = 1
+SNAPSHOT_SECTION_PROJECT = 2
+SNAPSHOT_SECTION_DELTA = 3   # 증분 백업: 프로젝트별 변경 항목 + 항목 순서
+SNAPSHOT_SECTION_MEMOS = 4   # 증분 백업: 메모 해시 -> 메모 본문
+SNAPSHOT_SECTION_IMAGES = 5  # 증분 백업: 이미지 해시 -> PNG(base64)
+SNAPSHOT_EXTENSION = '.hvbak'
+
+# 증분 자동 백업 주기
+BACKUP_INTERVAL_MS = 10 * 60 * 1000  # 10분
+
+# 클라우드 전송 실패 시 재시도 간격 (초, 지수 증가 + 무작위 지연)
+FIREBASE_RETRY_BASE_DELAY = 2
+FIREBASE_RETRY_MAX_DELAY = 300
+
+# 연결 확인 주기 (초, 연결이 끊긴 동안은 재시도 간격과 같이 점점 늘림)
+FIREBASE_HEARTBEAT_INTERVAL = 15
+
+# 메모 이미지는 정산 데이터와 분리된 노드에 해시 이름으로 저장 (메모를 열 때만 내려받음)
+FIREBASE_IMAGE_PATH = 'memo_images'
+# 메모를 연 시점에 아직 올라오지 않은 이미지를 다시 받아 보는 횟수 (간격은 재시도 간격과 같이 늘림)
+FIREBASE_IMAGE_FETCH_RETRIES = 4
+
+# 시작할 때 항목까지 미리 받아 둘 최근 사용 프로젝트 수 (나머지는 선택할 때 받아옴)
+FIREBASE_PREFETCH_PROJECTS = 3
+
+# 다른 사용자가 먼저 바꾼 경로를 다시 받아 병합 후 재기록하는 최대 횟수 (넘으면 전송 실패로 처리해 나중에 재시도)
+FIREBASE_WRITE_ATTEMPTS = 5
+
+# 전체 업로드는 항목 단위로 이 크기(바이트) 이하의 다중 경로 update로 나눠 동시에 여러 개씩 전송
+FIREBASE_UPLOAD_CHUNK_BYTES = 256 * 1024
+FIREBASE_UPLOAD_WORKERS = 4
+
+# 다른 사용자의 연속 변경은 모아서 한 번에 반영 (마지막 변경 후 기다리는 시간, 첫 변경부터 최대 지연, ms)
+FIREBASE_EVENT_WINDOW_MS = 150
+FIREBASE_EVENT_MAX_DELAY_MS = 1000
+
 # 업데이트 관련 상수
 UPDATE_CHECK_URL = "https://api.github.com/repos/HVLAB-SJ/HV-LAB/releases/latest"  # GitHub 릴리즈 URL
 CURRENT_VERSION = "1.6.1"  # 현재 버전
 
-# Style constants
-BUTTON_STYLE = """
-    QPushButton {
-        background-color: #7d9471;
-        color: white;
-        border: none;
-        padding: 8px 16px;
-        border-radius: 4px;
-        font-weight: bold;
-    }
-    QPushButton:hover { background-color: #6d8062; }
-    QPushButton:pressed { background-color: #5d6f54; }
-    QPushButton:disabled { background-color: #c0c0c0; color: #808080; }
-"""
+# Style constants
+BUTTON_STYLE = """
+    QPushButton {
+        background-color: #7d9471;
+        color: white;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+    QPushButton:hover { background-color: #6d8062; }
+    QPushButton:pressed { background-color: #5d6f54; }
+    QPushButton:disabled { background-color: #c0c0c0; color: #808080; }
+"""
+
+USER_BUTTON_STYLE = """
+    QPushButton { 
+        background-color: white; 
+        color: #495057; 
+        border: 2px solid #ced4da; 
+        font-weight: normal; 
+        font-size: 18px; 
+        padding: 2px;
+    } 
+    QPushButton:hover { border-color: #adb5bd; } 
+    QPushButton:checked { 
+        border: 3px solid #7d9471; 
+        background-color: #f8f9fa; 
+        color: #7d9471; 
+        font-weight: bold; 
+        font-size: 18px;
+        padding: 3px;
+    }
+"""
+
+GRAY_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #c0c0c0;
+        color: #808080;
+        border: none;
+        padding: 8px 16px;
+        border-radius: 4px;
+        font-weight: bold;
+    }
+"""
+
+
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def get_data_file_path():
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.path.dirname(sys.executable), 'interior_settlement_data.json')
+    return 'interior_settlement_data.json'
+
+
+def get_image_store_dir():
+    return os.path.join(os.path.dirname(get_data_file_path()), 'memo_images')
+
+
+def create_data_store():
+    data_file = get_data_file_path()
+    if LOCAL_STORAGE_BACKEND == "sqlite":
+        return SQLiteDataStore(os.path.splitext(data_file)[0] + '.db', legacy_json_file=data_file)
+    return DataJournal(data_file)
+
+
+def get_memo_store_dir():
+    return os.path.join(os.path.dirname(get_data_file_path()), 'memos')
+
+
+def get_outbox_path():
+    return os.path.join(os.path.dirname(get_data_file_path()), 'firebase_outbox.json')
+
+
+def get_mirror_dir():
+    return os.path.join(os.path.dirname(get_data_file_path()), 'firebase_mirror')
+
+
+def get_backup_dir():
+    exe_dir = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
+    return os.path.join(exe_dir, "backups")
+
+
+def memo_has_content(memo):
+    """메모에 실제 내용(글자 또는 이미지)이 있는지 확인"""
+    if not memo:
+        return False
+    try:
+        memo_data = json.loads(memo)
+        if isinstance(memo_data, dict) and 'html' in memo_data:
+            doc = QTextDocument()
+            doc.setHtml(memo_data['html'])
+            plain_text = doc.toPlainText().strip()
+            return bool((plain_text and any(char not in ' \t\n\r' for char in plain_text)) or
+                        (memo_data.get('images') and len(memo_data['images']) > 0) or
+                        memo_data.get('image_refs') or
+                        '<img' in memo_data['html'])
+    except:
+        pass
+    doc = QTextDocument()
+    doc.setHtml(memo)
+    plain_text = doc.toPlainText().strip()
+    return bool(plain_text and any(char not in ' \t\n\r' for char in plain_text))
+
+
+def ensure_item_ids(projects_data):
+    """id가 없는 이전 버전 항목에 id 부여 (부여한 항목이 있으면 True)"""
+    assigned = False
+    for items in projects_data.values():
+        for item in items:
+            if not item.get('id'):
+                item['id'] = str(uuid.uuid4())
+                assigned = True
+    return assigned
+
+
+_MISSING = object()
+
+
+@lru_cache(maxsize=8192)
+def ordinal_to_date_string(ordinal):
+    return datetime.fromordinal(ordinal).strftime('%Y-%m-%d')
+
+
+class SettlementItem:
+    """정산 항목 레코드
+
+    dict 대신 __slots__로 항목당 메모리를 줄이고, 작성자/공정 문자열은 intern, 날짜는 서수(ordinal)로 보관
+    기존 코드와 저장 형식(JSON/Firebase)을 위해 dict처럼 get, [], in, pop, copy로 접근 가능
+    """
+
+    FIELDS = ('user', 'date', 'process', 'name', 'material_amount', 'labor_amount', 'vat_included',
+              'vat_amount', 'total_amount', 'id', 'created_at', 'has_memo', 'memo_rev', 'field_times')
+    SLOT_FIELDS = frozenset(FIELDS) - {'date'}
+    INTERNED_FIELDS = frozenset(['user', 'process'])
+
+    # 값이 없는 필드는 슬롯을 비워 두어 dict에 키가 없는 것과 같이 동작
+    __slots__ = ('user', 'date_ordinal', 'date_text', 'process', 'name', 'material_amount', 'labor_amount',
+                 'vat_included', 'vat_amount', 'total_amount', 'id', 'created_at', 'has_memo', 'memo_rev',
+                 'field_times', 'extra')
+
+    def __init__(self, data=None):
+        self.extra = None  # 알 수 없는 키 (이전/이후 버전 호환용)
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, cls):
+            return data
+        return cls(data)
+
+    def to_dict(self):
+        return {key: self._lookup(key) for key in self.keys()}
+
+    def copy(self):
+        item = SettlementItem()
+        for name in self.__slots__:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                setattr(item, name, value)
+        if self.extra:
+            item.extra = dict(self.extra)
+        return item
+
+    def _set_date(self, value):
+        self._clear_date()
+        if isinstance(value, str) and len(value) == 10:
+            try:
+                ordinal = datetime.strptime(value, '%Y-%m-%d').toordinal()
+                if ordinal_to_date_string(ordinal) == value:
+                    self.date_ordinal = ordinal
+                    return
+            except ValueError:
+                pass
+        # 형식이 다른 날짜는 원래 값 그대로 보관
+        self.date_text = value
+
+    def _clear_date(self):
+        for name in ('date_ordinal', 'date_text'):
+            if hasattr(self, name):
+                delattr(self, name)
+
+    def _lookup(self, key):
+        if key == 'date':
+            ordinal = getattr(self, 'date_ordinal', None)
+            if ordinal is not None:
+                return ordinal_to_date_string(ordinal)
+            return getattr(self, 'date_text', _MISSING)
+        if key in self.SLOT_FIELDS:
+            return getattr(self, key, _MISSING)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        return _MISSING
+
+    def weekday(self):
+        """요일 번호 (월=0), 날짜가 서수로 저장되지 않았으면 None"""
+        ordinal = getattr(self, 'date_ordinal', None)
+        return (ordinal - 1) % 7 if ordinal is not None else None
+
+    def date_key(self):
+        """날짜 정렬용 값 (날짜가 없거나 형식이 다르면 가장 앞)"""
+        return getattr(self, 'date_ordinal', 0)
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key == 'date':
+            self._set_date(value)
+        elif key in self.SLOT_FIELDS:
+            if key in self.INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if self._lookup(key) is _MISSING:
+            raise KeyError(key)
+        if key == 'date':
+            self._clear_date()
+        elif key in self.SLOT_FIELDS:
+            delattr(self, key)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def pop(self, key, *default):
+        value = self._lookup(key)
+        if value is _MISSING:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        del self[key]
+        return value
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if self._lookup(key) is not _MISSING]
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def values(self):
+        return [self._lookup(key) for key in self.keys()]
+
+    def items(self):
+        return [(key, self._lookup(key)) for key in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (SettlementItem, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"SettlementItem({self.to_dict()!r})"
+
+
+def to_settlement_items(projects_data):
+    """저장/동기화 형식(dict 목록)의 프로젝트 데이터를 SettlementItem 목록으로 변환"""
+    converted = {}
+    for project, items in projects_data.items():
+        if isinstance(items, dict):
+            items = list(items.values())
+        converted[project] = [SettlementItem.from_dict(item) for item in (items or []) if item]
+    return converted
+
+
+# 필드 단위 병합: 메모 본문은 메모 저장소에 있으므로 has_memo/memo_rev는 'memo' 필드로 묶어 비교
+MERGE_FIELD_GROUPS = {'has_memo': 'memo', 'memo_rev': 'memo'}
+MERGE_EXCLUDED_FIELDS = frozenset(['id', 'field_times'])
+AMOUNT_FIELDS = ('material_amount', 'labor_amount', 'vat_included', 'vat_amount', 'total_amount')
+
+
+def stamp_changed_fields(item, old_item, writer):
+    """이전 상태와 달라진 필드에 [수정 시각(ms), 작성 세션 id] 기록 (field_times)"""
+    changed = set()
+    for key in set(item.keys()) | set(old_item.keys()):
+        if key not in MERGE_EXCLUDED_FIELDS and item.get(key) != old_item.get(key):
+            changed.add(MERGE_FIELD_GROUPS.get(key, key))
+    if changed:
+        stamp = [int(time.time() * 1000), writer]
+        # 되돌리기 기록과 같은 dict를 공유하므로 새 dict로 교체
+        field_times = dict(item.get('field_times') or {})
+        field_times.update((field, stamp) for field in changed)
+        item['field_times'] = field_times
+    return changed
+
+
+def merge_item_fields(local, remote):
+    """필드별로 나중에 수정한 쪽 값을 채택 (시각이 같으면 세션 id로 결정해 모든 PC에서 같은 결과)
+
+    local, remote: 같은 id의 항목 (dict 또는 SettlementItem)
+    반환: (병합된 dict, 로컬 값을 채택한 필드 집합)
+    """
+    local_times = local.get('field_times') or {}
+    remote_times = remote.get('field_times') or {}
+    merged = dict(remote.items())
+    local_won = set()
+    
+    for key in set(local.keys()) | set(remote.keys()):
+        if key in MERGE_EXCLUDED_FIELDS:
+            continue
+        field = MERGE_FIELD_GROUPS.get(key, key)
+        if tuple(local_times.get(field) or (0, '')) > tuple(remote_times.get(field) or (0, '')):
+            local_won.add(field)
+            if key in local:
+                merged[key] = local[key]
+            else:
+                merged.pop(key, None)
+    
+    if 'memo' in local_won:
+        # 로컬 메모가 최신 - 원격 메모 본문으로 덮어쓰지 않음
+        merged.pop('memo', None)
+    
+    field_times = dict(remote_times)
+    for field, stamp in local_times.items():
+        if tuple(stamp) > tuple(field_times.get(field) or (0, '')):
+            field_times[field] = stamp
+    if field_times:
+        merged['field_times'] = field_times
+    return merged, local_won
+
+
+def merge_outgoing_item(item, current):
+    """보낼 항목과 원격의 같은 id 항목을 필드 단위로 병합
+    원격에 수정 시각이 없는 필드는 보낼 값을 사용 (로컬에서 채운 기본값을 충돌로 보지 않음)"""
+    merged, local_won = merge_item_fields(item, current)
+    remote_times = current.get('field_times') or {}
+    for key, value in item.items():
+        field = MERGE_FIELD_GROUPS.get(key, key)
+        if key not in MERGE_EXCLUDED_FIELDS and (field in local_won or field not in remote_times):
+            merged[key] = value
+    return merged
+
+
+def resolve_slot_write(value, expected_id, current):
+    """원격 배열 위치에 기록할 값 결정 (ETag와 함께 받은 현재 값 기준)
+
+    value: 보낼 항목 (None이면 위치 비우기), expected_id: 보내기 전 그 위치에 있다고 알고 있던 항목 id
+    반환: (기록할 값, 배열 끝으로 옮겨 기록할 항목 또는 None)
+    """
+    current_id = current.get('id') if isinstance(current, dict) else None
+    if isinstance(value, dict) and current_id is not None and current_id == value.get('id'):
+        return merge_outgoing_item(value, current), None
+    if current_id is None or current_id == expected_id:
+        return value, None
+    # 다른 사용자가 그 위치에 다른 항목을 넣음 - 그 항목은 두고 보낼 항목은 배열 끝으로 옮김
+    return current, value if isinstance(value, dict) else None
+
+
+def resolve_project_write(items, current):
+    """프로젝트 전체 기록 - 원격에 같은 이름의 프로젝트가 생겼으면 같은 id는 병합하고 나머지는 뒤에 추가"""
+    if current is None:
+        return items
+    if isinstance(current, dict):
+        current = [item for key, item in sorted(current.items(), key=lambda entry: int(entry[0])) if str(key).isdigit()]
+    merged = [item for item in current if isinstance(item, dict)]
+    positions = {item.get('id'): position for position, item in enumerate(merged)}
+    for item in items or []:
+        if not isinstance(item, dict):
+            continue
+        position = positions.get(item.get('id'))
+        if position is None:
+            merged.append(item)
+        else:
+            merged[position] = merge_outgoing_item(item, merged[position])
+    return merged
+
+
+def coalesce_changes(changes):
+    """[(경로 목록, 값)] 변경 목록에서 나중 변경에 덮어써지는 앞의 변경(같은 경로 또는 하위 경로)을 제거"""
+    merged = []
+    for parts, value in changes:
+        depth = len(parts)
+        merged = [(earlier, earlier_value) for earlier, earlier_value in merged if earlier[:depth] != parts]
+        merged.append((parts, value))
+    return merged
+
+
+def split_upload_chunks(data, limit):
+    """프로젝트/항목 경로로 나눈 다중 경로 update 목록 (묶음마다 JSON 크기가 limit 이하, 항목 하나가 더 크면 단독 묶음)"""
+    chunks = []
+    chunk, size = {}, 0
+    for project, items in data.items():
+        for index, item in enumerate(items or []):
+            if item is None:
+                continue
+            path = f"{project}/{index}"
+            item_size = len(json.dumps(item, ensure_ascii=False).encode('utf-8')) + len(path.encode('utf-8')) + 6
+            if chunk and size + item_size > limit:
+                chunks.append(chunk)
+                chunk, size = {}, 0
+            chunk[path] = item
+            size += item_size
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def create_memo_store(data_store, writer=None):
+    if isinstance(data_store, SQLiteDataStore):
+        return SQLiteMemoStore(data_store, writer)
+    return MemoStore(get_memo_store_dir(), writer)
+
+
+def write_json_atomic(path, data, indent=2):
+    """임시 파일에 기록 후 fsync, rename 하여 중간에 끊겨도 기존 파일이 보존되도록 저장"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        if hasattr(os, 'fsync'):
+            os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class SnapshotWriter:
+    """압축 스냅샷(백업) 파일을 프로젝트 단위로 이어 쓰는 기록기
+
+    파일 구조: 헤더(매직 + 버전 + 압축 방식) 뒤에 [종류, 이름 길이, 본문 길이, 이름, 압축된 JSON] 섹션 반복
+    """
+
+    def __init__(self, path, codec=SNAPSHOT_CODEC_ZLIB, meta=None):
+        self.path = path
+        self.codec = codec
+        self._temp_path = f"{path}.tmp"
+        self._file = open(self._temp_path, 'wb')
+        self._file.write(SNAPSHOT_MAGIC + struct.pack('<BB', SNAPSHOT_VERSION, codec))
+        self.write_section(SNAPSHOT_SECTION_META, '', dict({
+            'created_at': datetime.now().isoformat(),
+            'app_version': CURRENT_VERSION
+        }, **(meta or {})))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def write_project(self, name, items):
+        self.write_section(SNAPSHOT_SECTION_PROJECT, name, items)
+
+    def write_section(self, section_type, name, data):
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if self.codec == SNAPSHOT_CODEC_LZMA:
+            payload = lzma.compress(payload)
+        else:
+            payload = zlib.compress(payload, 6)
+        name_bytes = name.encode('utf-8')
+        self._file.write(struct.pack('<BII', section_type, len(name_bytes), len(payload)))
+        self._file.write(name_bytes)
+        self._file.write(payload)
+
+    def close(self):
+        """끝 표시를 기록하고 fsync 후 최종 파일명으로 교체"""
+        self._file.write(struct.pack('<BII', SNAPSHOT_SECTION_END, 0, 0))
+        self._file.flush()
+        if hasattr(os, 'fsync'):
+            os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        try:
+            self._file.close()
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+
+class SnapshotReader:
+    """압축 스냅샷 파일을 프로젝트 단위로 순서대로 읽는 읽기기"""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self.codec = None
+        self.meta = {}
+
+    @staticmethod
+    def is_snapshot(path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+        except OSError:
+            return False
+
+    def __iter__(self):
+        """(프로젝트명, 항목 목록)을 하나씩 반환 - 전체를 메모리에 올리지 않음"""
+        for section_type, name, data in self.sections():
+            if section_type == SNAPSHOT_SECTION_PROJECT:
+                yield name, data
+
+    def sections(self):
+        """모든 섹션을 (종류, 이름, 데이터)로 하나씩 반환"""
+        with open(self.path, 'rb') as f:
+            header = f.read(len(SNAPSHOT_MAGIC) + 2)
+            if len(header) < len(SNAPSHOT_MAGIC) + 2 or not header.startswith(SNAPSHOT_MAGIC):
+                raise ValueError("스냅샷 파일 형식이 아닙니다")
+            self.version, self.codec = struct.unpack('<BB', header[len(SNAPSHOT_MAGIC):])
+            if self.version > SNAPSHOT_VERSION:
+                raise ValueError(f"지원하지 않는 스냅샷 버전입니다: {self.version}")
+
+            section_header_size = struct.calcsize('<BII')
+            while True:
+                section_header = f.read(section_header_size)
+                if len(section_header) < section_header_size:
+                    raise ValueError("스냅샷 파일이 손상되었습니다 (끝 표시 없음)")
+                section_type, name_length, payload_length = struct.unpack('<BII', section_header)
+                if section_type == SNAPSHOT_SECTION_END:
+                    return
+                name = f.read(name_length).decode('utf-8')
+                payload = f.read(payload_length)
+                if len(payload) < payload_length:
+                    raise ValueError("스냅샷 파일이 손상되었습니다 (섹션 잘림)")
+                data = json.loads(self._decompress(payload).decode('utf-8'))
+
+                if section_type == SNAPSHOT_SECTION_META:
+                    self.meta = data
+                yield section_type, name, data
+
+    def _decompress(self, payload):
+        if self.codec == SNAPSHOT_CODEC_LZMA:
+            return lzma.decompress(payload)
+        return zlib.decompress(payload)
+
+    def read_all(self):
+        return {name: items for name, items in self}
+
+
+def read_backup_file(path):
+    """백업 파일 읽기 - 압축 스냅샷과 이전 버전의 JSON 백업 모두 지원"""
+    if SnapshotReader.is_snapshot(path):
+        reader = SnapshotReader(path)
+        data = reader.read_all()
+        if reader.meta.get('kind') in ('base', 'delta'):
+            raise ValueError("증분 자동 백업 파일입니다. '자동 백업 시점으로 복원'을 사용하세요.")
+        return data
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    data.pop('_metadata', None)
+    return data
+
+
+class BackupChain:
+    """기준(base) 스냅샷 + 변경분(delta) 스냅샷으로 이루어진 증분 자동 백업
+
+    delta는 항상 가장 최근 base 대비 변경분만 담으므로 base와 delta 하나만 읽으면 어느 시점이든 복원 가능
+    메모 본문과 이미지는 해시로 구분해 base에 이미 있는 것은 다시 저장하지 않음
+    """
+
+    BASE_INTERVAL = 24 * 60 * 60  # 하루마다 새 base
+    MAX_DELTAS_PER_BASE = 48
+    POINT_PATTERN = re.compile(r'^chain_(\d{8}_\d{6})_(base|delta)' + re.escape(SNAPSHOT_EXTENSION) + '$')
+
+    def __init__(self, backup_dir, data_store, memo_store, image_store):
+        self.backup_dir = backup_dir
+        self.state_file = os.path.join(backup_dir, 'chain_state.json')
+        self.pending_file = os.path.join(backup_dir, 'chain_pending')
+        self.data_store = data_store
+        self.memo_store = memo_store
+        self.image_store = image_store
+
+    def points(self):
+        """복원 가능한 시점 목록 (오래된 순) - [(파일명, 생성 시각, 'base' 또는 'delta')]"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        points = []
+        for file_name in sorted(os.listdir(self.backup_dir)):
+            match = self.POINT_PATTERN.match(file_name)
+            if match:
+                points.append((file_name, datetime.strptime(match.group(1), '%Y%m%d_%H%M%S'), match.group(2)))
+        return points
+
+    def mark_pending(self):
+        """백업하지 못한 변경이 있음을 기록 (종료 시에는 백업 대신 표시만 남기고 다음 실행에서 백업)"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        with open(self.pending_file, 'w', encoding='utf-8'):
+            pass
+
+    def has_pending(self):
+        return os.path.exists(self.pending_file)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(os.path.join(self.backup_dir, state.get('base', ''))):
+            return None
+        return state
+
+    @staticmethod
+    def _item_hash(item):
+        return hashlib.sha1(json.dumps(item, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def capture(self):
+        """현재 로컬 저장소 상태를 base 또는 delta로 기록 (저장 스레드에서 실행)"""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        state = self._load_state()
+        is_base = (state is None or time.time() - state['created'] >= self.BASE_INTERVAL
+                   or state.get('deltas', 0) >= self.MAX_DELTAS_PER_BASE)
+        kind = 'base' if is_base else 'delta'
+        file_name = f"chain_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{kind}{SNAPSHOT_EXTENSION}"
+        if os.path.exists(os.path.join(self.backup_dir, file_name)):
+            return None
+
+        base_items = {} if is_base else state['items']
+        written_memos = set() if is_base else set(state['memos'])
+        written_images = set() if is_base else set(state['images'])
+        project_names = sorted(self.data_store.load_index())
+        item_hashes = {}
+
+        meta = {'kind': kind, 'base': None if is_base else state['base'], 'projects': project_names}
+        with SnapshotWriter(os.path.join(self.backup_dir, file_name), SNAPSHOT_CODEC_ZLIB, meta) as writer:
+            for project in project_names:
+                base_hashes = base_items.get(project, {})
+                hashes = {}
+                entries = []
+                changed = []
+                new_memos = {}
+                for item in self.data_store.load_project(project):
+                    entry = dict(item)
+                    memo = self.memo_store.get(item['id']) if item.get('has_memo') else ''
+                    if memo:
+                        memo_hash = hashlib.sha256(memo.encode('utf-8')).hexdigest()
+                        entry['memo_hash'] = memo_hash
+                        if memo_hash not in written_memos:
+                            new_memos[memo_hash] = memo
+                            written_memos.add(memo_hash)
+                    hashes[entry['id']] = self._item_hash(entry)
+                    entries.append(entry)
+                    if base_hashes.get(entry['id']) != hashes[entry['id']]:
+                        changed.append(entry)
+                item_hashes[project] = hashes
+
+                if is_base:
+                    writer.write_project(project, entries)
+                elif changed or list(hashes) != list(base_hashes):
+                    writer.write_section(SNAPSHOT_SECTION_DELTA, project, {'items': changed, 'order': list(hashes)})
+
+                if new_memos:
+                    writer.write_section(SNAPSHOT_SECTION_MEMOS, project, new_memos)
+                    new_images = {}
+                    for image_hash in ImageBlobStore.referenced_hashes(new_memos.values()) - written_images:
+                        png_bytes = self.image_store.get(image_hash)
+                        if png_bytes is not None:
+                            new_images[image_hash] = base64.b64encode(png_bytes).decode('ascii')
+                            written_images.add(image_hash)
+                    if new_images:
+                        writer.write_section(SNAPSHOT_SECTION_IMAGES, project, new_images)
+
+        if is_base:
+            state = {'base': file_name, 'created': time.time(), 'deltas': 0, 'items': item_hashes,
+                     'memos': sorted(written_memos), 'images': sorted(written_images)}
+        else:
+            state['deltas'] = state.get('deltas', 0) + 1
+        write_json_atomic(self.state_file, state, indent=None)
+        if os.path.exists(self.pending_file):
+            os.remove(self.pending_file)
+        return file_name
+
+    def apply_retention(self, now=None):
+        """하루 이내는 시간별, 한 달 이내는 일별, 그 이후는 주별로 한 시점씩만 유지"""
+        now = now or datetime.now()
+        points = self.points()
+        if not points:
+            return 0
+
+        keep = {points[-1][0]}
+        buckets = set()
+        for file_name, created, kind in reversed(points):
+            age = now - created
+            if age <= timedelta(days=1):
+                bucket = ('hour', created.strftime('%Y%m%d%H'))
+            elif age <= timedelta(days=30):
+                bucket = ('day', created.strftime('%Y%m%d'))
+            else:
+                bucket = ('week', tuple(created.isocalendar()[:2]))
+            if bucket not in buckets:
+                buckets.add(bucket)
+                keep.add(file_name)
+
+        # 남기는 delta가 기준으로 하는 base(바로 앞의 base)와 현재 base는 유지
+        state = self._load_state()
+        if state:
+            keep.add(state['base'])
+        last_base = None
+        for file_name, created, kind in points:
+            if kind == 'base':
+                last_base = file_name
+            elif file_name in keep and last_base:
+                keep.add(last_base)
+
+        removed = 0
+        for file_name, created, kind in points:
+            if file_name not in keep:
+                try:
+                    os.remove(os.path.join(self.backup_dir, file_name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def _read_point(self, file_name):
+        point = {'meta': {}, 'projects': {}, 'deltas': {}, 'memos': {}, 'images': {}}
+        reader = SnapshotReader(os.path.join(self.backup_dir, file_name))
+        for section_type, name, data in reader.sections():
+            if section_type == SNAPSHOT_SECTION_PROJECT:
+                point['projects'][name] = data
+            elif section_type == SNAPSHOT_SECTION_DELTA:
+                point['deltas'][name] = data
+            elif section_type == SNAPSHOT_SECTION_MEMOS:
+                point['memos'].update(data)
+            elif section_type == SNAPSHOT_SECTION_IMAGES:
+                point['images'].update(data)
+        point['meta'] = reader.meta
+        return point
+
+    def restore(self, file_name):
+        """선택한 시점의 전체 데이터를 base + delta로 재구성 (이미지는 이미지 저장소에 복원)"""
+        point = self._read_point(file_name)
+        if point['meta'].get('kind') == 'delta':
+            base = self._read_point(point['meta']['base'])
+            projects_data = {}
+            for project in point['meta'].get('projects', []):
+                items = {item['id']: item for item in base['projects'].get(project, [])}
+                delta = point['deltas'].get(project)
+                if delta:
+                    items.update((item['id'], item) for item in delta['items'])
+                    projects_data[project] = [items[item_id] for item_id in delta['order'] if item_id in items]
+                else:
+                    projects_data[project] = list(items.values())
+            memos = dict(base['memos'], **point['memos'])
+            images = dict(base['images'], **point['images'])
+        else:
+            projects_data = point['projects']
+            memos = point['memos']
+            images = point['images']
+
+        for image_hash, encoded in images.items():
+            if not self.image_store.has(image_hash):
+                self.image_store.put(base64.b64decode(encoded))
+
+        for items in projects_data.values():
+            for item in items:
+                memo_hash = item.pop('memo_hash', None)
+                item['memo'] = memos.get(memo_hash, '') if memo_hash else ''
+        return projects_data
+
+
+def calculate_totals(items):
+    """항목 목록의 자재비/인건비/부가세/총액 합계"""
+    totals = {'material': 0, 'labor': 0, 'vat': 0, 'grand': 0}
+    for item in items:
+        totals['material'] += item.get('material_amount', 0)
+        totals['labor'] += item.get('labor_amount', 0)
+        totals['vat'] += item.get('vat_amount', 0)
+        totals['grand'] += item.get('total_amount', 0)
+    return totals
+
+
+_DIGEST_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+def content_digest(value):
+    """정렬된 JSON의 blake2b 해시 (값이 None인 필드는 제외, 실행마다 같은 값)"""
+    if isinstance(value, dict) and None in value.values():
+        value = {key: field for key, field in value.items() if field is not None}
+    data = _DIGEST_ENCODER.encode(value)
+    return int.from_bytes(hashlib.blake2b(data.encode('utf-8'), digest_size=16).digest(), 'big')
+
+
+class DataDigest:
+    """원격 데이터의 항목 해시를 프로젝트/전체 해시로 묶은 Merkle 방식 요약
+
+    항목은 원격 배열 위치(인덱스)로 구분하고, 프로젝트 해시는 (인덱스, 항목 해시) 해시의 XOR
+    (같은 항목이 두 번 있거나 위치만 바뀌어도 해시가 달라짐),
+    전체 해시는 (프로젝트 이름, 프로젝트 해시) 해시의 XOR이라 항목 하나가 바뀌면 O(1)로 갱신
+    """
+
+    def __init__(self):
+        self.items = {}     # 프로젝트 -> {인덱스: 항목 해시}
+        self.projects = {}  # 프로젝트 -> 프로젝트 해시
+        self.root = 0
+
+    @classmethod
+    def from_data(cls, data):
+        digest = cls()
+        for project, items in data.items():
+            if project not in ('_metadata', '_summary'):
+                digest.set_project(project, items)
+        return digest
+
+    @staticmethod
+    def _entries(items):
+        if isinstance(items, dict):
+            return [(int(key), item) for key, item in items.items() if str(key).isdigit()]
+        if isinstance(items, list):
+            return list(enumerate(items))
+        return []
+
+    def _project_node(self, project):
+        return content_digest([project, self.projects[project]])
+
+    @staticmethod
+    def _slot_node(index, item_digest):
+        return content_digest([index, item_digest])
+
+    def _set_project_digest(self, project, value):
+        if project in self.projects:
+            self.root ^= self._project_node(project)
+        self.projects[project] = value
+        self.root ^= self._project_node(project)
+
+    def set_project(self, project, items):
+        self.remove_project(project)
+        slots = {index: content_digest(item) for index, item in self._entries(items) if isinstance(item, dict)}
+        project_digest = 0
+        for index, item_digest in slots.items():
+            project_digest ^= self._slot_node(index, item_digest)
+        self.items[project] = slots
+        self._set_project_digest(project, project_digest)
+
+    def remove_project(self, project):
+        if project in self.projects:
+            self.root ^= self._project_node(project)
+            del self.projects[project]
+            del self.items[project]
+
+    def set_item(self, project, index, item, item_digest=None):
+        if project not in self.projects:
+            self.items[project] = {}
+            self._set_project_digest(project, 0)
+        if item_digest is None:
+            item_digest = content_digest(item)
+        slots = self.items[project]
+        old = self._slot_node(index, slots[index]) if index in slots else 0
+        slots[index] = item_digest
+        self._set_project_digest(project, self.projects[project] ^ old ^ self._slot_node(index, item_digest))
+
+    def remove_item(self, project, index):
+        slots = self.items.get(project)
+        if slots and index in slots:
+            self._set_project_digest(project, self.projects[project] ^ self._slot_node(index, slots.pop(index)))
+
+    def invalidate_item(self, project, index):
+        """항목 일부만 바뀌어 원격 항목 전체를 모르는 경우 - 다음 비교 때 바뀐 항목으로 처리"""
+        self.set_item(project, index, None, item_digest=-1 & ((1 << 128) - 1))
+
+    def diff(self, other):
+        """other(새 데이터)와 비교해 바뀐 프로젝트별 {인덱스} 반환 (None이면 프로젝트 전체가 추가/삭제됨)"""
+        if self.root == other.root:
+            return {}
+        changed = {}
+        for project in set(self.projects) | set(other.projects):
+            if self.projects.get(project) != other.projects.get(project):
+                changed[project] = self.diff_project(project, other)
+        return changed
+
+    def diff_project(self, project, other):
+        """프로젝트 하나만 비교해 바뀐 {인덱스} 반환 (None이면 한쪽에만 있는 프로젝트)"""
+        if project not in self.projects or project not in other.projects:
+            return None if project in self.projects or project in other.projects else set()
+        old_items, new_items = self.items[project], other.items[project]
+        return {index for index in set(old_items) | set(new_items) if old_items.get(index) != new_items.get(index)}
+
+
+class DataJournal:
+    """프로젝트별 데이터 파일(샤드) + 목록 파일(매니페스트) + 변경 기록(저널) 기반 로컬 저장소"""
+
+    supports_queries = False
+    COMPACT_RECORD_LIMIT = 500
+    COMPACT_SIZE_LIMIT = 5 * 1024 * 1024  # 5MB
+
+    def __init__(self, data_file):
+        # 이전 버전의 단일 파일 (최초 실행 시 샤드로 옮긴 뒤 그대로 남겨 둠)
+        self.legacy_file = data_file
+        self.legacy_journal_file = data_file + '.journal'
+
+        self.base_dir = os.path.splitext(data_file)[0]
+        self.shard_dir = os.path.join(self.base_dir, 'projects')
+        self.manifest_file = os.path.join(self.base_dir, 'manifest.json')
+        self.journal_file = os.path.join(self.base_dir, 'journal.log')
+        self.record_count = 0
+        self.journal_size = 0
+
+        # 저장 스레드와 프로젝트 로딩 스레드가 함께 사용
+        self._lock = threading.RLock()
+        self._index = None     # 프로젝트명 -> {'file', 'count', 'totals'}
+        self._pending = {}     # 프로젝트명 -> 아직 샤드에 반영되지 않은 항목 변경 기록
+
+    def exists(self):
+        return (os.path.exists(self.manifest_file) or os.path.exists(self.legacy_file)
+                or os.path.exists(self.legacy_journal_file))
+
+    def _read_index(self):
+        """매니페스트를 읽고 저널의 변경 기록을 프로젝트별로 분류"""
+        if self._index is not None:
+            return
+        if not os.path.exists(self.manifest_file) and (
+                os.path.exists(self.legacy_file) or os.path.exists(self.legacy_journal_file)):
+            self._migrate_legacy()
+            return
+
+        self._index = {}
+        self._pending = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            for name, entry in manifest.get('projects', {}).items():
+                self._index[name] = entry
+
+        self.record_count = 0
+        self.journal_size = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 종료되어 잘린 마지막 줄은 무시
+                        continue
+                    self._index_record(record)
+                    self.record_count += 1
+            self.journal_size = os.path.getsize(self.journal_file)
+
+    def load_legacy(self):
+        """이전 버전의 단일 JSON 파일 + 저널을 읽기만 함 (샤드나 매니페스트를 쓰지 않음)"""
+        projects_data = {}
+        if os.path.exists(self.legacy_file):
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                projects_data = json.load(f)
+        if os.path.exists(self.legacy_journal_file):
+            with open(self.legacy_journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.apply_record(projects_data, json.loads(line))
+                    except ValueError:
+                        continue
+        return projects_data
+
+    def _migrate_legacy(self):
+        """단일 JSON 파일 + 저널을 프로젝트별 샤드로 1회 변환"""
+        projects_data = self.load_legacy()
+
+        self._index = {}
+        self._pending = {}
+        self.compact(projects_data)
+        if os.path.exists(self.legacy_journal_file):
+            os.remove(self.legacy_journal_file)
+
+    def _index_record(self, record):
+        op = record.get('op')
+        project = record.get('project')
+
+        if op in ('upsert', 'delete'):
+            self._index.setdefault(project, {'file': None, 'count': 0, 'totals': calculate_totals([])})
+            self._pending.setdefault(project, []).append(record)
+
+        elif op == 'totals':
+            entry = self._index.setdefault(project, {'file': None})
+            entry['count'] = record.get('count', 0)
+            entry['totals'] = record.get('totals', calculate_totals([]))
+
+        elif op == 'project_add':
+            self._index.setdefault(project, {'file': None, 'count': 0, 'totals': calculate_totals([])})
+
+        elif op == 'project_delete':
+            self._index.pop(project, None)
+            self._pending.pop(project, None)
+
+        elif op == 'project_rename':
+            new_name = record['new_name']
+            if project in self._index:
+                self._index[new_name] = self._index.pop(project)
+            if project in self._pending:
+                # 대기 중인 변경도 새 이름으로 재적용되도록 기록의 프로젝트 이름을 바꿈
+                self._pending[new_name] = [dict(pending, project=new_name) for pending in self._pending.pop(project)]
+
+    def load_index(self):
+        """프로젝트 목록과 저장된 합계만 반환 (항목 데이터는 읽지 않음)"""
+        with self._lock:
+            self._read_index()
+            return {name: {'count': entry.get('count', 0), 'totals': dict(entry.get('totals') or calculate_totals([]))}
+                    for name, entry in self._index.items()}
+
+    def load_project(self, project):
+        """프로젝트 하나의 샤드를 읽고 남아 있는 변경 기록을 재적용"""
+        with self._lock:
+            self._read_index()
+            entry = self._index.get(project)
+            if entry is None:
+                return []
+            shard_file = entry.get('file')
+            pending = list(self._pending.get(project, []))
+
+        items = []
+        if shard_file:
+            path = os.path.join(self.shard_dir, shard_file)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    items = json.load(f).get('items', [])
+
+        projects_data = {project: items}
+        for record in pending:
+            self.apply_record(projects_data, record)
+        return projects_data.get(project, [])
+
+    def load(self):
+        """모든 프로젝트 데이터를 읽음 (전체 백업/동기화용)"""
+        return {project: self.load_project(project) for project in self.load_index()}
+
+    def append(self, records):
+        if not records:
+            return
+        lines = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        with self._lock:
+            self._read_index()
+            os.makedirs(self.base_dir, exist_ok=True)
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                if hasattr(os, 'fsync'):
+                    os.fsync(f.fileno())
+            for record in records:
+                self._index_record(record)
+            self.record_count += len(records)
+            self.journal_size += len(lines.encode('utf-8'))
+
+    def needs_compaction(self):
+        return self.record_count >= self.COMPACT_RECORD_LIMIT or self.journal_size >= self.COMPACT_SIZE_LIMIT
+
+    def compact(self, projects_data):
+        """변경된 프로젝트 샤드와 매니페스트를 다시 쓰고 저널을 비움
+
+        projects_data의 값이 None인 프로젝트는 아직 읽지 않은 것으로 보고 기존 샤드를 유지
+        """
+        with self._lock:
+            self._read_index()
+            os.makedirs(self.shard_dir, exist_ok=True)
+
+            new_index = {}
+            for project, items in projects_data.items():
+                entry = dict(self._index.get(project) or {})
+                if items is None:
+                    if project not in self._index:
+                        continue
+                    if not self._pending.get(project) and entry.get('file'):
+                        new_index[project] = entry
+                        continue
+                    items = self.load_project(project)
+
+                if not entry.get('file'):
+                    entry['file'] = self._shard_file_name(project, new_index)
+                write_json_atomic(os.path.join(self.shard_dir, entry['file']),
+                                  {'name': project, 'items': items}, indent=None)
+                entry['count'] = len(items)
+                entry['totals'] = calculate_totals(items)
+                new_index[project] = entry
+
+            write_json_atomic(self.manifest_file, {'version': 1, 'projects': new_index})
+
+            # 더 이상 목록에 없는 프로젝트의 샤드 삭제
+            live_files = {entry['file'] for entry in new_index.values()}
+            for file_name in os.listdir(self.shard_dir):
+                if file_name.endswith('.json') and file_name not in live_files:
+                    try:
+                        os.remove(os.path.join(self.shard_dir, file_name))
+                    except OSError:
+                        pass
+
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._index = new_index
+            self._pending = {}
+            self.record_count = 0
+            self.journal_size = 0
+
+    def _shard_file_name(self, project, new_index):
+        used = {entry.get('file') for entry in list(self._index.values()) + list(new_index.values())}
+        base = hashlib.sha1(project.encode('utf-8')).hexdigest()[:16]
+        file_name = f"{base}.json"
+        suffix = 1
+        while file_name in used:
+            file_name = f"{base}_{suffix}.json"
+            suffix += 1
+        return file_name
+
+    @staticmethod
+    def apply_record(projects_data, record):
+        op = record.get('op')
+        project = record.get('project')
+
+        if op == 'upsert':
+            item = record['item']
+            items = projects_data.setdefault(project, [])
+            for i, existing in enumerate(items):
+                if existing.get('id') == item.get('id'):
+                    items[i] = item
+                    break
+            else:
+                # 삭제 취소로 되살린 항목은 원래 위치에 다시 넣음
+                index = record.get('index')
+                if index is not None and 0 <= index < len(items):
+                    items.insert(index, item)
+                else:
+                    items.append(item)
+
+        elif op == 'delete':
+            if project in projects_data:
+                projects_data[project] = [item for item in projects_data[project] if item.get('id') != record.get('id')]
+
+        elif op == 'project_add':
+            projects_data.setdefault(project, [])
+
+        elif op == 'project_delete':
+            projects_data.pop(project, None)
+
+        elif op == 'project_rename':
+            if project in projects_data:
+                projects_data[record['new_name']] = projects_data.pop(project)
+
+
+class SQLiteDataStore:
+    """SQLite(WAL) 기반 로컬 저장소 - 항목 단위 저장과 집계 쿼리 지원"""
+
+    supports_queries = True
+    ITEM_COLUMNS = ['id', 'user', 'date', 'process', 'name', 'material_amount', 'labor_amount',
+                    'vat_included', 'vat_amount', 'total_amount', 'created_at']
+    AMOUNT_COLUMNS = ['material_amount', 'labor_amount', 'vat_amount', 'total_amount']
+
+    def __init__(self, db_file, legacy_json_file=None):
+        self.db_file = db_file
+        self.legacy_json_file = legacy_json_file
+        self._local = threading.local()
+        self._seq_lock = threading.Lock()
+
+        is_new = not os.path.exists(db_file)
+        self._create_schema()
+        self._next_seq = self._connection().execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM items').fetchone()[0]
+        # 기존 JSON 데이터는 처음 조회할 때(백그라운드 로딩 스레드) 1회 가져오기
+        self._import_lock = threading.Lock()
+        self._needs_import = bool(is_new and legacy_json_file and DataJournal(legacy_json_file).exists())
+
+    def _import_legacy(self):
+        with self._import_lock:
+            if not self._needs_import:
+                return
+            # 샤드로 옮겨진 데이터가 있으면 그것을, 없으면 단일 파일을 읽기만 함 (가져오기가 JSON 저장소를 바꾸지 않도록)
+            legacy_journal = DataJournal(self.legacy_json_file)
+            if os.path.exists(legacy_journal.manifest_file):
+                legacy_data = legacy_journal.load()
+            else:
+                legacy_data = legacy_journal.load_legacy()
+            ensure_item_ids(legacy_data)
+            self.compact(legacy_data)
+            self._needs_import = False
+
+    def _connection(self):
+        # sqlite3 연결은 스레드 간 공유할 수 없으므로 스레드별로 생성
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    name TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS items (
+                    id TEXT PRIMARY KEY,
+                    project TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    user TEXT,
+                    date TEXT,
+                    process TEXT,
+                    name TEXT,
+                    material_amount INTEGER DEFAULT 0,
+                    labor_amount INTEGER DEFAULT 0,
+                    vat_included INTEGER DEFAULT 0,
+                    vat_amount INTEGER DEFAULT 0,
+                    total_amount INTEGER DEFAULT 0,
+                    created_at TEXT,
+                    extra TEXT
+                );
+                CREATE TABLE IF NOT EXISTS memos (
+                    item_id TEXT PRIMARY KEY,
+                    memo TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_project_seq ON items(project, seq);
+                CREATE INDEX IF NOT EXISTS idx_items_project_date ON items(project, date);
+                CREATE INDEX IF NOT EXISTS idx_items_project_process ON items(project, process);
+                CREATE INDEX IF NOT EXISTS idx_items_project_user ON items(project, user);
+            """)
+
+    def exists(self):
+        if self._needs_import:
+            return True
+        conn = self._connection()
+        return conn.execute('SELECT 1 FROM projects LIMIT 1').fetchone() is not None
+
+    def load(self):
+        self._import_legacy()
+        conn = self._connection()
+        projects_data = {name: [] for (name,) in conn.execute('SELECT name FROM projects ORDER BY name')}
+
+        columns = ', '.join(['project'] + self.ITEM_COLUMNS + ['extra'])
+        for row in conn.execute(f'SELECT {columns} FROM items ORDER BY project, seq'):
+            projects_data.setdefault(row[0], []).append(self._row_to_item(row[1:]))
+
+        return projects_data
+
+    def load_index(self):
+        """프로젝트 목록과 합계만 조회 (항목 데이터는 읽지 않음)"""
+        self._import_legacy()
+        conn = self._connection()
+        index = {name: {'count': 0, 'totals': calculate_totals([])}
+                 for (name,) in conn.execute('SELECT name FROM projects ORDER BY name')}
+        rows = conn.execute(
+            'SELECT project, COUNT(*), COALESCE(SUM(material_amount), 0), COALESCE(SUM(labor_amount), 0), '
+            'COALESCE(SUM(vat_amount), 0), COALESCE(SUM(total_amount), 0) FROM items GROUP BY project'
+        )
+        for project, count, material, labor, vat, grand in rows:
+            index[project] = {'count': count,
+                              'totals': {'material': material, 'labor': labor, 'vat': vat, 'grand': grand}}
+        return index
+
+    def load_project(self, project):
+        self._import_legacy()
+        columns = ', '.join(self.ITEM_COLUMNS + ['extra'])
+        rows = self._connection().execute(f'SELECT {columns} FROM items WHERE project = ? ORDER BY seq', (project,))
+        return [self._row_to_item(row) for row in rows]
+
+    def _row_to_item(self, row):
+        item = {column: value for column, value in zip(self.ITEM_COLUMNS, row[:-1]) if value is not None}
+        item['vat_included'] = bool(item.get('vat_included'))
+        if row[-1]:
+            item.update(json.loads(row[-1]))
+        return item
+
+    def append(self, records):
+        if not records:
+            return
+        self._import_legacy()
+        conn = self._connection()
+        with conn:
+            for record in records:
+                self._apply_record(conn, record)
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, projects_data):
+        """전체 데이터를 한 트랜잭션으로 교체 (원격 데이터 전체 반영 시 사용)
+
+        값이 None인 프로젝트는 아직 읽지 않은 것으로 보고 기존 항목을 유지
+        """
+        conn = self._connection()
+        with conn:
+            for (name,) in conn.execute('SELECT name FROM projects').fetchall():
+                if name not in projects_data:
+                    conn.execute('DELETE FROM items WHERE project = ?', (name,))
+                    conn.execute('DELETE FROM projects WHERE name = ?', (name,))
+            for project, items in projects_data.items():
+                if items is None:
+                    continue
+                conn.execute('INSERT OR IGNORE INTO projects(name) VALUES (?)', (project,))
+                conn.execute('DELETE FROM items WHERE project = ?', (project,))
+                for item in items:
+                    self._upsert_item(conn, project, item)
+
+    def project_totals(self, project):
+        row = self._connection().execute(
+            'SELECT COALESCE(SUM(material_amount), 0), COALESCE(SUM(labor_amount), 0), '
+            'COALESCE(SUM(vat_amount), 0), COALESCE(SUM(total_amount), 0) FROM items WHERE project = ?',
+            (project,)
+        ).fetchone()
+        return {'material': row[0], 'labor': row[1], 'vat': row[2], 'grand': row[3]}
+
+    def process_totals(self, project):
+        rows = self._connection().execute(
+            "SELECT COALESCE(NULLIF(process, ''), '기타'), COALESCE(SUM(material_amount), 0), "
+            "COALESCE(SUM(labor_amount), 0), COALESCE(SUM(vat_amount), 0), COALESCE(SUM(total_amount), 0) "
+            "FROM items WHERE project = ? GROUP BY 1",
+            (project,)
+        )
+        return {process: {'material': material, 'labor': labor, 'vat': vat, 'total': total}
+                for process, material, labor, vat, total in rows}
+
+    def _apply_record(self, conn, record):
+        op = record.get('op')
+        project = record.get('project')
+
+        if op == 'upsert':
+            conn.execute('INSERT OR IGNORE INTO projects(name) VALUES (?)', (project,))
+            self._upsert_item(conn, project, record['item'], record.get('index'))
+
+        elif op == 'delete':
+            conn.execute('DELETE FROM items WHERE id = ?', (record.get('id'),))
+
+        elif op == 'project_add':
+            conn.execute('INSERT OR IGNORE INTO projects(name) VALUES (?)', (project,))
+
+        elif op == 'project_delete':
+            conn.execute('DELETE FROM items WHERE project = ?', (project,))
+            conn.execute('DELETE FROM projects WHERE name = ?', (project,))
+
+        elif op == 'project_rename':
+            conn.execute('INSERT OR IGNORE INTO projects(name) VALUES (?)', (record['new_name'],))
+            conn.execute('UPDATE items SET project = ? WHERE project = ?', (record['new_name'], project))
+            conn.execute('DELETE FROM projects WHERE name = ?', (project,))
+
+    def _upsert_item(self, conn, project, item, index=None):
+        values = [item.get(column) for column in self.ITEM_COLUMNS]
+        values[self.ITEM_COLUMNS.index('vat_included')] = 1 if item.get('vat_included') else 0
+        # 금액이 없는 항목은 0으로 저장 (합계가 NULL이 되지 않도록)
+        for column in self.AMOUNT_COLUMNS:
+            if values[self.ITEM_COLUMNS.index(column)] is None:
+                values[self.ITEM_COLUMNS.index(column)] = 0
+        extra = {key: value for key, value in item.items() if key not in self.ITEM_COLUMNS and key != 'memo'}
+
+        with self._seq_lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            # 원래 위치가 있는 새 항목은 그 자리의 순번을 차지하고 뒤 항목을 한 칸씩 밀어냄
+            if index is not None and conn.execute('SELECT 1 FROM items WHERE id = ?', (item.get('id'),)).fetchone() is None:
+                row = conn.execute('SELECT seq FROM items WHERE project = ? ORDER BY seq LIMIT 1 OFFSET ?',
+                                   (project, index)).fetchone()
+                if row is not None:
+                    seq = row[0]
+                    conn.execute('UPDATE items SET seq = seq + 1 WHERE project = ? AND seq >= ?', (project, seq))
+
+        columns = ', '.join(['project', 'seq'] + self.ITEM_COLUMNS + ['extra'])
+        placeholders = ', '.join('?' * (len(self.ITEM_COLUMNS) + 3))
+        updates = ', '.join(f'{column} = excluded.{column}' for column in ['project'] + self.ITEM_COLUMNS[1:] + ['extra'])
+        conn.execute(
+            f'INSERT INTO items({columns}) VALUES ({placeholders}) ON CONFLICT(id) DO UPDATE SET {updates}',
+            [project, seq] + values + [json.dumps(extra, ensure_ascii=False) if extra else None]
+        )
+
+        # 메모는 MemoStore에서 관리 - 이전 형식 항목을 가져올 때만 여기서 기록
+        if item.get('memo'):
+            conn.execute('INSERT OR REPLACE INTO memos(item_id, memo) VALUES (?, ?)', (item['id'], item['memo']))
+
+
+class ImageBlobStore:
+    """메모 이미지를 SHA-256 해시 이름의 파일로 한 번만 저장하는 저장소"""
+
+    IMAGE_CACHE_SIZE = 64
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self._image_cache = {}
+        self._base64_cache = {}
+
+    def _blob_path(self, image_hash):
+        return os.path.join(self.base_dir, image_hash[:2], f"{image_hash}.png")
+
+    def put(self, png_bytes):
+        image_hash = hashlib.sha256(png_bytes).hexdigest()
+        path = self._blob_path(image_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(png_bytes)
+            os.replace(temp_path, path)
+        return image_hash
+
+    def get(self, image_hash):
+        try:
+            with open(self._blob_path(image_hash), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def has(self, image_hash):
+        return os.path.exists(self._blob_path(image_hash))
+
+    def load_image(self, image_hash):
+        """디코딩한 QImage를 캐시해 행을 다시 클릭할 때 PNG를 재디코딩하지 않음"""
+        image = self._image_cache.pop(image_hash, None)
+        if image is None:
+            png_bytes = self.get(image_hash)
+            if png_bytes is None:
+                return None
+            image = QImage()
+            image.loadFromData(png_bytes)
+            if image.isNull():
+                return None
+        self._image_cache[image_hash] = image
+        while len(self._image_cache) > self.IMAGE_CACHE_SIZE:
+            self._image_cache.pop(next(iter(self._image_cache)))
+        return image
+
+    def get_base64(self, image_hash):
+        if image_hash not in self._base64_cache:
+            png_bytes = self.get(image_hash)
+            if png_bytes is None:
+                return None
+            self._base64_cache[image_hash] = base64.b64encode(png_bytes).decode('ascii')
+        return self._base64_cache[image_hash]
+
+    def externalize_memo(self, memo):
+        """메모에 포함된 base64 이미지를 저장소로 옮기고 해시 참조만 남김"""
+        memo_data = self._parse_memo(memo)
+        if not memo_data or not memo_data.get('images'):
+            return memo
+
+        image_refs = dict(memo_data.get('image_refs') or {})
+        for src, base64_data in memo_data['images'].items():
+            try:
+                png_bytes = base64.b64decode(base64_data)
+            except (ValueError, TypeError):
+                continue
+            image_hash = self.put(png_bytes)
+            self._base64_cache[image_hash] = base64_data
+            image_refs[src] = image_hash
+
+        return json.dumps({'html': memo_data['html'], 'image_refs': image_refs}, ensure_ascii=False)
+
+    def inline_memo(self, memo):
+        """이전 버전과 호환되도록 해시 참조를 base64 이미지로 다시 채움 (백업 파일용)"""
+        memo_data = self._parse_memo(memo)
+        if not memo_data or not memo_data.get('image_refs'):
+            return memo
+
+        images = {}
+        for src, image_hash in memo_data['image_refs'].items():
+            base64_data = self.get_base64(image_hash)
+            if base64_data:
+                images[src] = base64_data
+
+        return json.dumps({'html': memo_data['html'], 'images': images, 'image_refs': memo_data['image_refs']}, ensure_ascii=False)
+
+    def garbage_collect(self, referenced_hashes):
+        """어떤 메모에서도 참조하지 않는 이미지 파일 삭제"""
+        removed = 0
+        if not os.path.isdir(self.base_dir):
+            return removed
+        for sub_dir in os.listdir(self.base_dir):
+            dir_path = os.path.join(self.base_dir, sub_dir)
+            if not os.path.isdir(dir_path):
+                continue
+            for filename in os.listdir(dir_path):
+                image_hash = filename.split('.')[0]
+                if image_hash not in referenced_hashes:
+                    try:
+                        os.remove(os.path.join(dir_path, filename))
+                        self._image_cache.pop(image_hash, None)
+                        self._base64_cache.pop(image_hash, None)
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+    @classmethod
+    def referenced_hashes(cls, memos):
+        hashes = set()
+        for memo in memos:
+            if memo and 'image_refs' in memo:
+                memo_data = cls._parse_memo(memo)
+                if memo_data:
+                    hashes.update((memo_data.get('image_refs') or {}).values())
+        return hashes
+
+    @staticmethod
+    def _parse_memo(memo):
+        try:
+            memo_data = json.loads(memo)
+        except (ValueError, TypeError):
+            return None
+        if isinstance(memo_data, dict) and 'html' in memo_data:
+            return memo_data
+        return None
+
+
+class MemoStore:
+    """메모 본문을 항목 기록과 분리해 항목 id별 파일로 보관"""
+
+    CACHE_SIZE = 256
+
+    def __init__(self, base_dir, writer=None):
+        self.base_dir = base_dir
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._session = {}  # 쓰기 스레드가 아직 기록하지 않은 메모 (기록이 끝나면 제거)
+
+    def get(self, item_id):
+        with self._lock:
+            if item_id in self._session:
+                return self._session[item_id]
+            memo = self._cache.pop(item_id, None)
+        if memo is None:
+            memo = self._read(item_id)
+        self._remember(item_id, memo)
+        return memo
+
+    def put(self, item_id, memo):
+        """메모 저장 - 메모리에 있는 값과 같으면 건너뜀 (모르는 항목은 디스크를 읽지 않고 쓰기 스레드에서 비교)"""
+        with self._lock:
+            known = self._session[item_id] if item_id in self._session else self._cache.get(item_id)
+            if known == memo:
+                return False
+            self._session[item_id] = memo
+            self._cache.pop(item_id, None)
+        if self.writer:
+            self.writer.submit_task(('memo', item_id), lambda: self._store(item_id, memo))
+        else:
+            self._store(item_id, memo)
+        return True
+
+    def garbage_collect(self, live_ids):
+        """삭제된 항목의 메모 정리"""
+        removed = 0
+        for item_id in list(self.item_ids()):
+            with self._lock:
+                if item_id in live_ids or item_id in self._session:
+                    continue
+                self._cache.pop(item_id, None)
+            self._remove(item_id)
+            removed += 1
+        return removed
+
+    def _remember(self, item_id, memo):
+        with self._lock:
+            self._cache[item_id] = memo
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+
+    def all_memos(self):
+        for item_id in list(self.item_ids()):
+            yield self.get(item_id)
 
-USER_BUTTON_STYLE = """
-    QPushButton { 
-        background-color: white; 
-        color: #495057; 
-        border: 2px solid #ced4da; 
-        font-weight: normal; 
-        font-size: 18px; 
-        padding: 2px;
-    } 
-    QPushButton:hover { border-color: #adb5bd; } 
-    QPushButton:checked { 
-        border: 3px solid #7d9471; 
-        background-color: #f8f9fa; 
-        color: #7d9471; 
-        font-weight: bold; 
-        font-size: 18px;
-        padding: 3px;
-    }
-"""
+    def pending_memos(self):
+        """쓰기 스레드가 아직 기록하지 않은 메모 (디스크의 메모 목록에는 아직 없음)"""
+        with self._lock:
+            return list(self._session.values())
 
-GRAY_BUTTON_STYLE = """
-    QPushButton {
-        background-color: #c0c0c0;
-        color: #808080;
-        border: none;
-        padding: 8px 16px;
-        border-radius: 4px;
-        font-weight: bold;
-    }
-"""
+    def _store(self, item_id, memo):
+        if self._read(item_id) != memo:
+            if memo:
+                self._write(item_id, memo)
+            else:
+                self._remove(item_id)
+        # 기록이 끝난 메모는 최근 사용 캐시로만 남김 (그사이 다시 바뀌었으면 유지)
+        with self._lock:
+            written = self._session.get(item_id) is memo
+            if written:
+                del self._session[item_id]
+        if written:
+            self._remember(item_id, memo)
 
+    def _memo_path(self, item_id):
+        return os.path.join(self.base_dir, item_id[:2], f"{item_id}.json")
 
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+    def _read(self, item_id):
+        try:
+            with open(self._memo_path(item_id), 'r', encoding='utf-8') as f:
+                return json.load(f).get('memo', '')
+        except (OSError, ValueError):
+            return ''
 
+    def _write(self, item_id, memo):
+        path = self._memo_path(item_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_json_atomic(path, {'id': item_id, 'memo': memo}, indent=None)
 
-def get_data_file_path():
-    if getattr(sys, 'frozen', False):
-        return os.path.join(os.path.dirname(sys.executable), 'interior_settlement_data.json')
-    return 'interior_settlement_data.json'
+    def _remove(self, item_id):
+        try:
+            os.remove(self._memo_path(item_id))
+        except OSError:
+            pass
+
+    def item_ids(self):
+        if not os.path.isdir(self.base_dir):
+            return
+        for sub_dir in os.listdir(self.base_dir):
+            dir_path = os.path.join(self.base_dir, sub_dir)
+            if os.path.isdir(dir_path):
+                for filename in os.listdir(dir_path):
+                    if filename.endswith('.json'):
+                        yield filename[:-len('.json')]
+
+
+class SQLiteMemoStore(MemoStore):
+    """SQLite 저장소 사용 시 memos 테이블에 메모 보관"""
+
+    def __init__(self, data_store, writer=None):
+        super().__init__(None, writer)
+        self.data_store = data_store
+
+    def _read(self, item_id):
+        row = self.data_store._connection().execute('SELECT memo FROM memos WHERE item_id = ?', (item_id,)).fetchone()
+        return row[0] if row and row[0] else ''
+
+    def _write(self, item_id, memo):
+        conn = self.data_store._connection()
+        with conn:
+            conn.execute('INSERT OR REPLACE INTO memos(item_id, memo) VALUES (?, ?)', (item_id, memo))
+
+    def _remove(self, item_id):
+        conn = self.data_store._connection()
+        with conn:
+            conn.execute('DELETE FROM memos WHERE item_id = ?', (item_id,))
+
+    def item_ids(self):
+        return [item_id for (item_id,) in self.data_store._connection().execute('SELECT item_id FROM memos')]
+
+
+class PersistenceWriter(QObject):
+    """로컬 파일 기록을 전담하는 백그라운드 쓰기 스레드"""
+    write_failed = pyqtSignal(str)
+
+    RETRY_DELAY = 1.0  # 기록 실패 후 첫 재시도 간격 (초, 실패할 때마다 두 배)
+    RETRY_MAX_DELAY = 30.0
+
+    def __init__(self, journal, parent=None):
+        super().__init__(parent)
+        self.journal = journal
+        self._condition = threading.Condition()
+        self._records = []
+        self._snapshot = None
+        self._files = {}
+        self._tasks = {}
+        self._busy = False
+        self._failed = False  # 마지막 기록이 실패해 재시도를 기다리는 중
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='PersistenceWriter', daemon=True)
+        self._thread.start()
+
+    def submit_records(self, records):
+        if not records:
+            return
+        with self._condition:
+            self._records.extend(records)
+            self._condition.notify_all()
+
+    def submit_snapshot(self, snapshot):
+        # 최신 스냅샷 하나만 유지 - 이전에 대기 중이던 기록은 스냅샷에 이미 포함됨
+        with self._condition:
+            self._snapshot = snapshot
+            self._records = []
+            self._condition.notify_all()
+
+    def submit_file(self, path, data):
+        with self._condition:
+            self._files[path] = data
+            self._condition.notify_all()
+
+    def submit_task(self, key, func):
+        # 같은 key의 작업은 마지막 것만 실행
+        with self._condition:
+            self._tasks[key] = func
+            self._condition.notify_all()
+
+    def cancel_task(self, key):
+        """아직 시작하지 않은 작업 취소 - 취소했으면 True"""
+        with self._condition:
+            return self._tasks.pop(key, None) is not None
+
+    def _has_work(self):
+        return self._snapshot is not None or bool(self._records) or bool(self._files) or bool(self._tasks)
+
+    def has_pending(self):
+        with self._condition:
+            return self._busy or self._has_work()
+
+    def flush(self, timeout=None):
+        deadline = time.time() + timeout if timeout is not None else None
+        with self._condition:
+            # 기록이 계속 실패하는 동안에는 기다리지 않음 (재시도는 쓰기 스레드가 이어서 함)
+            while self._busy or (self._has_work() and not self._failed):
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return not self._has_work()
+
+    def stop(self, timeout=10):
+        self.flush(timeout)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        retry_delay = 0  # 기록에 실패하면 남은 작업을 대기열에 되돌리고 간격을 늘려 다시 시도
+        while True:
+            with self._condition:
+                retry_at = time.time() + retry_delay
+                while True:
+                    if not self._has_work():
+                        if self._stopped:
+                            return
+                        self._condition.wait()
+                    elif self._stopped or time.time() >= retry_at:
+                        break
+                    else:
+                        self._condition.wait(retry_at - time.time())
+                snapshot, self._snapshot = self._snapshot, None
+                records, self._records = self._records, []
+                files, self._files = self._files, {}
+                tasks, self._tasks = self._tasks, {}
+                self._busy = True
+
+            error = None
+            try:
+                if snapshot is not None:
+                    self.journal.compact(snapshot)
+                    snapshot = None
+                if records:
+                    self.journal.append(records)
+                    records = []
+                for path in list(files):
+                    write_json_atomic(path, files[path])
+                    del files[path]
+                for key in list(tasks):
+                    tasks[key]()
+                    del tasks[key]
+            except Exception as e:
+                error = e
+            finally:
+                with self._condition:
+                    self._busy = False
+                    if error is not None:
+                        self._requeue(snapshot, records, files, tasks)
+                    self._failed = error is not None
+                    self._condition.notify_all()
+
+            if error is not None:
+                self.write_failed.emit(str(error))
+                if self._stopped:
+                    # 종료 중에는 다시 시도하지 않음 (저널에 남지 않은 변경은 다음 실행의 전체 저장에서 다시 기록)
+                    return
+                retry_delay = min(self.RETRY_MAX_DELAY, retry_delay * 2 or self.RETRY_DELAY)
+            else:
+                retry_delay = 0
+
+    def _requeue(self, snapshot, records, files, tasks):
+        """기록하지 못한 작업을 대기열 앞쪽에 되돌림 (그사이 들어온 더 새로운 작업이 있으면 그것을 유지)"""
+        if self._snapshot is None:
+            # 새 스냅샷이 들어왔으면 되돌릴 스냅샷과 기록은 그 안에 이미 포함됨
+            if snapshot is not None:
+                self._snapshot = snapshot
+            self._records = records + self._records
+        for path, data in files.items():
+            self._files.setdefault(path, data)
+        for key, func in tasks.items():
+            self._tasks.setdefault(key, func)
+
+
+class OutboundQueue:
+    """Firebase로 보내지 못한 변경을 디스크에 보관하는 전송 대기열
+
+    batches는 전송 순서대로 {'updates': {경로: 값}} (다중 경로 update) 또는 {'seed': 전체 업로드 묶음 목록, 'done': 끝난 묶음 번호}
+    전체 업로드는 항목 묶음을 병렬로 먼저 보내고 첫 묶음({'finish': 요약})을 마지막에 기록하며 업로드에 없는 원격 프로젝트/항목을 지움
+    끝난 묶음은 done에 기록해 이어서 전송 (묶음 내용은 처음 한 번만 별도 파일에 쓰고 대기열 파일에는 묶음 수와 done만 기록)
+    원격 배열 위치(remote_slots)도 함께 보관해 재시작 후에도 변경분 전송을 이어감 (프로젝트별 파일로 나눠 바뀐 프로젝트만 기록)
+    저장할 때는 마지막으로 기록한 내용과 비교해 바뀐 부분만 쓰기 스레드에서 기록
+    메모 이미지는 업로드할 해시(image_uploads)와 이미 올린 해시(uploaded_images)만 기록
+    최근 연 프로젝트(recent_projects)는 다음 실행 때 미리 받아 둘 대상
+    묶음의 expect는 배열 위치별로 보내기 전에 알고 있던 원격 항목 id (동시 수정 충돌 판단용)
+    write_stats는 확인하며 기록한 경로 수와 다른 사용자와 충돌한 수 (받은 변경보다 로컬 값이 앞서 다시 보낸 병합 포함, 충돌 비율 확인용)
+    """
+
+    def __init__(self, path, writer=None):
+        self.path = path
+        self.slots_dir = os.path.splitext(path)[0] + '_slots'
+        self.seed_path = os.path.splitext(path)[0] + '_seed.json'
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._saved_state = None  # 마지막으로 기록(예약)한 대기열 상태
+        self._saved_slots = {}  # 프로젝트 -> 마지막으로 기록(예약)한 원격 배열 위치
+        self._unwritten_state = None
+        self._unwritten_slots = {}  # 아직 쓰지 않은 프로젝트별 배열 위치 (None이면 파일 삭제)
+        self._saved_seed = None  # 묶음 파일에 기록(예약)한 전체 업로드 묶음 목록
+        self._unwritten_seed = None  # 아직 쓰지 않은 전체 업로드 묶음 목록 (빈 목록이면 파일 삭제)
+        self.batches = []
+        self.remote_slots = None
+        self.image_uploads = []
+        self.uploaded_images = set()
+        self.recent_projects = []
+        self.write_stats = {'writes': 0, 'conflicts': 0}
+        self.attempts = 0  # 연속 전송 실패 횟수 (재시도 간격 계산용)
+        self.sending = None  # 전송 중인 묶음 (결과가 오기 전까지 변경을 합치지 않음)
+        self._load()
+
+    def _load(self):
+        # 디스크에 있는 배열 위치 파일 기준으로 다음 저장 때 바뀐 프로젝트만 다시 씀
+        self._saved_slots = self._load_slots()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.batches = [self._load_batch(batch) for batch in state.get('batches', [])]
+            self.batches = [batch for batch in self.batches
+                            if batch and ('set' in batch or batch.get('seed') or batch.get('updates'))]
+            if 'remote_slots' in state:
+                # 이전 형식 - 배열 위치가 대기열 파일에 함께 들어 있음 (다음 저장 때 프로젝트별 파일로 옮김)
+                self.remote_slots = state['remote_slots']
+            elif state.get('has_remote_slots'):
+                self.remote_slots = {project: list(slots) for project, slots in self._saved_slots.items()}
+            self.image_uploads = list(state.get('image_uploads') or [])
+            self.uploaded_images = set(state.get('uploaded_images') or [])
+            self.recent_projects = list(state.get('recent_projects') or [])
+            self.write_stats.update(state.get('write_stats') or {})
+        except (OSError, ValueError, AttributeError):
+            self.batches = []
+            self.remote_slots = None
+
+    def _load_batch(self, batch):
+        if 'seed_chunks' in batch:
+            # 전체 업로드 묶음 내용은 별도 파일에서 읽음 (없거나 맞지 않으면 버리고 다음 저장 때 전체 업로드를 다시 함)
+            try:
+                with open(self.seed_path, 'r', encoding='utf-8') as f:
+                    seed = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if len(seed) != batch['seed_chunks']:
+                return None
+            self._saved_seed = seed
+            return {'seed': seed, 'done': list(batch.get('done') or [])}
+        if batch.get('seed') and 'set' in batch['seed'][0]:
+            # 이전 형식 - 요약 묶음으로 원격을 먼저 비웠으므로 마지막에 요약을 다시 기록
+            return {'seed': [{'finish': batch['seed'][0]['set']}] + batch['seed'][1:],
+                    'done': [index for index in batch.get('done') or [] if index != 0]}
+        return batch
+
+    def _slot_file(self, project):
+        return os.path.join(self.slots_dir, hashlib.sha1(project.encode('utf-8')).hexdigest()[:16] + '.json')
+
+    def _load_slots(self):
+        remote_slots = {}
+        if os.path.isdir(self.slots_dir):
+            for file_name in os.listdir(self.slots_dir):
+                try:
+                    with open(os.path.join(self.slots_dir, file_name), 'r', encoding='utf-8') as f:
+                        record = json.load(f)
+                    remote_slots[record['project']] = list(record['slots'])
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+        return remote_slots
+
+    def add_updates(self, updates, expect=None):
+        """경로별 변경 추가 - 마지막 묶음과 경로가 겹치지 않으면 합쳐서 한 번에 전송"""
+        if not updates:
+            return
+        tail = self.batches[-1] if self.batches else None
+        if tail is None or tail is self.sending or 'updates' not in tail or self._overlaps(tail['updates'], updates):
+            self.batches.append({'updates': dict(updates), 'expect': dict(expect or {})})
+        else:
+            tail['updates'].update(updates)
+            # 같은 경로를 다시 바꿔도 원격에는 아직 처음 알고 있던 항목이 있음
+            tail_expect = tail.setdefault('expect', {})
+            for path, item_id in (expect or {}).items():
+                tail_expect.setdefault(path, item_id)
+
+    def add_seed(self, root, chunks):
+        # 전체 기록은 이전에 대기 중이던 변경을 모두 포함
+        seed = {'seed': [{'finish': root}] + [{'updates': chunk} for chunk in chunks], 'done': []}
+        self.batches = [self.sending, seed] if self.sending is not None else [seed]
+
+    def _overlaps(self, existing, updates):
+        # 다중 경로 update()는 상위/하위 경로를 함께 보낼 수 없음 (같은 경로는 새 값으로 교체)
+        prefixes = set()
+        for path in existing:
+            parts = path.split('/')
+            prefixes.update('/'.join(parts[:i]) for i in range(1, len(parts)))
+        for path in updates:
+            parts = path.split('/')
+            if path in prefixes or any('/'.join(parts[:i]) in existing for i in range(1, len(parts))):
+                return True
+        return False
+
+    def peek(self):
+        return self.batches[0] if self.batches else None
+
+    def pop(self):
+        if self.batches:
+            self.batches.pop(0)
+        self.sending = None
+
+    def pending_count(self):
+        # 프로젝트 요약 경로는 항목 변경에 딸린 것이므로 세지 않음
+        count = 0
+        for batch in self.batches:
+            if 'seed' in batch:
+                done = set(batch['done'])
+                count += max(1, sum(len(chunk.get('updates', ())) for index, chunk in enumerate(batch['seed'])
+                                    if index not in done))
+            elif 'set' in batch:
+                count += 1
+            else:
+                count += sum(not path.startswith('_summary/') for path in batch['updates'])
+        return count
+
+    def add_image(self, image_hash):
+        if image_hash not in self.uploaded_images and image_hash not in self.image_uploads:
+            self.image_uploads.append(image_hash)
+            return True
+        return False
+
+    def note_writes(self, writes, conflicts):
+        self.write_stats['writes'] += writes
+        self.write_stats['conflicts'] += conflicts
+
+    def prune_uploaded_images(self, live_hashes):
+        """로컬에서 더 이상 참조하지 않는 이미지는 올린 목록에서 제외 (다시 쓰이면 한 번 더 올림)"""
+        before = len(self.uploaded_images)
+        self.uploaded_images &= set(live_hashes)
+        return len(self.uploaded_images) != before
+
+    def image_done(self, image_hash, uploaded=True):
+        if image_hash in self.image_uploads:
+            self.image_uploads.remove(image_hash)
+        if uploaded:
+            self.uploaded_images.add(image_hash)
+
+    def save(self, remote_slots):
+        """바뀐 부분만 기록 예약 - 대기열 상태가 같고 배열 위치가 바뀐 프로젝트가 없으면 쓰지 않음"""
+        self.remote_slots = remote_slots
+        # 기록 스레드에서 직렬화하는 동안 GUI 스레드가 바꾸는 부분은 복사해 둠
+        batches = []
+        seed = []
+        for batch in self.batches:
+            if 'updates' in batch:
+                batch = dict(batch, updates=dict(batch['updates']), expect=dict(batch.get('expect') or {}))
+            elif 'seed' in batch:
+                seed = batch['seed']
+                batch = {'seed_chunks': len(seed), 'done': list(batch['done'])}
+            batches.append(batch)
+        state = {
+            'batches': batches,
+            'has_remote_slots': remote_slots is not None,
+            'image_uploads': list(self.image_uploads),
+            'uploaded_images': sorted(self.uploaded_images),
+            'recent_projects': list(self.recent_projects),
+            'write_stats': dict(self.write_stats)
+        }
+
+        current = remote_slots or {}
+        slot_changes = {project: list(slots) for project, slots in current.items()
+                        if self._saved_slots.get(project) != slots}
+        slot_changes.update(dict.fromkeys(project for project in self._saved_slots if project not in current))
+        seed_changed = seed is not self._saved_seed and (seed or self._saved_seed is not None)
+        if state == self._saved_state and not slot_changes and not seed_changed:
+            return
+
+        for project, slots in slot_changes.items():
+            if slots is None:
+                del self._saved_slots[project]
+            else:
+                self._saved_slots[project] = slots
+        with self._lock:
+            self._unwritten_slots.update(slot_changes)
+            if seed_changed:
+                self._unwritten_seed = seed
+            if state != self._saved_state or seed_changed:
+                self._unwritten_state = state
+        self._saved_state = state
+        if seed_changed:
+            self._saved_seed = seed or None
+
+        if self.writer:
+            self.writer.submit_task('outbox', self._write_unwritten)
+        else:
+            self._write_unwritten()
+
+    def _write_unwritten(self):
+        with self._lock:
+            state, self._unwritten_state = self._unwritten_state, None
+            slot_changes, self._unwritten_slots = self._unwritten_slots, {}
+            seed, self._unwritten_seed = self._unwritten_seed, None
+        try:
+            # 전체 업로드 묶음과 배열 위치 파일을 먼저 쓰고 대기열 파일을 나중에 씀
+            if seed:
+                write_json_atomic(self.seed_path, seed, indent=None)
+            elif seed is not None and os.path.exists(self.seed_path):
+                os.remove(self.seed_path)
+            if slot_changes:
+                os.makedirs(self.slots_dir, exist_ok=True)
+            for project, slots in slot_changes.items():
+                if slots is None:
+                    try:
+                        os.remove(self._slot_file(project))
+                    except OSError:
+                        pass
+                else:
+                    write_json_atomic(self._slot_file(project), {'project': project, 'slots': slots}, indent=None)
+            if state is not None:
+                write_json_atomic(self.path, state, indent=None)
+        except Exception:
+            # 쓰지 못한 내용을 되돌려 쓰기 스레드가 다시 시도할 때 함께 기록 (그사이 들어온 더 새로운 내용이 우선)
+            with self._lock:
+                if self._unwritten_state is None:
+                    self._unwritten_state = state
+                for project, slots in slot_changes.items():
+                    self._unwritten_slots.setdefault(project, slots)
+                if self._unwritten_seed is None:
+                    self._unwritten_seed = seed
+            raise
+
+
+class RemoteMirror:
+    """마지막으로 받은 원격 데이터를 ETag와 함께 보관하는 디스크 캐시
+
+    경로('_summary' 또는 프로젝트 이름)마다 파일 하나에 {'path', 'etag', 'data'}를 저장하고
+    etags.json에는 다음 요청 때 보낼 ETag만 모아 둠 (본문 파일의 ETag가 다르면 캐시가 없는 것으로 처리)
+    """
+
+    def __init__(self, directory, writer=None):
+        self.directory = directory
+        self.writer = writer
+        try:
+            with open(os.path.join(directory, 'etags.json'), 'r', encoding='utf-8') as f:
+                self.etags = dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self.etags = {}
+
+    def _file_path(self, path):
+        return os.path.join(self.directory, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.json')
+
+    def etag(self, path):
+        return self.etags.get(path)
+
+    def load(self, path, etag):
+        """etag 버전의 캐시 데이터 - (찾았는지, 데이터)"""
+        if not etag:
+            return False, None
+        try:
+            with open(self._file_path(path), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            if record.get('path') == path and record.get('etag') == etag:
+                return True, record.get('data')
+        except (OSError, ValueError, AttributeError):
+            pass
+        return False, None
+
+    def store(self, path, etag, data):
+        if not etag or self.etags.get(path) == etag:
+            return
+        self.etags[path] = etag
+        self._write(path, {'path': path, 'etag': etag, 'data': data})
+
+    def discard(self, path):
+        if self.etags.pop(path, None) is not None:
+            self._write(path, None)
+
+    def paths(self):
+        return list(self.etags)
+
+    def _write(self, path, record):
+        etags = dict(self.etags)
+        file_path = self._file_path(path)
+        # 받은 데이터는 GUI 스레드에서 병합하며 바뀔 수 있으므로 지금 내용으로 직렬화해 둠
+        text = json.dumps(record, ensure_ascii=False) if record is not None else None
+
+        def write():
+            # 캐시는 없어도 다시 받으면 되므로 기록 실패는 무시
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                if text is not None:
+                    temp_path = f"{file_path}.tmp"
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    os.replace(temp_path, file_path)
+                elif os.path.exists(file_path):
+                    os.remove(file_path)
+                write_json_atomic(os.path.join(self.directory, 'etags.json'), etags, indent=None)
+            except OSError:
+                pass
+
+        if self.writer:
+            self.writer.submit_task(f'mirror:{path}', write)
+        else:
+            write()
 
 
 class UpdateChecker(QObject):
@@ -130,28 +2244,446 @@ class UpdateChecker(QObject):
         return 0
 
 
+class FirebaseWorker(QObject):
+    """Firebase 네트워크 요청을 전담하는 백그라운드 동기화 스레드
+
+    GUI 스레드는 요청만 넣고, 결과는 시그널로 받음 (요청은 넣은 순서대로 처리)
+    요약/프로젝트는 캐시의 ETag를 보내 바뀌지 않았으면 데이터를 받지 않음
+    항목/프로젝트 기록은 ETag가 같을 때만 덮어쓰고, 그사이 바뀌었으면 그 경로만 다시 받아 병합 후 재시도
+    전체 업로드는 크기 제한 묶음으로 나눠 여러 스레드로 동시에 전송
+    이미지 업로드는 별도의 낮은 우선순위 대기열로, 다른 요청이 없을 때만 하나씩 처리
+    """
+    loaded = pyqtSignal(object)
+    load_failed = pyqtSignal(str)
+    index_loaded = pyqtSignal(object, object, object)  # 프로젝트 이름 목록, 요약 (바뀌지 않았으면 None), ETag
+    index_failed = pyqtSignal(str)
+    project_fetched = pyqtSignal(str, bool, object, object)  # 프로젝트, 바뀌었는지, 항목 (바뀌지 않았으면 None), ETag
+    project_fetch_failed = pyqtSignal(str, str)
+    sent = pyqtSignal(object, int, int)  # 병합으로 보낸 값과 달라진 [(경로 목록, 최종 값)], 확인하며 기록한 경로 수, 충돌 수
+    send_failed = pyqtSignal(str)
+    partly_sent = pyqtSignal(object, object, int, int)  # 실패한 묶음에서 기록을 마친 경로, 병합 결과, 기록한 경로 수, 충돌 수
+    seed_progress = pyqtSignal(int, int, float)  # 끝난 전체 업로드 묶음 번호, 지금까지 보낸 바이트, 걸린 시간(초)
+    connection_checked = pyqtSignal(bool)
+    listener_started = pyqtSignal(str, object)  # 리스너 이름, 리스너
+    listener_failed = pyqtSignal(str, str)
+    image_uploaded = pyqtSignal(str, bool)  # 해시, 원격에 올렸는지 (로컬에서 이미 지워진 이미지는 False)
+    image_upload_failed = pyqtSignal(str)
+    image_fetched = pyqtSignal(str, object)  # 해시, PNG 바이트 (없거나 실패하면 None)
+
+    # 결과가 같으므로 대기 중인 요청이 있으면 다시 넣지 않는 요청
+    COALESCED_REQUESTS = frozenset(['load', 'load_index', 'ping'])
+    # 같은 대상(프로젝트/이미지)에 대한 요청이 대기 중이면 다시 넣지 않는 요청
+    COALESCED_TARGET_REQUESTS = frozenset(['fetch_project', 'fetch_image'])
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.db_ref = None
+        self.image_ref = None
+        self.listeners = {}  # 이름('summary', 'project') -> 리스너
+        self._condition = threading.Condition()
+        self._requests = []
+        self._uploads = []
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name='FirebaseWorker', daemon=True)
+        self._thread.start()
+
+    def attach(self, db_ref, image_ref=None):
+        with self._condition:
+            self.db_ref = db_ref
+            self.image_ref = image_ref
+            self._condition.notify_all()
+
+    def load(self):
+        self._request('load')
+
+    def load_index(self, etag=None):
+        self._request('load_index', etag)
+
+    def fetch_project(self, project, etag=None):
+        self._request('fetch_project', (project, etag))
+
+    def send(self, batch):
+        self._request('send', batch)
+
+    def check_connection(self):
+        self._request('ping')
+
+    def listen(self, name, path, callback):
+        """path 아래의 변경만 받는 리스너 등록 (같은 이름의 이전 리스너는 닫음)"""
+        self._request('listen', (name, path, callback))
+
+    def close_listener(self, name=None):
+        self._request('close_listener', name)
+
+    def fetch_image(self, image_hash):
+        self._request('fetch_image', image_hash)
+
+    def upload_image(self, image_hash, load_png):
+        """load_png: 업로드할 때 동기화 스레드에서 PNG 바이트를 읽는 함수"""
+        with self._condition:
+            if all(upload[0] != image_hash for upload in self._uploads):
+                self._uploads.append((image_hash, load_png))
+                self._condition.notify_all()
+
+    def _request(self, kind, payload=None):
+        with self._condition:
+            if kind in self.COALESCED_REQUESTS and any(request[0] == kind for request in self._requests):
+                return
+            if kind in self.COALESCED_TARGET_REQUESTS and (kind, payload) in self._requests:
+                return
+            self._requests.append((kind, payload))
+            self._condition.notify_all()
+
+    def stop(self, timeout=5):
+        self.close_listener()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._requests and not (self._uploads and self.image_ref is not None):
+                    self._condition.wait()
+                if self._requests:
+                    kind, payload = self._requests.pop(0)
+                elif self._stopped:
+                    return
+                else:
+                    kind, payload = 'upload_image', self._uploads.pop(0)
+                db_ref = self.db_ref
+                image_ref = self.image_ref
+            
+            if kind == 'upload_image':
+                self._upload_image(image_ref, payload)
+            elif kind == 'fetch_image':
+                png_bytes = None
+                try:
+                    if image_ref is not None:
+                        encoded = image_ref.child(payload).get()
+                        if encoded:
+                            png_bytes = base64.b64decode(encoded)
+                except Exception:
+                    pass
+                self.image_fetched.emit(payload, png_bytes)
+            elif kind == 'close_listener':
+                self._close_listener(payload)
+            elif db_ref is None:
+                continue
+            elif kind == 'load':
+                try:
+                    self.loaded.emit(db_ref.get())
+                except Exception as e:
+                    self.load_failed.emit(str(e))
+            elif kind == 'load_index':
+                # 프로젝트 이름(얕은 읽기)과 프로젝트별 요약만 받음 (얕은 읽기는 ETag를 함께 쓸 수 없음)
+                try:
+                    keys = db_ref.get(shallow=True) or {}
+                    projects = [project for project in keys if project not in ('_metadata', '_summary')]
+                    summaries, etag = {}, None
+                    if '_summary' in keys:
+                        changed, summaries, etag = self._get(db_ref.child('_summary'), payload)
+                        if not changed:
+                            summaries = None
+                    self.index_loaded.emit(projects, summaries, etag)
+                except Exception as e:
+                    self.index_failed.emit(str(e))
+            elif kind == 'fetch_project':
+                project, etag = payload
+                try:
+                    changed, items, etag = self._get(db_ref.child(project), etag)
+                    self.project_fetched.emit(project, changed, items, etag)
+                except Exception as e:
+                    self.project_fetch_failed.emit(project, str(e))
+            elif kind == 'send':
+                # 메모가 참조하는 이미지를 다른 사용자가 받을 수 있도록 대기 중인 이미지부터 업로드
+                if image_ref is not None:
+                    with self._condition:
+                        uploads, self._uploads = self._uploads, []
+                    for upload in uploads:
+                        self._upload_image(image_ref, upload)
+                try:
+                    if 'seed' in payload:
+                        self._send_seed(db_ref, payload)
+                        self.sent.emit([], 0, 0)
+                    elif 'set' in payload:
+                        db_ref.set(payload['set'])
+                        self.sent.emit([], 0, 0)
+                    else:
+                        self.sent.emit(*self._send_updates(db_ref, payload))
+                except Exception as e:
+                    self.send_failed.emit(str(e))
+            elif kind == 'ping':
+                try:
+                    db_ref.child('_test_connection').get()
+                    self.connection_checked.emit(True)
+                except Exception:
+                    self.connection_checked.emit(False)
+            elif kind == 'listen':
+                # 이전 리스너를 닫고 등록해 같은 이벤트를 두 번 받지 않도록 함
+                name, path, callback = payload
+                self._close_listener(name)
+                try:
+                    self.listeners[name] = db_ref.child(path).listen(callback)
+                    self.listener_started.emit(name, self.listeners[name])
+                except Exception as e:
+                    self.listener_failed.emit(name, str(e))
+
+    def _upload_image(self, image_ref, upload):
+        image_hash, load_png = upload
+        try:
+            png_bytes = load_png()
+            if png_bytes is not None:
+                image_ref.child(image_hash).set(base64.b64encode(png_bytes).decode('ascii'))
+            self.image_uploaded.emit(image_hash, png_bytes is not None)
+        except Exception:
+            self.image_upload_failed.emit(image_hash)
+
+    def _send_seed(self, db_ref, batch):
+        """전체 업로드 - 항목 묶음을 병렬로 먼저 보낸 뒤 마지막에 요약을 기록하며 업로드에 없는 원격 프로젝트/항목을 지움
+        (원격을 먼저 비우지 않으므로 다른 사용자의 리스너에는 프로젝트가 지워졌다가 다시 생기는 것으로 보이지 않음)
+        끝난 묶음은 seed_progress로 알림"""
+        chunks = batch['seed']
+        done = set(batch.get('done') or [])
+        started = time.time()
+        sent_bytes = 0
+        
+        def upload(index):
+            updates = chunks[index]['updates']
+            db_ref.update(updates)
+            return index, len(json.dumps(updates, ensure_ascii=False).encode('utf-8'))
+        
+        error = None
+        with ThreadPoolExecutor(max_workers=FIREBASE_UPLOAD_WORKERS) as pool:
+            futures = [pool.submit(upload, index) for index in range(1, len(chunks)) if index not in done]
+            for future in as_completed(futures):
+                try:
+                    index, size = future.result()
+                except Exception as e:
+                    # 하나라도 실패하면 아직 시작하지 않은 묶음은 취소 (끝난 묶음은 다음 시도에서 건너뜀)
+                    if error is None:
+                        error = e
+                        for pending in futures:
+                            pending.cancel()
+                    continue
+                sent_bytes += size
+                self.seed_progress.emit(index, sent_bytes, time.time() - started)
+        if error is not None:
+            raise error
+        
+        if 0 not in done:
+            finish = dict(chunks[0]['finish'])
+            finish.update(self._stale_paths(db_ref, chunks))
+            db_ref.update(finish)
+            self.seed_progress.emit(0, sent_bytes, time.time() - started)
+
+    def _stale_paths(self, db_ref, chunks):
+        """전체 업로드에 없는 원격 프로젝트와, 업로드한 프로젝트에서 항목 수를 넘는 원격 위치의 삭제 경로"""
+        counts = dict.fromkeys(chunks[0]['finish'].get('_summary') or {}, 0)
+        for chunk in chunks[1:]:
+            for path in chunk['updates']:
+                project, index = path.rsplit('/', 1)
+                counts[project] = max(counts.get(project, 0), int(index) + 1)
+        
+        stale = {}
+        remote_projects = [project for project in (db_ref.get(shallow=True) or {}) if not project.startswith('_')]
+        for project in remote_projects:
+            if project not in counts:
+                stale[project] = None
+        
+        def extra_slots(project):
+            keys = db_ref.child(project).get(shallow=True) or {}
+            return [f"{project}/{key}" for key in keys if str(key).isdigit() and int(key) >= counts[project]]
+        
+        with ThreadPoolExecutor(max_workers=FIREBASE_UPLOAD_WORKERS) as pool:
+            for paths in pool.map(extra_slots, [project for project in remote_projects if project in counts]):
+                stale.update(dict.fromkeys(paths))
+        return stale
+
+    def _send_updates(self, db_ref, batch):
+        """항목 위치와 프로젝트 경로는 ETag를 확인하며 동시에 기록하고 (제자리 수정도 그사이 바뀐 원격 필드와 병합),
+        요약/메타데이터/프로젝트 삭제는 다중 경로 update 한 번으로 함께 기록"""
+        expect = batch.get('expect') or {}
+        plain = {}
+        guarded = {}
+        for path, value in batch['updates'].items():
+            if path.startswith('_') or (value is None and '/' not in path):
+                plain[path] = value
+            else:
+                guarded[path] = value
+        
+        def write(path):
+            path_resolved = []
+            return path, path_resolved, self._write_guarded(db_ref, path, guarded[path], expect.get(path), path_resolved)
+        
+        resolved = []
+        written = []
+        conflicts = 0
+        error = None
+        if guarded:
+            with ThreadPoolExecutor(max_workers=FIREBASE_UPLOAD_WORKERS) as pool:
+                futures = [pool.submit(write, path) for path in guarded]
+                for future in as_completed(futures):
+                    try:
+                        path, path_resolved, path_conflicts = future.result()
+                    except Exception as e:
+                        error = error or e
+                        continue
+                    written.append(path)
+                    resolved.extend(path_resolved)
+                    conflicts += path_conflicts
+        if error is not None:
+            # 기록을 마친 경로는 다시 보내지 않도록 알림 (다시 보내면 끝으로 옮긴 항목이 한 번 더 추가됨)
+            if written:
+                self.partly_sent.emit(written, resolved, len(written), conflicts)
+            raise error
+        if plain:
+            db_ref.update(plain)
+        return resolved, len(written), conflicts
+
+    def _write_guarded(self, db_ref, path, value, expected_id, resolved, relocated=False):
+        """path의 ETag가 받은 때와 같을 때만 기록 - 다른 사용자와 충돌한 경로 수 반환
+        resolved: 병합 결과가 보낸 값과 달라 로컬에도 반영해야 하는 (경로 목록, 최종 값)을 추가"""
+        ref = db_ref.child(path)
+        current, etag = ref.get(etag=True)
+        conflicted = False
+        for attempt in range(FIREBASE_WRITE_ATTEMPTS):
+            if '/' in path:
+                result, moved = resolve_slot_write(value, expected_id, current)
+            else:
+                result, moved = resolve_project_write(value, current), None
+            if content_digest(result) == content_digest(current):
+                success = True
+            else:
+                success, current, etag = ref.set_if_unchanged(etag, result)
+            if not success:
+                # 다른 사용자가 먼저 기록함 - 함께 받은 최신 값으로 다시 병합
+                conflicted = True
+                continue
+            
+            changed = content_digest(result) != content_digest(value)
+            if changed or relocated:
+                resolved.append((path.split('/'), result))
+            conflicts = int(conflicted or changed or moved is not None)
+            if moved is not None:
+                conflicts += self._relocate(db_ref, path.split('/')[0], moved, resolved)
+            return conflicts
+        raise RuntimeError(f"다른 사용자의 수정과 계속 충돌: {path}")
+
+    def _relocate(self, db_ref, project, item, resolved):
+        """다른 사용자가 차지한 위치에 보내려던 항목을 원격 배열 끝에 기록"""
+        keys = db_ref.child(project).get(shallow=True) or {}
+        index = max([int(key) for key in keys if str(key).isdigit()] + [-1]) + 1
+        return self._write_guarded(db_ref, f"{project}/{index}", item, None, resolved, relocated=True)
+
+    def _get(self, ref, etag=None):
+        """ETag가 있으면 바뀐 경우에만 받아옴 - (바뀌었는지, 데이터, 새 ETag)"""
+        if etag:
+            return ref.get_if_changed(etag)
+        data, etag = ref.get(etag=True)
+        return True, data, etag
+
+    def _close_listener(self, name=None):
+        for key in ([name] if name else list(self.listeners)):
+            listener = self.listeners.pop(key, None)
+            if listener:
+                try:
+                    listener.close()
+                except:
+                    pass
+
+
 class FirebaseSync(QObject):
     data_changed = pyqtSignal(dict)
+    remote_changes = pyqtSignal(list)
+    project_index_changed = pyqtSignal(dict, bool)  # {프로젝트: 요약}, 전체 목록 여부
     sync_status_changed = pyqtSignal(str, str)
+    pending_changed = pyqtSignal(int)
+    listener_event = pyqtSignal(str, object)  # 리스너 경로('_summary' 또는 프로젝트), 이벤트
     
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.db_ref = None
-        self.listener = None
+        self.listeners = {}
         self.sync_enabled = True
         self.last_update_time = 0
         self.is_syncing = False
-        self.local_update = False
         self.session_id = str(uuid.uuid4())
-        self.last_data_hash = None
+        self.remote_digest = None  # 마지막으로 알고 있는 원격 데이터의 항목/프로젝트/전체 해시 (DataDigest)
+        
+        # 시작할 때는 프로젝트 목록과 요약만 받고, 항목은 프로젝트를 열 때 받아옴
+        self.remote_index = None  # 프로젝트 -> 요약 {'count', 'totals'} (None이면 아직 모름)
+        self.fetched_projects = set()  # 항목을 받아 원격 배열 위치를 알고 있는 프로젝트
+        self._deferred_records = {}  # 항목을 받기 전에 생긴 로컬 변경 (받은 뒤 다시 반영)
+        self._fetching_projects = set()
+        
+        # 리스너는 프로젝트 요약(_summary)과 열려 있는 프로젝트에만 둠
+        self.watched_project = None
+        self._early_snapshot = None  # 프로젝트 목록보다 먼저 도착한 열린 프로젝트의 전체 데이터
+        
+        # 연결 상태: None(확인 전), True, False
+        self.connected = None
+        self._heartbeat_failures = 0
+        self._listen_requested = set()  # 등록을 요청했지만 아직 결과가 오지 않은 리스너 이름
+        self._awaiting_initial = set()  # (재)연결되면 처음 보내는 전체 데이터를 기다리는 리스너 경로
+        
+        # 변경분 동기화: 원격 배열에서 각 항목의 위치(인덱스)와 마지막 전송 이후 바뀐 위치/프로젝트
+        self.remote_slots = None  # 프로젝트 -> [항목 id] (None이면 원격 상태를 몰라 다음 저장 때 전체 기록)
+        self._dirty_slots = {}
+        self._dirty_projects = set()
+        self._slot_expect = {}  # 프로젝트 -> {위치: 바꾸기 전 원격 항목 id} (전송할 때 동시 수정 확인용)
+        self._push_scheduled = False
+        
+        # 보내지 못한 변경은 전송 대기열에 보관 (재시작 후에도 순서대로 다시 전송)
+        self.outbox = OutboundQueue(get_outbox_path(), getattr(main_window, 'persistence_writer', None))
+        self.remote_slots = self.outbox.remote_slots
+        # 마지막으로 받은 요약/프로젝트 캐시 (ETag가 같으면 다시 받지 않음)
+        self.mirror = RemoteMirror(get_mirror_dir(), getattr(main_window, 'persistence_writer', None))
+        self._retry_scheduled = False
+        self._seed_rate = 0  # 마지막 전체 업로드 속도 (KB/s)
+        self._seeded = False  # 대기열을 다 보내면 전체 업로드 완료를 알림
+        self._start_pending = False  # 대기열 전송 후 원격 데이터 읽기/리스너 등록을 이어서 진행
+        
+        # 네트워크 요청은 동기화 스레드에서 처리하고 결과만 GUI 스레드로 전달
+        self.worker = FirebaseWorker()
+        self.worker.loaded.connect(self._on_loaded)
+        self.worker.load_failed.connect(self._on_load_failed)
+        self.worker.index_loaded.connect(self._on_index_loaded)
+        self.worker.index_failed.connect(self._on_load_failed)
+        self.worker.project_fetched.connect(self._on_project_downloaded)
+        self.worker.project_fetch_failed.connect(self._on_project_fetch_failed)
+        self.worker.sent.connect(self._on_batch_sent)
+        self.worker.send_failed.connect(self._on_batch_failed)
+        self.worker.partly_sent.connect(self._on_batch_partly_sent)
+        self.worker.seed_progress.connect(self._on_seed_progress)
+        self.worker.connection_checked.connect(self._on_connection_checked)
+        self.worker.listener_started.connect(self._on_listener_started)
+        self.worker.listener_failed.connect(self._on_listener_failed)
+        self.listener_event.connect(self._on_listener_event)
+        self.worker.image_uploaded.connect(self._on_image_uploaded)
+        self.worker.image_upload_failed.connect(self._on_image_upload_failed)
+        self.worker.image_fetched.connect(self.main_window.on_memo_image_fetched)
+        self._image_uploads_paused = False  # 업로드가 실패하면 연결이 확인될 때까지 다시 보내지 않음
         
         self.data_changed.connect(self.main_window.on_firebase_data_changed)
+        self.remote_changes.connect(self.main_window.on_firebase_remote_changes)
+        self.project_index_changed.connect(self.main_window.on_firebase_project_index)
         self.sync_status_changed.connect(self._update_sync_status)
+        self.pending_changed.connect(self.main_window.on_pending_sync_changed)
         
         self.reconnect_timer = QTimer()
+        self.reconnect_timer.setSingleShot(True)
         self.reconnect_timer.timeout.connect(self.check_connection)
-        self.reconnect_timer.start(10000)
+        self.reconnect_timer.start(FIREBASE_HEARTBEAT_INTERVAL * 1000)
+        
+        # 리스너로 받은 변경은 잠시 모았다가 한 번에 반영 (화면 갱신은 묶음마다 한 번)
+        self._buffered_changes = []
+        self._buffer_started = 0
+        self.coalesce_timer = QTimer()
+        self.coalesce_timer.setSingleShot(True)
+        self.coalesce_timer.timeout.connect(self.flush_remote_changes)
         
     def initialize_firebase(self):
         if not FIREBASE_AVAILABLE:
@@ -175,143 +2707,859 @@ class FirebaseSync(QObject):
                 firebase_admin.initialize_app(cred, {'databaseURL': FIREBASE_DATABASE_URL})
             
             self.db_ref = db.reference('settlement_data')
+            self.worker.attach(self.db_ref, db.reference(FIREBASE_IMAGE_PATH))
             return True
             
-        except Exception:
-            self.sync_status_changed.emit("⚠️ 오프라인 모드", "color: #95a5a6; font-weight: bold;")
+        except Exception:
+            self.sync_status_changed.emit("⚠️ 오프라인 모드", "color: #95a5a6; font-weight: bold;")
+            return False
+    
+    def start_sync(self):
+        try:
+            if not self.initialize_firebase():
+                return
+            # 오프라인 동안 쌓인 변경을 먼저 보내야 원격 데이터를 읽어 올 때 덮어쓰지 않음
+            self._start_pending = True
+            if not self.outbox.batches:
+                self._continue_start()
+            else:
+                self.drain_outbox()
+        except Exception:
+            self.sync_status_changed.emit("⚠️ 동기화 오류", "color: #e74c3c; font-weight: bold;")
+    
+    def _continue_start(self):
+        self._start_pending = False
+        self.load_project_index()
+        self._request_listener()
+    
+    def _request_listener(self):
+        # 동기화 스레드가 같은 이름의 이전 리스너를 닫고 등록하므로 리스너가 중복되지 않음
+        self._listen('summary', '_summary')
+        if self.watched_project:
+            self._listen('project', self.watched_project)
+    
+    def _listen(self, name, path):
+        self._listen_requested.add(name)
+        self._awaiting_initial.add(path)
+        # 리스너 스레드에서 받은 이벤트는 시그널로 GUI 스레드에 넘겨 처리
+        self.worker.listen(name, path, lambda event, path=path: self.listener_event.emit(path, event))
+    
+    def watch_project(self, project):
+        """열린 프로젝트에만 리스너를 둠 (다른 프로젝트의 변경은 받지 않음)"""
+        if project == self.watched_project:
+            return
+        previous = self.watched_project
+        self.watched_project = project
+        if previous is not None:
+            # 리스너를 닫은 프로젝트는 다시 열 때 최신 항목을 받아 병합
+            self.fetched_projects.discard(previous)
+            self._awaiting_initial.discard(previous)
+        if not self.db_ref:
+            return
+        if project:
+            self._listen('project', project)
+        else:
+            self._listen_requested.discard('project')
+            self.listeners.pop('project', None)
+            self.worker.close_listener('project')
+    
+    def _listener_alive(self):
+        names = ['summary', 'project'] if self.watched_project else ['summary']
+        for name in names:
+            if name in self._listen_requested:
+                continue
+            listener = self.listeners.get(name)
+            if listener is None:
+                return False
+            thread = getattr(listener, '_thread', None)
+            if thread is not None and not thread.is_alive():
+                return False
+        return True
+    
+    def _on_listener_started(self, name, listener):
+        self._listen_requested.discard(name)
+        self.listeners[name] = listener
+        self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;")
+    
+    def _on_listener_failed(self, name, message):
+        self._listen_requested.discard(name)
+        self.listeners.pop(name, None)
+        self.sync_status_changed.emit("⚠️ 동기화 오류", "color: #e74c3c; font-weight: bold;")
+    
+    def stop_sync(self):
+        try:
+            if hasattr(self, 'reconnect_timer'):
+                self.reconnect_timer.stop()
+            self.coalesce_timer.stop()
+            self.worker.stop()
+            self.listeners = {}
+        except:
+            pass
+    
+    def load_from_firebase(self):
+        if not self.db_ref:
+            return
+        self.is_syncing = True
+        self.worker.load()
+    
+    def load_project_index(self):
+        """전체 데이터 대신 프로젝트 목록(얕은 읽기)과 요약만 받아옴"""
+        if not self.db_ref:
+            return
+        self.is_syncing = True
+        self.worker.load_index(self.mirror.etag('_summary'))
+    
+    def cached_index(self):
+        """지난번에 받은 프로젝트 요약 (원격 목록을 받기 전에 콤보를 먼저 채우는 용도)"""
+        found, summaries = self.mirror.load('_summary', self.mirror.etag('_summary'))
+        if not found or not isinstance(summaries, dict):
+            return {}
+        return {project: summary for project, summary in summaries.items() if isinstance(summary, dict)}
+    
+    def _on_index_loaded(self, projects, summaries, etag):
+        try:
+            if summaries is None:
+                # 요약이 바뀌지 않음 - 캐시 사용 (캐시가 없어졌으면 ETag 없이 다시 받음)
+                found, summaries = self.mirror.load('_summary', etag)
+                if not found:
+                    self.mirror.discard('_summary')
+                    self.worker.load_index()
+                    return
+            else:
+                self.mirror.store('_summary', etag, summaries)
+            if not isinstance(summaries, dict):
+                summaries = {}
+            index = {project: summaries.get(project) or {} for project in projects}
+            for path in self.mirror.paths():
+                if path != '_summary' and path not in index:
+                    self.mirror.discard(path)
+            
+            if not index:
+                if self.main_window.project_names():
+                    self.is_syncing = False
+                    self.save_to_firebase(self.main_window.get_all_projects_data())
+                return
+            
+            self.remote_index = index
+            if self.remote_slots is None:
+                self.remote_slots = {}
+            if self.remote_digest is None:
+                self.remote_digest = DataDigest()
+            self.project_index_changed.emit(index, True)
+            
+            snapshot, self._early_snapshot = self._early_snapshot, None
+            if snapshot and snapshot[0] == self.watched_project:
+                self._on_project_fetched(*snapshot)
+            
+            # 최근 사용한 프로젝트는 미리 받아 둠 (열린 프로젝트는 리스너가 받아옴)
+            for project in self.outbox.recent_projects:
+                if project != self.watched_project:
+                    self.fetch_project(project)
+        finally:
+            self.is_syncing = False
+    
+    def fetch_project(self, project):
+        """원격 프로젝트 항목을 받아옴 (이미 받았거나 원격에 없는 프로젝트는 무시)"""
+        if not self.db_ref or not self.awaiting_fetch(project):
             return False
+        if project not in self._fetching_projects:
+            self._fetching_projects.add(project)
+            self.worker.fetch_project(project, self.mirror.etag(project))
+        return True
     
-    def start_sync(self):
-        try:
-            if not self.initialize_firebase():
+    def awaiting_fetch(self, project):
+        return self.remote_index is not None and project in self.remote_index and project not in self.fetched_projects
+    
+    def _on_project_downloaded(self, project, changed, items, etag):
+        """동기화 스레드의 프로젝트 읽기 결과 - ETag가 같아 받지 않았으면 캐시의 항목 사용"""
+        if not changed:
+            found, items = self.mirror.load(project, etag)
+            if not found:
+                self.mirror.discard(project)
+                self._fetching_projects.discard(project)
+                self.fetch_project(project)
                 return
-            self.load_from_firebase()
-            self.listener = self.db_ref.listen(self.on_firebase_change)
-            self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;")
-        except Exception:
-            self.sync_status_changed.emit("⚠️ 동기화 오류", "color: #e74c3c; font-weight: bold;")
+        elif items is None:
+            self.mirror.discard(project)
+        else:
+            self.mirror.store(project, etag, items)
+        self._on_project_fetched(project, items)
     
-    def stop_sync(self):
-        try:
-            if hasattr(self, 'reconnect_timer'):
-                self.reconnect_timer.stop()
-            if self.listener:
-                try:
-                    self.listener.close()
-                except:
-                    pass
-                self.listener = None
-        except:
-            pass
+    def _on_project_fetched(self, project, items):
+        self._fetching_projects.discard(project)
+        # 리스너로 먼저 받았거나 그 사이 삭제된 프로젝트는 무시
+        if not self.awaiting_fetch(project):
+            return
+        self.flush_remote_changes()
+        self.remote_changes.emit([([project], items)])
+        if project in self.fetched_projects and project in self._deferred_records:
+            self.main_window.replay_local_changes(project, self._deferred_records.pop(project))
     
-    def load_from_firebase(self):
+    def _on_project_fetch_failed(self, project, message):
+        self._fetching_projects.discard(project)
+        self.main_window._loading_projects.discard(project)
+        self.main_window.statusBar().showMessage(f"❌ '{project}' 클라우드 데이터 불러오기 실패: {message}", 5000)
+    
+    def note_project_opened(self, project):
+        """최근 사용한 프로젝트 기록 (다음 실행 때 미리 받아 둘 대상)"""
+        recent = self.outbox.recent_projects
+        if recent[:1] == [project]:
+            return
+        recent[:] = ([project] + [name for name in recent if name != project])[:FIREBASE_PREFETCH_PROJECTS]
+        self.outbox.save(self.remote_slots)
+    
+    def _project_summary(self, project):
+        items = self.main_window.projects_data.get(project)
+        if items is None:
+            return None
+        return {'count': len(items), 'totals': calculate_totals(items)}
+    
+    def _on_loaded(self, data):
         try:
-            self.is_syncing = True
-            data = self.db_ref.get()
-            
             if data:
                 if '_metadata' in data:
                     del data['_metadata']
+                data.pop('_summary', None)
+                digest = DataDigest.from_data(data)
+                if self.remote_digest is not None and digest.root == self.remote_digest.root:
+                    # 리스너가 먼저 같은 데이터를 받아 반영한 경우
+                    return
+                self._reset_remote_layout(data)
                 self.data_changed.emit(data)
-                self.last_data_hash = self._calculate_data_hash(data)
+                self.remote_digest = digest
             else:
-                if self.main_window.projects_data:
-                    self.save_to_firebase(self.main_window.projects_data)
-                    
-            self.is_syncing = False
-        except Exception:
+                if self.main_window.project_names():
+                    self.is_syncing = False
+                    self.save_to_firebase(self.main_window.get_all_projects_data())
+        finally:
             self.is_syncing = False
-            self.sync_status_changed.emit("⚠️ 데이터 로드 실패", "color: #e74c3c; font-weight: bold;")
+    
+    def _on_load_failed(self, message):
+        self.is_syncing = False
+        self.sync_status_changed.emit("⚠️ 데이터 로드 실패", "color: #e74c3c; font-weight: bold;")
     
     def save_to_firebase(self, data):
+        """전체 데이터 기록 - 전송 대기열에 넣고 바로 전송 (실패하면 재시도)"""
         if self.is_syncing:
             return
         
-        try:
-            current_time = time.time()
-            if current_time - self.last_update_time < 1.0:
-                return
-            
-            self.last_update_time = current_time
-            self.local_update = True
-            
-            save_data = self._prepare_data_for_save(data)
-            save_data['_metadata'] = {
-                'last_updated': datetime.now().isoformat(),
-                'session_id': self.session_id,
-                'update_time': current_time
-            }
-            
-            self.db_ref.set(save_data)
-            self.last_data_hash = self._calculate_data_hash(data)
-            
-            current_time_str = datetime.now().strftime("%H:%M:%S")
-            self.sync_status_changed.emit(f"☁️ 동기화 완료 ({current_time_str})", "color: #27ae60; font-weight: bold;")
-            self.main_window.statusBar().showMessage(f"✅ 클라우드 자동 저장 완료 - {current_time_str}", 3000)
-            
-            QTimer.singleShot(2000, lambda: setattr(self, 'local_update', False))
-            
-            # 3초 후 다시 실시간 동기화 상태로 복원
-            QTimer.singleShot(3000, lambda: self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;"))
-            
-        except Exception:
-            self.local_update = False
-            self.sync_status_changed.emit("⚠️ 동기화 실패", "color: #e74c3c; font-weight: bold;")
-            self.main_window.statusBar().showMessage("❌ 클라우드 저장 실패 - 인터넷 연결을 확인하세요", 5000)
+        save_data = self._prepare_data_for_save(data)
+        self._reset_remote_layout(save_data)
+        self.remote_digest = DataDigest.from_data(save_data)
+        self.remote_index = {project: self._project_summary(project) or {} for project in save_data}
+        # 한 번의 큰 set() 대신 요약만 먼저 기록하고 항목은 크기 제한 묶음으로 나눠 전송
+        self.outbox.add_seed({'_summary': self.remote_index}, split_upload_chunks(save_data, FIREBASE_UPLOAD_CHUNK_BYTES))
+        self.outbox.save(self.remote_slots)
+        self.drain_outbox()
+    
+    def push_changes(self):
+        """마지막 전송 이후 바뀐 항목 경로만 다중 경로 update()로 전송"""
+        if self.is_syncing:
+            # 원격 데이터를 받는 중에는 배열 위치가 바뀔 수 있으므로 끝난 뒤 다시 시도
+            wait = 1.0
+        else:
+            wait = 1.0 - (time.time() - self.last_update_time)
+        if wait > 0:
+            # 1초 이내 연속 저장은 모아서 한 번에 전송
+            if not self._push_scheduled:
+                self._push_scheduled = True
+                QTimer.singleShot(int(wait * 1000) + 10, self._run_scheduled_push)
+            return
+        
+        if self.remote_slots is None:
+            if self.db_ref:
+                self.save_to_firebase(self.main_window.get_all_projects_data())
+            return
+        
+        self.last_update_time = time.time()
+        if self.queue_pending_changes() and not self._retry_scheduled:
+            self.drain_outbox()
+    
+    def queue_pending_changes(self):
+        """아직 보내지 않은 변경을 전송 대기열로 옮기고 디스크에 기록"""
+        if self.remote_slots is None or not (self._dirty_slots or self._dirty_projects):
+            return False
+        
+        dirty_slots, dirty_projects = self._dirty_slots, self._dirty_projects
+        slot_expect = self._slot_expect
+        self._dirty_slots, self._dirty_projects, self._slot_expect = {}, set(), {}
+        updates = self._build_updates(dirty_slots, dirty_projects)
+        expect = {f"{project}/{index}": item_id for project, expected in slot_expect.items()
+                  for index, item_id in expected.items() if f"{project}/{index}" in updates}
+        self.outbox.add_updates(updates, expect)
+        self.outbox.save(self.remote_slots)
+        self.pending_changed.emit(self.outbox.pending_count())
+        return True
+    
+    def drain_outbox(self):
+        """전송 대기열의 첫 묶음을 동기화 스레드로 보냄 (결과가 오면 다음 묶음을 이어서 전송)"""
+        self.pending_changed.emit(self.outbox.pending_count())
+        self.upload_pending_images()
+        if not self.db_ref or self.outbox.sending is not None or not self.outbox.batches:
+            return
+        
+        batch = self.outbox.peek()
+        self.outbox.sending = batch
+        
+        current_time = time.time()
+        self.last_update_time = current_time
+        metadata = {
+            'last_updated': datetime.now().isoformat(),
+            'session_id': self.session_id,
+            'update_time': current_time
+        }
+        if 'seed' in batch:
+            finish = {'finish': dict(batch['seed'][0]['finish'], _metadata=metadata)}
+            self.worker.send({'seed': [finish] + batch['seed'][1:], 'done': list(batch['done'])})
+        elif 'set' in batch:
+            self.worker.send({'set': dict(batch['set'], _metadata=metadata)})
+        else:
+            self.worker.send({'updates': dict(batch['updates'], _metadata=metadata),
+                              'expect': dict(batch.get('expect') or {})})
+    
+    def _on_seed_progress(self, index, sent_bytes, elapsed):
+        """전체 업로드 묶음 완료 - 진행 상황을 대기열 파일에 기록해 중단되어도 남은 묶음만 이어서 전송"""
+        batch = self.outbox.sending
+        if batch is None or 'seed' not in batch or index in batch['done']:
+            return
+        batch['done'].append(index)
+        self.outbox.save(self.remote_slots)
+        self.pending_changed.emit(self.outbox.pending_count())
+        rate = sent_bytes / 1024 / elapsed if elapsed > 0 else 0
+        self._seed_rate = rate
+        self.main_window.statusBar().showMessage(
+            f"☁️ 클라우드 전체 업로드 중... {len(batch['done'])}/{len(batch['seed'])} ({rate:.0f}KB/s)", 3000)
+    
+    def _on_batch_sent(self, resolved, writes, conflicts):
+        if self.outbox.sending is not None and 'seed' in self.outbox.sending:
+            self._seeded = True
+        self.outbox.pop()
+        self.outbox.note_writes(writes, conflicts)
+        if resolved:
+            # 다른 사용자가 먼저 바꾼 경로는 병합한 최종 값을 로컬에도 반영
+            self.flush_remote_changes()
+            self.remote_changes.emit(resolved)
+        if self.outbox.batches:
+            self.drain_outbox()
+            return
+        
+        self.outbox.attempts = 0
+        self.outbox.save(self.remote_slots)
+        self.pending_changed.emit(0)
+        
+        current_time_str = datetime.now().strftime("%H:%M:%S")
+        self.sync_status_changed.emit(f"☁️ 동기화 완료 ({current_time_str})", "color: #27ae60; font-weight: bold;")
+        self.main_window.statusBar().showMessage(f"✅ 클라우드 자동 저장 완료 - {current_time_str}", 3000)
+        if self._seeded:
+            self._seeded = False
+            self.main_window.statusBar().showMessage(f"✅ 클라우드 전체 업로드 완료 ({self._seed_rate:.0f}KB/s) - {current_time_str}", 5000)
+        if resolved:
+            self.main_window.statusBar().showMessage(f"🔀 다른 사용자와 동시에 수정한 내용을 병합했습니다 - {current_time_str}", 5000)
+        
+        # 3초 후 다시 실시간 동기화 상태로 복원
+        QTimer.singleShot(3000, lambda: self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;"))
+        
+        if self._start_pending:
+            self._continue_start()
+    
+    def _on_batch_partly_sent(self, written, resolved, writes, conflicts):
+        """일부 경로만 기록하고 실패한 묶음 - 기록한 경로는 대기열에서 빼고 병합 결과는 로컬에 반영"""
+        batch = self.outbox.sending
+        if batch is not None and 'updates' in batch:
+            for path in written:
+                batch['updates'].pop(path, None)
+                batch.get('expect', {}).pop(path, None)
+        self.outbox.note_writes(writes, conflicts)
+        if resolved:
+            self.flush_remote_changes()
+            self.remote_changes.emit(resolved)
+    
+    def _on_batch_failed(self, message):
+        self.outbox.sending = None
+        self.outbox.save(self.remote_slots)
+        self.pending_changed.emit(self.outbox.pending_count())
+        delay = self._schedule_retry()
+        self.sync_status_changed.emit("⚠️ 동기화 실패", "color: #e74c3c; font-weight: bold;")
+        self.main_window.statusBar().showMessage(f"❌ 클라우드 저장 실패 - 인터넷 연결을 확인하세요 ({delay}초 후 다시 시도)", 5000)
+    
+    def upload_pending_images(self):
+        """업로드 대기 중인 메모 이미지를 동기화 스레드의 낮은 우선순위 대기열로 넘김"""
+        if not self.db_ref or self._image_uploads_paused:
+            return
+        image_store = self.main_window.image_store
+        for image_hash in self.outbox.image_uploads:
+            self.worker.upload_image(image_hash, lambda image_hash=image_hash: image_store.get(image_hash))
+    
+    def _on_image_uploaded(self, image_hash, uploaded):
+        self.outbox.image_done(image_hash, uploaded)
+        if not self.outbox.image_uploads:
+            self.outbox.save(self.remote_slots)
+    
+    def _on_image_upload_failed(self, image_hash):
+        self._image_uploads_paused = True
+        self.outbox.save(self.remote_slots)
+    
+    def fetch_image(self, image_hash):
+        """메모에 표시할 이미지가 로컬에 없으면 원격 이미지 노드에서 내려받음 (결과는 image_fetched)"""
+        if self.db_ref:
+            self.worker.fetch_image(image_hash)
+            return True
+        return False
+    
+    def _schedule_retry(self):
+        """실패 횟수에 따라 재시도 간격을 늘리고, 여러 PC가 동시에 재시도하지 않도록 무작위로 분산"""
+        delay = min(FIREBASE_RETRY_MAX_DELAY, FIREBASE_RETRY_BASE_DELAY * 2 ** min(self.outbox.attempts, 10))
+        delay = random.uniform(delay / 2, delay)
+        self.outbox.attempts += 1
+        if not self._retry_scheduled:
+            self._retry_scheduled = True
+            QTimer.singleShot(int(delay * 1000), self._retry_outbox)
+        return int(delay)
+    
+    def _retry_outbox(self):
+        self._retry_scheduled = False
+        self.queue_pending_changes()
+        self.drain_outbox()
+    
+    def has_pending_changes(self):
+        return bool(self._dirty_slots or self._dirty_projects)
+    
+    def _run_scheduled_push(self):
+        self._push_scheduled = False
+        self.push_changes()
+    
+    def request_full_push(self):
+        """로컬 데이터 전체가 교체된 경우 다음 저장 때 전체 기록"""
+        self.remote_slots = None
+        self._dirty_slots = {}
+        self._dirty_projects = set()
+        self._slot_expect = {}
+        self.outbox.save(None)
+    
+    def track_change(self, record):
+        """로컬 변경 기록(record_change)을 원격 배열 위치 변경으로 변환"""
+        if self.remote_slots is None:
+            return
+        
+        op = record.get('op')
+        project = record.get('project')
+        
+        if op in ('upsert', 'delete') and self.awaiting_fetch(project):
+            # 원격 항목을 받기 전에는 배열 위치를 모르므로 받은 뒤 다시 반영
+            self._deferred_records.setdefault(project, []).append(record)
+            self.fetch_project(project)
+            return
+        
+        if op == 'upsert':
+            slots = self.remote_slots.setdefault(project, [])
+            item_id = record['item'].get('id')
+            if item_id in slots:
+                index = slots.index(item_id)
+                self._expect_slot(project, index, item_id)
+            else:
+                slots.append(item_id)
+                index = len(slots) - 1
+                self._expect_slot(project, index, None)
+            self._dirty_slots.setdefault(project, set()).add(index)
+        
+        elif op == 'delete':
+            # 뒤 항목을 한 칸씩 당겨 원격 배열에 빈칸이 생기지 않고 다른 사용자에게도 순서가 그대로 유지되도록 함
+            # (삭제 위치부터 끝까지 다시 기록하므로 앞쪽 항목을 지울수록 보내는 양이 늘어남)
+            slots = self.remote_slots.get(project, [])
+            if record.get('id') in slots:
+                index = slots.index(record.get('id'))
+                for position in range(index, len(slots)):
+                    self._expect_slot(project, position, slots[position])
+                self._dirty_slots.setdefault(project, set()).update(range(index, len(slots)))
+                slots.pop(index)
+        
+        elif op == 'project_add':
+            self.remote_slots.setdefault(project, [])
+            self.fetched_projects.add(project)
+        
+        elif op == 'project_delete':
+            self.remote_slots.pop(project, None)
+            self._dirty_slots.pop(project, None)
+            self._slot_expect.pop(project, None)
+            self._dirty_projects.add(project)
+            self.fetched_projects.discard(project)
+            self._deferred_records.pop(project, None)
+            if project == self.watched_project:
+                self.watch_project(None)
+        
+        elif op == 'project_rename':
+            new_name = record['new_name']
+            if self.awaiting_fetch(project):
+                # 원격 배열 위치를 모르는 프로젝트는 로컬 항목 전체를 새 이름으로 기록
+                self.remote_slots.pop(project, None)
+                self.remote_slots[new_name] = [item.get('id') for item in self.main_window.projects_data.get(new_name, [])]
+                self._deferred_records.pop(project, None)
+            else:
+                self.remote_slots[new_name] = self.remote_slots.pop(project, [])
+            self._dirty_slots.pop(project, None)
+            self._slot_expect.pop(project, None)
+            self._dirty_projects.update({project, new_name})
+            self.fetched_projects.discard(project)
+            self.fetched_projects.add(new_name)
+            if project == self.watched_project:
+                self.watch_project(new_name)
+    
+    def _expect_slot(self, project, index, item_id):
+        # 전송 전 처음 알고 있던 원격 항목만 기록 (같은 위치를 여러 번 바꿔도 원격에는 아직 그 항목이 있음)
+        self._slot_expect.setdefault(project, {}).setdefault(index, item_id)
     
-    def on_firebase_change(self, event):
+    def _build_updates(self, dirty_slots, dirty_projects):
+        updates = {}
+        projects_data = self.main_window.projects_data
+        
+        # 이름 변경/삭제된 프로젝트는 프로젝트 경로 전체를 기록 (하위 경로와 함께 보내지 않음)
+        for project in dirty_projects:
+            slots = self.remote_slots.get(project)
+            if slots:
+                lookup = {item.get('id'): item for item in projects_data.get(project, [])}
+                updates[project] = [self._item_payload(lookup[item_id]) if item_id in lookup else None
+                                    for item_id in slots]
+            else:
+                updates[project] = None
+        
+        for project, indices in dirty_slots.items():
+            if project in dirty_projects:
+                continue
+            slots = self.remote_slots.get(project, [])
+            lookup = {item.get('id'): item for item in projects_data.get(project, [])}
+            for index in indices:
+                item_id = slots[index] if index < len(slots) else None
+                updates[f"{project}/{index}"] = self._item_payload(lookup[item_id]) if item_id in lookup else None
+        
+        # 프로젝트 목록과 함께 받는 요약(항목 수/합계)도 갱신
+        for project in set(dirty_slots) | dirty_projects:
+            summary = self._project_summary(project) if project in self.remote_slots else None
+            updates[f"_summary/{project}"] = summary
+            if self.remote_index is not None:
+                if summary is None:
+                    self.remote_index.pop(project, None)
+                else:
+                    self.remote_index[project] = summary
+        
+        # 보낼 내용으로 원격 해시도 갱신 (바뀐 항목만 다시 계산)
+        if self.remote_digest is not None:
+            self._apply_to_digest(self.remote_digest, [(path.split('/'), value) for path, value in updates.items()
+                                                       if not path.startswith('_summary/')])
+        return updates
+    
+    def _apply_to_digest(self, digest, changes):
+        for parts, value in changes:
+            project = parts[0]
+            if len(parts) == 1:
+                if value is None:
+                    digest.remove_project(project)
+                else:
+                    digest.set_project(project, value)
+            elif parts[1].isdigit():
+                index = int(parts[1])
+                if len(parts) > 2:
+                    digest.invalidate_item(project, index)
+                elif isinstance(value, dict):
+                    digest.set_item(project, index, value)
+                else:
+                    digest.remove_item(project, index)
+    
+    def note_remote_changes(self, changes):
+        """GUI 스레드에서 반영한 원격 변경을 원격 해시에 기록"""
+        if self.remote_digest is not None:
+            self._apply_to_digest(self.remote_digest, changes)
+    
+    def _reset_remote_layout(self, data):
+        """원격 데이터의 프로젝트별 배열 위치를 항목 id로 기억 (id가 없는 항목은 id를 부여하고 다음 전송에 포함)"""
+        self.remote_slots = {}
+        self._dirty_slots = {}
+        self._dirty_projects = set()
+        self._slot_expect = {}
+        self.fetched_projects = set()
+        self._deferred_records = {}
+        
+        for project, items in data.items():
+            self._reset_project_layout(project, items)
+        self.outbox.save(self.remote_slots)
+    
+    def _reset_project_layout(self, project, items):
+        if isinstance(items, dict):
+            entries = [(int(key), item) for key, item in items.items() if str(key).isdigit()]
+        elif isinstance(items, list):
+            entries = list(enumerate(items))
+        else:
+            return
+        
+        slots = [None] * (max(index for index, _ in entries) + 1 if entries else 0)
+        for index, item in entries:
+            if not isinstance(item, dict):
+                continue
+            if not item.get('id'):
+                item['id'] = str(uuid.uuid4())
+                self._dirty_slots.setdefault(project, set()).add(index)
+            slots[index] = item['id']
+        self.remote_slots[project] = slots
+        self.fetched_projects.add(project)
+    
+    def _on_listener_event(self, path, event):
         try:
-            if self.local_update:
-                return
-            
-            if event.data and event.path == '/':
-                data = event.data
-                
-                if '_metadata' in data:
-                    metadata = data['_metadata']
-                    if metadata.get('session_id') == self.session_id:
-                        return
-                    del data['_metadata']
-                
-                new_hash = self._calculate_data_hash(data)
-                if new_hash != self.last_data_hash:
-                    self.last_data_hash = new_hash
-                    self.data_changed.emit(data)
-                    self.sync_status_changed.emit("☁️ 다른 사용자가 수정함", "color: #3498db; font-weight: bold;")
-                    QTimer.singleShot(5000, lambda: self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;"))
+            if path == '_summary':
+                self._on_summary_event(event)
+            elif path == self.watched_project:
+                self._on_project_event(path, event)
         except:
             pass
     
+    def _on_summary_event(self, event):
+        """프로젝트 요약 변경 - 프로젝트 목록(추가/삭제)과 콤보의 항목 수/합계만 갱신"""
+        parts = [part for part in event.path.split('/') if part]
+        initial = not parts and '_summary' in self._awaiting_initial
+        if initial:
+            self._awaiting_initial.discard('_summary')
+        if self.remote_index is None:
+            return
+        
+        if not parts:
+            summaries = event.data if isinstance(event.data, dict) else {}
+            if getattr(event, 'event_type', 'put') == 'patch':
+                summaries = {key.split('/')[0]: value if '/' not in key else {} for key, value in summaries.items()}
+        elif len(parts) == 1:
+            summaries = {parts[0]: event.data}
+        else:
+            summaries = {parts[0]: {}}
+        
+        changed = {}
+        deleted = []
+        for project, summary in summaries.items():
+            if summary is None:
+                if not initial and project in self.remote_index:
+                    deleted.append(([project], None))
+            elif isinstance(summary, dict):
+                if summary or project not in self.remote_index:
+                    self.remote_index[project] = changed[project] = summary
+        if changed:
+            self.project_index_changed.emit(changed, False)
+        if deleted:
+            self._buffer_remote_changes(deleted)
+    
+    def _on_project_event(self, project, event):
+        """열린 프로젝트의 리스너 이벤트 - 바뀐 항목만 반영 (내가 보낸 변경은 원격 해시로 걸러냄)"""
+        parts = [part for part in event.path.split('/') if part]
+        if getattr(event, 'event_type', 'put') == 'put' and not parts:
+            self._awaiting_initial.discard(project)
+            if self.remote_index is None:
+                # 프로젝트 목록을 받은 뒤 처리
+                self._early_snapshot = (project, event.data)
+                return
+            if project not in self.fetched_projects:
+                if event.data is not None:
+                    self.remote_index.setdefault(project, {})
+                self._on_project_fetched(project, event.data)
+                return
+            
+            current = self.remote_digest
+            indices = current.diff_project(project, DataDigest.from_data({project: event.data} if event.data else {}))
+            if indices is None:
+                changes = [([project], event.data)]
+            else:
+                changes = self._digest_changes({project: indices}, {project: event.data}) if indices else []
+        else:
+            if self.remote_index is None:
+                return
+            changes = self._drop_echo(self._drop_unfetched(self._event_changes(event, [project])))
+        
+        if changes:
+            self._buffer_remote_changes(changes)
+    
+    def _buffer_remote_changes(self, changes):
+        """변경을 모아 두고 FIREBASE_EVENT_WINDOW_MS 동안 새 변경이 없으면 반영
+        (계속 들어와도 첫 변경부터 FIREBASE_EVENT_MAX_DELAY_MS가 지나면 반영)"""
+        now = time.time()
+        if not self._buffered_changes:
+            self._buffer_started = now
+        self._buffered_changes.extend(changes)
+        remaining = FIREBASE_EVENT_MAX_DELAY_MS - (now - self._buffer_started) * 1000
+        self.coalesce_timer.start(int(max(0, min(FIREBASE_EVENT_WINDOW_MS, remaining))))
+    
+    def flush_remote_changes(self):
+        """모아 둔 변경을 하나로 합쳐 반영 (다른 경로로 원격 변경을 반영하기 전에도 순서를 지키기 위해 호출)"""
+        self.coalesce_timer.stop()
+        if not self._buffered_changes:
+            return
+        changes = coalesce_changes(self._buffered_changes)
+        self._buffered_changes = []
+        self.remote_changes.emit(changes)
+        self.sync_status_changed.emit("☁️ 다른 사용자가 수정함", "color: #3498db; font-weight: bold;")
+        QTimer.singleShot(5000, lambda: self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;"))
+    
+    def _drop_echo(self, changes):
+        """원격 해시에 이미 반영된 항목 변경(내가 보낸 변경이 되돌아온 것)은 제외"""
+        if self.remote_digest is None:
+            return changes
+        kept = []
+        for parts, value in changes:
+            if len(parts) == 2 and parts[1].isdigit():
+                known = self.remote_digest.items.get(parts[0], {}).get(int(parts[1]))
+                if (known is None and value is None) or (isinstance(value, dict) and known == content_digest(value)):
+                    continue
+            kept.append((parts, value))
+        return kept
+    
+    def _drop_unfetched(self, changes):
+        """항목을 받지 않은 프로젝트의 변경은 버리고 프로젝트 목록만 갱신 (항목은 선택할 때 받아옴)"""
+        if self.remote_index is None:
+            return changes
+        kept = []
+        added = {}
+        for parts, value in changes:
+            project = parts[0]
+            if project in self.fetched_projects or (len(parts) == 1 and value is None):
+                kept.append((parts, value))
+            elif project not in self.remote_index:
+                self.remote_index[project] = added[project] = {}
+        if added:
+            self.project_index_changed.emit(added, False)
+        return kept
+    
+    def _event_changes(self, event, scope=()):
+        """리스너 이벤트를 [(경로 목록, 값)]으로 변환 (내 세션의 변경이면 빈 목록)
+        scope: 리스너를 둔 경로 (이벤트 경로는 그 아래 상대 경로)"""
+        base = list(scope) + [part for part in event.path.split('/') if part]
+        if getattr(event, 'event_type', 'put') == 'patch' and isinstance(event.data, dict):
+            raw_changes = [(base + [part for part in key.split('/') if part], value) for key, value in event.data.items()]
+        else:
+            raw_changes = [(base, event.data)]
+        
+        changes = []
+        for parts, value in raw_changes:
+            if not parts:
+                continue
+            if parts[0] == '_metadata':
+                metadata = value if len(parts) == 1 else None
+                if isinstance(metadata, dict) and metadata.get('session_id') == self.session_id:
+                    return []
+                continue
+            if parts[0] == '_summary':
+                continue
+            changes.append((parts, value))
+        return changes
+    
+    def apply_remote_slot(self, project, index, item_id):
+        """다른 사용자의 변경으로 원격 배열 위치의 항목이 바뀐 것을 기록"""
+        if self.remote_slots is None:
+            return
+        slots = self.remote_slots.setdefault(project, [])
+        if item_id is not None:
+            # 같은 항목이 다른 위치에서 옮겨진 경우 이전 위치는 비움
+            for i, slot_id in enumerate(slots):
+                if slot_id == item_id and i != index:
+                    slots[i] = None
+            if index >= len(slots):
+                slots.extend([None] * (index + 1 - len(slots)))
+            slots[index] = item_id
+        elif index < len(slots):
+            slots[index] = None
+        if index in self._slot_expect.get(project, {}):
+            self._slot_expect[project][index] = item_id
+        while slots and slots[-1] is None:
+            slots.pop()
+    
+    def remote_slot_id(self, project, index):
+        slots = (self.remote_slots or {}).get(project, [])
+        return slots[index] if index < len(slots) else None
+    
+    def apply_remote_project(self, project, items):
+        if self.remote_slots is None:
+            return
+        if items is None:
+            self.remote_slots.pop(project, None)
+            self.fetched_projects.discard(project)
+            self._deferred_records.pop(project, None)
+            self._slot_expect.pop(project, None)
+            if project == self.watched_project:
+                self.watch_project(None)
+            if self.remote_index is not None:
+                self.remote_index.pop(project, None)
+        else:
+            self._reset_project_layout(project, items)
+            expected = self._slot_expect.get(project, {})
+            for index in expected:
+                expected[index] = self.remote_slot_id(project, index)
+            if self.remote_index is not None:
+                self.remote_index.setdefault(project, {})
+    
     def check_connection(self):
+        """가벼운 연결 확인 요청 (결과는 _on_connection_checked에서 받아 다음 확인을 예약)"""
         if not FIREBASE_AVAILABLE:
             return
+        if self.db_ref and not self.is_syncing:
+            self.worker.check_connection()
+        else:
+            self.reconnect_timer.start(FIREBASE_HEARTBEAT_INTERVAL * 1000)
+    
+    def _on_connection_checked(self, connected):
         try:
-            if self.db_ref and not self.is_syncing:
-                try:
-                    self.db_ref.child('_test_connection').get()
-                except:
-                    self.sync_status_changed.emit("🔄 재연결 중...", "color: #f39c12; font-weight: bold;")
-                    self.start_sync()
+            if not connected:
+                # 다시 연결될 때까지 확인 간격을 늘려가며 대기 (전체 데이터를 다시 받지 않음)
+                delay = min(FIREBASE_RETRY_MAX_DELAY, FIREBASE_HEARTBEAT_INTERVAL * 2 ** min(self._heartbeat_failures, 10))
+                delay = random.uniform(delay / 2, delay)
+                self._heartbeat_failures += 1
+                self.connected = False
+                self.reconnect_timer.start(int(delay * 1000))
+                self.sync_status_changed.emit(f"🔄 재연결 중... ({int(delay)}초 후 다시 확인)", "color: #f39c12; font-weight: bold;")
+                return
+            
+            self._heartbeat_failures = 0
+            self.reconnect_timer.start(FIREBASE_HEARTBEAT_INTERVAL * 1000)
+            if self.connected is False:
+                # 기존 리스너가 다시 연결되며 보내는 전체 데이터에서 바뀐 항목만 반영
+                self._awaiting_initial.add('_summary')
+                if self.watched_project:
+                    self._awaiting_initial.add(self.watched_project)
+                self.sync_status_changed.emit("☁️ 실시간 동기화 중", "color: #27ae60; font-weight: bold;")
+            self.connected = True
+            
+            if not self._listener_alive():
+                self._request_listener()
+            
+            if self._image_uploads_paused:
+                self._image_uploads_paused = False
+                self.upload_pending_images()
+            
+            # 연결이 돌아오면 재시도 간격을 기다리지 않고 대기 중인 변경 전송
+            if self.outbox.batches:
+                self.outbox.attempts = 0
+                self.drain_outbox()
         except:
             pass
     
     def _prepare_data_for_save(self, data):
-        save_data = {}
-        for project, items in data.items():
-            save_data[project] = []
-            for item in items:
-                item_copy = item.copy()
-                if hasattr(item_copy.get('date'), 'toString'):
-                    item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
-                save_data[project].append(item_copy)
-        return save_data
+        return {project: [self._item_payload(item) for item in items] for project, items in data.items()}
     
-    def _calculate_data_hash(self, data):
-        try:
-            data_str = json.dumps(data, sort_keys=True, ensure_ascii=False)
-            return hash(data_str)
-        except:
-            return None
+    def _item_payload(self, item):
+        item_copy = item.to_dict() if hasattr(item, 'to_dict') else item.copy()
+        if hasattr(item_copy.get('date'), 'toString'):
+            item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
+        memo = self.main_window.get_item_memo(item_copy)
+        item_copy['memo'] = memo or ''
+        # 이미지는 해시 참조만 보내고 본문은 이미지 노드에 따로 업로드
+        if memo and 'image_refs' in memo:
+            for image_hash in ImageBlobStore.referenced_hashes([memo]):
+                self.outbox.add_image(image_hash)
+        return item_copy
+    
+    def _digest_changes(self, changed, data):
+        """DataDigest.diff 결과를 remote_changes 형식 [(경로 목록, 값)]으로 변환"""
+        changes = []
+        for project, indices in changed.items():
+            items = data.get(project)
+            if indices is None:
+                changes.append(([project], items))
+                continue
+            entries = dict(DataDigest._entries(items))
+            for index in indices:
+                changes.append(([project, str(index)], entries.get(index)))
+        return changes
     
     def _update_sync_status(self, status, style):
         if hasattr(self.main_window, 'sync_status_label'):
@@ -339,7 +3587,11 @@ class FirebaseSync(QObject):
             
             self.main_window.sync_status_label.setText(icon_text)
             self.main_window.sync_status_label.setStyleSheet(icon_style)
-            self.main_window.sync_status_label.setToolTip(status.replace("☁️ ", "").replace("⚠️ ", "").replace("💾 ", "").replace("🔄 ", ""))
+            tooltip = status.replace("☁️ ", "").replace("⚠️ ", "").replace("💾 ", "").replace("🔄 ", "")
+            stats = self.outbox.write_stats
+            if stats['conflicts']:
+                tooltip += f"\n동시 수정 충돌 {stats['conflicts']}건 / 기록 {stats['writes']}건 ({stats['conflicts'] / max(stats['writes'], 1) * 100:.1f}%)"
+            self.main_window.sync_status_label.setToolTip(tooltip)
     
 
 
@@ -961,10 +4213,11 @@ class ProcessOrderDialog(QDialog):
 
 
 class ProcessSummaryDialog(QDialog):
-    def __init__(self, project_data, processes, parent=None):
+    def __init__(self, project_data, processes, parent=None, process_totals=None):
         super().__init__(parent)
         self.project_data = project_data
         self.processes = processes
+        self.precomputed_totals = process_totals
         self.setWindowTitle("공정별 금액 요약")
         self.setModal(True)
         self.resize(800, 850)
@@ -1013,15 +4266,18 @@ class ProcessSummaryDialog(QDialog):
     def calculate_and_display(self):
         process_totals = {process: {'material': 0, 'labor': 0, 'vat': 0, 'total': 0} for process in self.processes}
         
-        for item in self.project_data:
-            process = item.get('process', '기타') or '기타'
-            if process not in process_totals:
-                process_totals[process] = {'material': 0, 'labor': 0, 'vat': 0, 'total': 0}
-            
-            process_totals[process]['material'] += item.get('material_amount', 0)
-            process_totals[process]['labor'] += item.get('labor_amount', 0)
-            process_totals[process]['vat'] += item.get('vat_amount', 0)
-            process_totals[process]['total'] += item.get('total_amount', 0)
+        if self.precomputed_totals is not None:
+            process_totals.update(self.precomputed_totals)
+        else:
+            for item in self.project_data:
+                process = item.get('process', '기타') or '기타'
+                if process not in process_totals:
+                    process_totals[process] = {'material': 0, 'labor': 0, 'vat': 0, 'total': 0}
+                
+                process_totals[process]['material'] += item.get('material_amount', 0)
+                process_totals[process]['labor'] += item.get('labor_amount', 0)
+                process_totals[process]['vat'] += item.get('vat_amount', 0)
+                process_totals[process]['total'] += item.get('total_amount', 0)
         
         row_count = 0
         grand_totals = {'material': 0, 'labor': 0, 'vat': 0, 'total': 0}
@@ -1110,8 +4366,7 @@ class CustomTableWidget(QTableWidget):
             if button_rect.contains(event.pos()):
                 if self.item_name_delegate and self.item_name_delegate.main_window:
                     row = item.row()
-                    memo = self.item_name_delegate.main_window.get_memo_for_row(row)
-                    has_memo = self._check_has_memo(memo)
+                    has_memo = self.item_name_delegate.main_window.has_memo_for_row(row)
                     QToolTip.showText(event.globalPos(), "클릭: 메모 보기/편집\n우클릭: 메모 삭제" if has_memo else "클릭하여 메모 추가")
             else:
                 QToolTip.hideText()
@@ -1122,24 +4377,6 @@ class CustomTableWidget(QTableWidget):
     def leaveEvent(self, event):
         QToolTip.hideText()
         super().leaveEvent(event)
-    
-    def _check_has_memo(self, memo):
-        if not memo:
-            return False
-        try:
-            memo_data = json.loads(memo)
-            if isinstance(memo_data, dict) and 'html' in memo_data:
-                doc = QTextDocument()
-                doc.setHtml(memo_data['html'])
-                plain_text = doc.toPlainText().strip()
-                return (plain_text and any(char not in ' \t\n\r' for char in plain_text)) or \
-                       (memo_data.get('images') and len(memo_data['images']) > 0) or \
-                       '<img' in memo_data['html']
-        except:
-            doc = QTextDocument()
-            doc.setHtml(memo)
-            plain_text = doc.toPlainText().strip()
-            return plain_text and any(char not in ' \t\n\r' for char in plain_text)
 
 
 class ItemNameDelegate(QStyledItemDelegate):
@@ -1159,8 +4396,7 @@ class ItemNameDelegate(QStyledItemDelegate):
         is_active_memo = False
         
         if self.main_window:
-            memo = self.main_window.get_memo_for_row(row)
-            has_memo = self._check_has_memo(memo)
+            has_memo = self.main_window.has_memo_for_row(row)
             # 현재 행이 선택되어 있고 메모가 실제로 있을 때만 active 상태로 표시
             is_active_memo = self.main_window.memo_visible and self.main_window.current_memo_row == row and has_memo
         
@@ -1220,8 +4456,7 @@ class ItemNameDelegate(QStyledItemDelegate):
                 has_memo = False
                 
                 if self.main_window:
-                    memo = self.main_window.get_memo_for_row(row)
-                    has_memo = self._check_has_memo(memo)
+                    has_memo = self.main_window.has_memo_for_row(row)
                 
                 if has_memo:
                     menu = QMenu()
@@ -1232,24 +4467,6 @@ class ItemNameDelegate(QStyledItemDelegate):
                 return True
         
         return super().editorEvent(event, model, option, index)
-    
-    def _check_has_memo(self, memo):
-        if not memo:
-            return False
-        try:
-            memo_data = json.loads(memo)
-            if isinstance(memo_data, dict) and 'html' in memo_data:
-                doc = QTextDocument()
-                doc.setHtml(memo_data['html'])
-                plain_text = doc.toPlainText().strip()
-                return (plain_text and any(char not in ' \t\n\r' for char in plain_text)) or \
-                       (memo_data.get('images') and len(memo_data['images']) > 0) or \
-                       '<img' in memo_data['html']
-        except:
-            doc = QTextDocument()
-            doc.setHtml(memo)
-            plain_text = doc.toPlainText().strip()
-            return plain_text and any(char not in ' \t\n\r' for char in plain_text)
 
 
 class ImageTextEdit(QTextEdit):
@@ -1538,11 +4755,17 @@ class ImageViewer(QDialog):
 
 class InteriorSettlementApp(QMainWindow):
     firebase_data_changed = pyqtSignal(dict)
+    project_data_loaded = pyqtSignal(str, object, str)
+    project_index_loaded = pyqtSignal(object)
+    project_index_failed = pyqtSignal(int, str)
+    backup_failed = pyqtSignal(str)
+    images_collected = pyqtSignal(object)  # 정리 후 남은(참조 중인) 이미지 해시
     
     def __init__(self, user_email=None):
         super().__init__()
         self.user_email = user_email
-        self.projects_data = {}
+        self.projects_data = {}  # 불러온 프로젝트만 포함
+        self.project_index = {}  # 전체 프로젝트 목록과 저장된 합계 (매니페스트)
         self.current_project = None
         self.users = ["상준", "신애", "재천", "민기", "재성"]
         self.current_user = None
@@ -1558,6 +4781,38 @@ class InteriorSettlementApp(QMainWindow):
         self.firebase_sync = None
         self.is_updating = False
         
+        # 로컬 저장소 (스냅샷 + 변경 저널)
+        self.data_store = create_data_store()
+        self.persistence_writer = PersistenceWriter(self.data_store, self)
+        self.persistence_writer.write_failed.connect(self.on_local_save_failed)
+        self.memo_store = create_memo_store(self.data_store, self.persistence_writer)
+        self._pending_records = []
+        self._journal_needs_compaction = False
+        
+        # 프로젝트 데이터는 선택 시 백그라운드에서 불러옴
+        self.project_loader = ThreadPoolExecutor(max_workers=4)
+        self._loading_projects = set()
+        self._index_loaded = False
+        self.project_data_loaded.connect(self.on_project_data_loaded)
+        self.project_index_loaded.connect(self.on_project_index_loaded)
+        self.project_index_failed.connect(self.on_project_index_failed)
+        
+        # 메모 이미지 저장소 (SHA-256 기반)
+        self.image_store = ImageBlobStore(get_image_store_dir())
+        self._memo_image_refs = {}
+        self._memo_missing_images = {}  # 내려받는 중인 메모 이미지 해시 -> 이미지 src 목록
+        self._memo_image_retries = {}  # 원격에 아직 없던 메모 이미지 해시 -> 다시 받은 횟수
+        
+        # 증분 자동 백업 (base + delta, 변경이 있을 때만 주기적으로 기록)
+        self.backup_chain = BackupChain(os.path.join(get_backup_dir(), 'chain'),
+                                        self.data_store, self.memo_store, self.image_store)
+        self._backup_dirty = not self.backup_chain.points() or self.backup_chain.has_pending()
+        self.backup_failed.connect(self.on_backup_failed)
+        self.images_collected.connect(self.on_images_collected)
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self.schedule_incremental_backup)
+        self.backup_timer.start(BACKUP_INTERVAL_MS)
+        
         # 업데이트 체커 초기화
         self.update_checker = UpdateChecker(self)
         self.update_checker.update_available.connect(self.show_update_dialog)
@@ -1629,33 +4884,43 @@ class InteriorSettlementApp(QMainWindow):
             self.is_updating = True
             
             current_project = self.current_project
-            current_row = self.table.currentRow() if hasattr(self, 'table') and self.table.currentRow() >= 0 else -1
-            current_memo_row = self.current_memo_row
-            
-            current_item_data = None
-            if current_row >= 0 and current_project:
-                old_data = self.get_current_data()
-                if current_row < len(old_data):
-                    current_item_data = old_data[current_row]
-            
-            if self.current_memo_row >= 0:
+            if 0 <= self.current_memo_row < len(self.get_current_data()) and self.memo_text_edit.document().isModified():
+                # 편집 중인 메모만 먼저 저장 (열어만 둔 메모를 다시 저장하면 원격 메모를 덮어씀)
                 self.save_current_memo()
+            # 교체 전 표/메모 상태 - 교체 후 항목 id로 비교해 바뀐 부분만 다시 그림
+            state = self._capture_view_state(with_rows=True)
             
-            self.projects_data = data.copy()
+            # 이미 불러온 프로젝트는 항목별로 필드 단위 병합 (동시에 수정한 다른 필드가 모두 남도록)
+            push_back = {}
+            for project, items in data.items():
+                if project in self.projects_data and items:
+                    items = list(items.values()) if isinstance(items, dict) else items
+                    data[project], push_back[project] = self._merge_remote_items(project, [item for item in items if item])
+            
+            self.projects_data = to_settlement_items(data)
+            self._ensure_item_ids(self.projects_data)
+            self._split_memos(self.projects_data)
+            self.project_index = {}
+            for project in self.projects_data:
+                self._update_project_index(project)
+            self._pending_records = []
+            self._journal_needs_compaction = True
+            self._index_loaded = True
+            self._backup_dirty = True
+            for project, ids in push_back.items():
+                for item in self.projects_data.get(project, []):
+                    if item.get('id') in ids:
+                        self.record_change('upsert', project, item)
+            if self.firebase_sync and self.firebase_sync.has_pending_changes():
+                # 원격 항목에 새로 부여한 id 전송
+                QTimer.singleShot(0, self.firebase_sync.push_changes)
             self.update_project_combo()
             
             if current_project and current_project in self.projects_data:
-                self.project_combo.setCurrentText(current_project)
                 self.current_project = current_project
-                self.update_table()
-                self.update_summary()
-                
-                if current_row >= 0 and current_row < self.table.rowCount():
-                    self.table.selectRow(current_row)
-                
-                if current_memo_row >= 0 and current_memo_row < self.table.rowCount():
-                    self.current_memo_row = current_memo_row
-                    self.show_memo_dialog(current_memo_row)
+                if self._refresh_table_diff(state):
+                    self.update_summary()
+                self._refresh_memo_diff(state)
             else:
                 self.current_project = None
                 self.current_memo_row = -1
@@ -1671,6 +4936,301 @@ class InteriorSettlementApp(QMainWindow):
         finally:
             self.is_updating = False
 
+    def on_pending_sync_changed(self, count):
+        if not hasattr(self, 'pending_sync_label'):
+            return
+        if count > 0:
+            self.pending_sync_label.setText(f"⏳ 클라우드 전송 대기 {count}건")
+            self.pending_sync_label.show()
+        else:
+            self.pending_sync_label.hide()
+
+    def on_firebase_remote_changes(self, changes):
+        """다른 사용자의 부분 변경(patch/하위 경로 put)을 바뀐 항목에만 반영"""
+        if self.is_updating:
+            return
+        if self.firebase_sync:
+            # 실제로 반영하는 변경만 알고 있는 원격 상태로 기록
+            self.firebase_sync.note_remote_changes(changes)
+        if self.firebase_sync is None or self.firebase_sync.remote_slots is None:
+            # 원격 배열 위치를 모르면 항목을 찾을 수 없으므로 전체를 다시 읽음
+            if self.firebase_sync:
+                self.firebase_sync.load_from_firebase()
+            return
+        
+        try:
+            self.is_updating = True
+            
+            data = self.get_current_data() if self.current_project else []
+            memo_item = data[self.current_memo_row] if 0 <= self.current_memo_row < len(data) else None
+            if memo_item is not None and self.memo_text_edit.document().isModified():
+                # 편집 중인 메모만 먼저 저장 (열어만 둔 메모를 다시 저장하면 원격 메모를 덮어씀)
+                self.save_current_memo()
+            state = self._capture_view_state()
+            
+            changed_projects = set()
+            changed_items = []
+            structure_changed = False
+            project_list_changed = False
+            
+            # 필드 단위 변경과 함께 온 수정 시각 (항목 경로 -> {필드: [시각, 세션]})
+            remote_stamps = {}
+            for parts, value in changes:
+                if len(parts) == 3 and parts[2] == 'field_times' and isinstance(value, dict):
+                    remote_stamps.setdefault(tuple(parts[:2]), {}).update(value)
+                elif len(parts) == 4 and parts[2] == 'field_times' and value:
+                    remote_stamps.setdefault(tuple(parts[:2]), {})[parts[3]] = value
+            
+            # 같은 이벤트 안에서 항목 이동(값 설정)이 삭제(None)보다 먼저 반영되도록 정렬
+            for parts, value in sorted(changes, key=lambda change: change[1] is None):
+                project = parts[0]
+                
+                if len(parts) == 1:
+                    self._apply_remote_project(project, value)
+                    changed_projects.add(project)
+                    structure_changed = True
+                    project_list_changed = True
+                    continue
+                
+                if not parts[1].isdigit():
+                    continue
+                self.ensure_project_loaded(project)
+                items = self.projects_data.setdefault(project, [])
+                index = int(parts[1])
+                old_id = self.firebase_sync.remote_slot_id(project, index)
+                
+                if len(parts) == 2:
+                    if isinstance(value, dict):
+                        existing = next((item for item in items if value.get('id') and item.get('id') == value['id']), None)
+                        sort_key = self.get_sort_key(existing, self.sort_column) if existing is not None and self.sort_column >= 0 else None
+                        item = self._apply_remote_item(project, items, index, value)
+                        changed_items.append(item)
+                        displaced = old_id if old_id != item['id'] else None
+                        if existing is None or displaced:
+                            structure_changed = True
+                        elif sort_key is not None and sort_key != self.get_sort_key(item, self.sort_column):
+                            structure_changed = True
+                    else:
+                        self.firebase_sync.apply_remote_slot(project, index, None)
+                        displaced = old_id
+                        structure_changed = True
+                    
+                    # 자리를 잃은 항목은 다른 사용자가 삭제한 항목
+                    if displaced and displaced not in self.firebase_sync.remote_slots.get(project, []):
+                        for position, item in enumerate(items):
+                            if item.get('id') == displaced:
+                                del items[position]
+                                self.record_change('delete', project, item, from_remote=True)
+                                break
+                    changed_projects.add(project)
+                
+                elif len(parts) == 3 and old_id and parts[2] != 'field_times':
+                    item = next((item for item in items if item.get('id') == old_id), None)
+                    if item is None:
+                        continue
+                    field = parts[2]
+                    group = MERGE_FIELD_GROUPS.get(field, field)
+                    remote_stamp = remote_stamps.get(tuple(parts[:2]), {}).get(group)
+                    local_stamp = (item.get('field_times') or {}).get(group)
+                    if remote_stamp and local_stamp and tuple(local_stamp) > tuple(remote_stamp):
+                        # 로컬 값이 더 최근 - 원격에 다시 보내 맞춤
+                        self._note_push_back()
+                        self.record_change('upsert', project, item)
+                        continue
+                    if remote_stamp:
+                        item['field_times'] = dict(item.get('field_times') or {}, **{group: remote_stamp})
+                    sort_key = self.get_sort_key(item, self.sort_column) if self.sort_column >= 0 else None
+                    if field == 'memo':
+                        memo = value or ''
+                        if '"images"' in memo:
+                            memo = self.image_store.externalize_memo(memo)
+                        self.set_item_memo(item, memo)
+                    elif value is None:
+                        item.pop(field, None)
+                    else:
+                        item[field] = value
+                    if sort_key is not None and sort_key != self.get_sort_key(item, self.sort_column):
+                        structure_changed = True
+                    self.record_change('upsert', project, item, from_remote=True)
+                    changed_items.append(item)
+                    changed_projects.add(project)
+            
+            if not changed_projects:
+                return
+            
+            for project in changed_projects:
+                if project in self.projects_data:
+                    self._update_project_index(project)
+            
+            if project_list_changed:
+                self.update_project_combo()
+            
+            if self.current_project in changed_projects:
+                if structure_changed:
+                    self.update_table()
+                    self._restore_view_state(state)
+                else:
+                    # 정렬 순서가 그대로면 바뀐 행만 다시 그림
+                    data = self.get_current_data()
+                    rows = {id(item): row for row, item in enumerate(data)}
+                    self.table.itemChanged.disconnect()
+                    for item in changed_items:
+                        if id(item) in rows:
+                            self.update_table_row(rows[id(item)], item)
+                    self.table.itemChanged.connect(self.on_table_item_changed)
+                self.update_summary()
+                self._refresh_memo_diff(state)
+            elif self.current_project not in self.projects_data and self.current_project not in self.project_index:
+                self.current_project = None
+                self.current_memo_row = -1
+                self.table.setRowCount(0)
+                self.update_summary()
+                self.memo_text_edit.clear()
+        
+        finally:
+            self.is_updating = False
+        
+        self.save_all_data()
+    
+    def _apply_remote_project(self, project, items):
+        """원격 프로젝트 전체 교체/삭제를 로컬 데이터에 반영"""
+        if isinstance(items, dict):
+            items = [item for key, item in sorted(items.items(), key=lambda entry: int(entry[0])) if str(key).isdigit()]
+        if items is None:
+            if project in self.projects_data or project in self.project_index:
+                self.projects_data.pop(project, None)
+                self.project_index.pop(project, None)
+                self.record_change('project_delete', project, from_remote=True)
+            self.firebase_sync.apply_remote_project(project, None)
+            return
+        
+        self.ensure_project_loaded(project)
+        self.firebase_sync.apply_remote_project(project, items)
+        items, push_back = self._merge_remote_items(project, [item for item in items if isinstance(item, dict)])
+        self._install_project(project, items)
+        self.record_change('project_add', project, from_remote=True)
+        for item in self.projects_data[project]:
+            self.record_change('upsert', project, item, from_remote=item.get('id') not in push_back)
+    
+    def _merge_remote_items(self, project, items):
+        """원격 항목 목록을 이미 불러온 같은 id의 로컬 항목과 필드 단위로 병합
+        반환: (병합된 목록, 로컬 값이 남아 원격에 다시 보내야 하는 항목 id)"""
+        local_items = {item.get('id'): item for item in self.projects_data.get(project, [])}
+        merged_items = []
+        push_back = set()
+        for value in items:
+            local = local_items.get(value.get('id'))
+            if local is not None:
+                value, local_won = self._merge_remote_item(local, value)
+                if local_won:
+                    push_back.add(value['id'])
+            merged_items.append(value)
+        return merged_items, push_back
+    
+    def _merge_remote_item(self, local, remote):
+        merged, local_won = merge_item_fields(local, remote)
+        remote_times = remote.get('field_times') or {}
+        if local_won & set(AMOUNT_FIELDS) and any(field not in local_won and field in remote_times for field in AMOUNT_FIELDS):
+            # 금액 필드를 양쪽에서 나눠 채택한 경우 합계를 다시 계산
+            self.recalculate_item_total(merged)
+        if local_won:
+            self._note_push_back()
+        return merged, local_won
+    
+    def _note_push_back(self):
+        # 로컬 값이 남아 원격에 다시 보내는 병합도 다른 사용자와의 충돌로 집계
+        if self.firebase_sync:
+            self.firebase_sync.outbox.note_writes(0, 1)
+    
+    def _apply_remote_item(self, project, items, index, value):
+        """원격 배열 위치에 들어온 항목을 추가하거나 같은 id의 로컬 항목과 필드 단위로 병합"""
+        if not value.get('id'):
+            value['id'] = str(uuid.uuid4())
+            pushed_id = True
+        else:
+            pushed_id = False
+        
+        local_won = False
+        local = next((item for item in items if item.get('id') == value['id']), None)
+        if local is not None:
+            value, local_won = self._merge_remote_item(local, value)
+        
+        loaded = to_settlement_items({project: [value]})
+        self._split_memos(loaded)
+        new_item = loaded[project][0]
+        
+        item = next((item for item in items if item.get('id') == new_item['id']), None)
+        if item is None:
+            items.append(new_item)
+            item = new_item
+        else:
+            # 행/메모 상태를 유지하도록 같은 객체의 필드만 교체
+            for key in list(item.keys()):
+                if key not in new_item:
+                    del item[key]
+            for key, field_value in new_item.items():
+                item[key] = field_value
+        
+        self.firebase_sync.apply_remote_slot(project, index, item['id'])
+        # 원격 항목에 새로 부여한 id나 병합 후 남은 로컬 값은 다시 전송
+        self.record_change('upsert', project, item, from_remote=not (pushed_id or local_won))
+        return item
+    
+    def on_firebase_project_index(self, index, complete):
+        """원격 프로젝트 목록과 요약으로 프로젝트 콤보 구성 (항목은 프로젝트를 선택할 때 받아옴)
+        complete: 전체 목록이면 원격에 없는 로컬 프로젝트는 다른 사용자가 삭제한 것으로 처리"""
+        if not self._index_loaded:
+            # 로컬 목록을 읽은 뒤 on_project_index_loaded에서 다시 반영
+            return
+        
+        if complete:
+            for project in self.project_names():
+                if project not in index:
+                    self._apply_remote_project(project, None)
+        
+        for project, summary in index.items():
+            if project not in self.projects_data and self.project_index.get(project, {'remote': True}).get('remote'):
+                summary = summary if isinstance(summary, dict) else {}
+                self.project_index[project] = {'count': summary.get('count', 0),
+                                               'totals': summary.get('totals') or calculate_totals([]),
+                                               'remote': True}
+        
+        self.update_project_combo()
+        if self.current_project not in self.project_index and self.current_project not in self.projects_data:
+            self.current_project = None
+        if self.current_project is None and self.project_names():
+            self.on_project_changed(self.project_names()[0])
+        if self._pending_records:
+            self.save_all_data()
+    
+    def _is_remote_only(self, project):
+        """원격 목록에만 있고 아직 항목을 받지 않은 프로젝트 (로컬 저장소에 없음)"""
+        return project not in self.projects_data and self.project_index.get(project, {}).get('remote', False)
+    
+    def replay_local_changes(self, project, records):
+        """원격 항목을 받기 전에 생긴 로컬 추가/수정/삭제를 받은 항목 위에 다시 반영"""
+        items = self.projects_data.get(project)
+        if items is None:
+            return
+        for record in records:
+            if record['op'] == 'upsert':
+                item = next((item for item in items if item.get('id') == record['item'].get('id')), None)
+                if item is None:
+                    item = SettlementItem.from_dict(record['item'])
+                    items.append(item)
+                self.record_change('upsert', project, item)
+            elif record['op'] == 'delete':
+                for position, item in enumerate(items):
+                    if item.get('id') == record['id']:
+                        del items[position]
+                        self.record_change('delete', project, item)
+                        break
+        self._update_project_index(project)
+        if project == self.current_project:
+            self.update_table()
+            self.update_summary()
+        self.save_all_data()
+
     def init_ui(self):
         self.setWindowTitle(f"정산 프로그램 © HV LAB (v{CURRENT_VERSION})")
         self.setWindowIcon(QIcon(resource_path('HV.ico')))
@@ -1709,6 +5269,12 @@ class InteriorSettlementApp(QMainWindow):
         
         self.statusBar().show()
         self.statusBar().showMessage(f"버전 {CURRENT_VERSION}")
+        
+        # 클라우드 전송 대기 건수 (대기 중인 변경이 있을 때만 표시)
+        self.pending_sync_label = QLabel("")
+        self.pending_sync_label.setStyleSheet("color: #f39c12; font-weight: bold; padding: 0px 8px;")
+        self.pending_sync_label.hide()
+        self.statusBar().addPermanentWidget(self.pending_sync_label)
         self.setup_shortcuts()
         self.update_ui_state()
 
@@ -2271,28 +5837,7 @@ class InteriorSettlementApp(QMainWindow):
                 if row < len(data):
                     item_info = data[row]
                     
-                    current_memo = item_info.get('memo', '')
-                    if current_memo:
-                        try:
-                            memo_data = json.loads(current_memo)
-                            if isinstance(memo_data, dict) and 'html' in memo_data:
-                                if 'images' in memo_data and memo_data['images']:
-                                    document = self.memo_text_edit.document()
-                                    for src, base64_data in memo_data['images'].items():
-                                        byte_array = QByteArray.fromBase64(base64_data.encode('utf-8'))
-                                        image = QImage()
-                                        image.loadFromData(byte_array)
-                                        if not image.isNull():
-                                            url = QUrl(src)
-                                            document.addResource(QTextDocument.ImageResource, url, image)
-                                
-                                self.memo_text_edit.setHtml(memo_data['html'])
-                            else:
-                                self.memo_text_edit.setHtml(current_memo)
-                        except:
-                            self.memo_text_edit.setHtml(current_memo)
-                    else:
-                        self.memo_text_edit.clear()
+                    self.load_memo_into_editor(self.get_item_memo(item_info))
         
         self.table.memo_button_clicked = False
 
@@ -2315,18 +5860,26 @@ class InteriorSettlementApp(QMainWindow):
         if self.current_memo_row >= len(data):
             return
         
-        old_item = data[self.current_memo_row].copy()
+        current_item = data[self.current_memo_row]
+        old_item = current_item.copy()
         
         html_content = self.memo_text_edit.toHtml()
         
-        images = {}
+        image_refs = {}
         document = self.memo_text_edit.document()
         
         img_pattern = r'<img[^>]+src="([^"]+)"[^>]*>'
         for match in re.finditer(img_pattern, html_content):
             src = match.group(1)
-            url = QUrl(src)
+            if src in image_refs:
+                continue
+            
+            # 이미 저장소에 있는 이미지는 다시 인코딩하지 않음
+            if src in self._memo_image_refs:
+                image_refs[src] = self._memo_image_refs[src]
+                continue
             
+            url = QUrl(src)
             image = document.resource(QTextDocument.ImageResource, url)
             if image and isinstance(image, QImage):
                 if image.width() > 1200 or image.height() > 1200:
@@ -2341,18 +5894,23 @@ class InteriorSettlementApp(QMainWindow):
                 buffer = QBuffer(byte_array)
                 buffer.open(QIODevice.WriteOnly)
                 scaled_image.save(buffer, "PNG")
-                base64_data = byte_array.toBase64().data().decode('utf-8')
-                images[src] = base64_data
+                image_hash = self.image_store.put(bytes(byte_array))
+                self._memo_image_refs[src] = image_hash
+                image_refs[src] = image_hash
         
-        memo_data = {'html': html_content, 'images': images}
+        memo_data = {'html': html_content, 'image_refs': image_refs}
         new_memo = json.dumps(memo_data, ensure_ascii=False)
         
-        if data[self.current_memo_row].get('memo', '') != new_memo:
-            data[self.current_memo_row]['memo'] = new_memo
+        old_memo = self.get_item_memo(current_item)
+        if old_memo != new_memo:
+            self.set_item_memo(current_item, new_memo)
+            self.record_change('upsert', self.current_project, current_item, old_item=old_item)
             
             self.save_undo_state('edit', {
                 'old_item': old_item,
-                'new_item': data[self.current_memo_row].copy()
+                'new_item': current_item.copy(),
+                'old_memo': old_memo,
+                'new_memo': new_memo
             })
             
             if hasattr(self, 'table') and self.table:
@@ -2419,7 +5977,9 @@ class InteriorSettlementApp(QMainWindow):
             btn.setStyleSheet(style)
             btn.clicked.connect(func)
             if "백업" in text:
-                btn.setToolTip("현재 데이터를 별도 파일로 백업합니다")
+                btn.setToolTip("현재 데이터를 별도 파일로 백업합니다 (우클릭: 백업 파일 불러오기)")
+                btn.setContextMenuPolicy(Qt.CustomContextMenu)
+                btn.customContextMenuRequested.connect(self.show_backup_menu)
             elif "업데이트" in text:
                 btn.setToolTip("새로운 버전이 있는지 확인합니다")
             table_buttons_layout.addWidget(btn)
@@ -2479,7 +6039,11 @@ class InteriorSettlementApp(QMainWindow):
             QMessageBox.warning(self, "경고", "표시할 데이터가 없습니다.")
             return
         
-        dialog = ProcessSummaryDialog(data, self.processes, self)
+        process_totals = None
+        if self._store_is_current():
+            process_totals = self.data_store.process_totals(self.current_project)
+        
+        dialog = ProcessSummaryDialog(data, self.processes, self, process_totals=process_totals)
         dialog.exec_()
 
     def setup_table_columns(self):
@@ -2493,11 +6057,43 @@ class InteriorSettlementApp(QMainWindow):
         
         header.setSectionResizeMode(3, header.Stretch)
 
-    def get_memo_for_row(self, row):
+    def has_memo_for_row(self, row):
         data = self.get_current_data()
         if 0 <= row < len(data):
-            return data[row].get('memo', '')
-        return ''
+            return bool(data[row].get('has_memo'))
+        return False
+    
+    def get_item_memo(self, item):
+        """메모 본문은 표시할 때만 메모 저장소에서 읽어옴"""
+        if not item.get('id') or not (item.get('has_memo') or item.get('memo_rev')):
+            return ''
+        return self.memo_store.get(item['id'])
+    
+    def set_item_memo(self, item, memo):
+        self.memo_store.put(item['id'], memo)
+        item['has_memo'] = memo_has_content(memo)
+        item['memo_rev'] = item.get('memo_rev', 0) + 1
+    
+    def _split_memos(self, projects_data):
+        """항목에 포함된 메모 본문을 메모 저장소로 옮기고 has_memo/memo_rev 표시만 남김
+        (base64로 포함된 이미지는 이미지 저장소로 이동)"""
+        changed = False
+        for items in projects_data.values():
+            for item in items:
+                if 'memo' in item:
+                    memo = item.pop('memo') or ''
+                    changed = True
+                elif 'has_memo' not in item:
+                    memo = self.memo_store.get(item['id'])
+                    changed = True
+                else:
+                    continue
+                
+                if '"images"' in memo:
+                    memo = self.image_store.externalize_memo(memo)
+                if self.memo_store.put(item['id'], memo) or 'has_memo' not in item:
+                    item['has_memo'] = memo_has_content(memo)
+        return changed
 
     def delete_memo(self, row):
         data = self.get_current_data()
@@ -2509,11 +6105,15 @@ class InteriorSettlementApp(QMainWindow):
             self.current_memo_row = -1
         
         old_item = data[row].copy()
-        data[row]['memo'] = ''
+        old_memo = self.get_item_memo(data[row])
+        self.set_item_memo(data[row], '')
+        self.record_change('upsert', self.current_project, data[row], old_item=old_item)
         
         self.save_undo_state('edit', {
             'old_item': old_item,
-            'new_item': data[row].copy()
+            'new_item': data[row].copy(),
+            'old_memo': old_memo,
+            'new_memo': ''
         })
         
         self.save_all_data()
@@ -2533,28 +6133,78 @@ class InteriorSettlementApp(QMainWindow):
         self.current_memo_row = row
         item_info = data[row]
         
-        current_memo = item_info.get('memo', '')
-        if current_memo:
-            try:
-                memo_data = json.loads(current_memo)
-                if isinstance(memo_data, dict) and 'html' in memo_data:
-                    if 'images' in memo_data and memo_data['images']:
-                        document = self.memo_text_edit.document()
-                        for src, base64_data in memo_data['images'].items():
-                            byte_array = QByteArray.fromBase64(base64_data.encode('utf-8'))
-                            image = QImage()
-                            image.loadFromData(byte_array)
-                            if not image.isNull():
-                                url = QUrl(src)
-                                document.addResource(QTextDocument.ImageResource, url, image)
-                    
-                    self.memo_text_edit.setHtml(memo_data['html'])
-                else:
-                    self.memo_text_edit.setHtml(current_memo)
-            except:
-                self.memo_text_edit.setHtml(current_memo)
-        else:
+        self.load_memo_into_editor(self.get_item_memo(item_info))
+    
+    def load_memo_into_editor(self, memo):
+        self._memo_image_refs = {}
+        self._memo_missing_images = {}
+        self._memo_image_retries = {}
+        if not memo:
             self.memo_text_edit.clear()
+            return
+        
+        try:
+            memo_data = json.loads(memo)
+            if isinstance(memo_data, dict) and 'html' in memo_data:
+                document = self.memo_text_edit.document()
+                
+                for src, image_hash in (memo_data.get('image_refs') or {}).items():
+                    image = self.image_store.load_image(image_hash)
+                    if image is not None:
+                        document.addResource(QTextDocument.ImageResource, QUrl(src), image)
+                        self._memo_image_refs[src] = image_hash
+                    elif self.firebase_sync and self.firebase_sync.fetch_image(image_hash):
+                        # 아직 내려받지 않은 이미지 - 참조는 유지하고 받아지면 표시
+                        self._memo_image_refs[src] = image_hash
+                        self._memo_missing_images.setdefault(image_hash, []).append(src)
+                
+                # 이전 형식 (base64 직접 포함)
+                for src, base64_data in (memo_data.get('images') or {}).items():
+                    if src in self._memo_image_refs:
+                        continue
+                    byte_array = QByteArray.fromBase64(base64_data.encode('utf-8'))
+                    image = QImage()
+                    image.loadFromData(byte_array)
+                    if not image.isNull():
+                        document.addResource(QTextDocument.ImageResource, QUrl(src), image)
+                
+                self.memo_text_edit.setHtml(memo_data['html'])
+            else:
+                self.memo_text_edit.setHtml(memo)
+        except:
+            self.memo_text_edit.setHtml(memo)
+    
+    def on_memo_image_fetched(self, image_hash, png_bytes):
+        """원격 이미지 노드에서 내려받은 메모 이미지를 로컬 저장소에 보관하고 열린 메모에 표시"""
+        if not png_bytes or self.image_store.put(png_bytes) != image_hash:
+            self._retry_memo_image(image_hash)
+            return
+        sources = self._memo_missing_images.pop(image_hash, None)
+        image = self.image_store.load_image(image_hash)
+        if not sources or image is None:
+            return
+        
+        document = self.memo_text_edit.document()
+        modified = document.isModified()
+        for src in sources:
+            document.addResource(QTextDocument.ImageResource, QUrl(src), image)
+        document.markContentsDirty(0, document.characterCount())
+        document.setModified(modified)
+    
+    def _retry_memo_image(self, image_hash):
+        """메모를 보낸 사용자가 이미지를 아직 올리지 않았을 수 있으므로 열린 메모의 이미지는 간격을 늘려 다시 받음"""
+        attempt = self._memo_image_retries.get(image_hash, 0)
+        if image_hash not in self._memo_missing_images or attempt >= FIREBASE_IMAGE_FETCH_RETRIES:
+            return
+        self._memo_image_retries[image_hash] = attempt + 1
+        missing = self._memo_missing_images
+        
+        def retry():
+            # 그사이 다른 메모를 열었으면 다시 받지 않음
+            if self._memo_missing_images is missing and image_hash in missing and self.firebase_sync:
+                self.firebase_sync.fetch_image(image_hash)
+        
+        QTimer.singleShot(int(FIREBASE_RETRY_BASE_DELAY * 2 ** attempt * 1000), retry)
     
     def on_spinbox_focus(self, spinbox, event):
         QSpinBox.focusInEvent(spinbox, event)
@@ -2591,7 +6241,7 @@ class InteriorSettlementApp(QMainWindow):
         self.selected_date = date
 
     def update_ui_state(self):
-        has_project = self.current_project is not None
+        has_project = self.current_project is not None and self.current_project in self.projects_data
         has_user = self.current_user is not None
         can_add_item = has_project and has_user
         has_undo = len(self.undo_stack) > 0
@@ -2641,6 +6291,7 @@ class InteriorSettlementApp(QMainWindow):
         if action == 'add':
             if project in self.projects_data and data in self.projects_data[project]:
                 self.projects_data[project].remove(data)
+                self.record_change('delete', project, data)
         
         elif action == 'delete':
             if project in self.projects_data:
@@ -2648,12 +6299,17 @@ class InteriorSettlementApp(QMainWindow):
                     index = item_data['index']
                     item = item_data['item']
                     self.projects_data[project].insert(index, item)
+                    self.record_change('upsert', project, item, index=index)
         
         elif action == 'edit':
             if project in self.projects_data:
+                target_id = data['new_item'].get('id')
                 for i, item in enumerate(self.projects_data[project]):
-                    if item == data['new_item']:
+                    if (item.get('id') == target_id) if target_id else (item == data['new_item']):
+                        if 'old_memo' in data:
+                            self.memo_store.put(target_id, data['old_memo'])
                         self.projects_data[project][i] = data['old_item']
+                        self.record_change('upsert', project, data['old_item'], old_item=item)
                         break
         
         if project == self.current_project:
@@ -2689,7 +6345,7 @@ class InteriorSettlementApp(QMainWindow):
             vat = 0
             total = material + labor
         
-        item = {
+        item = SettlementItem({
             'user': self.current_user,
             'date': self.selected_date.toString('yyyy-MM-dd'),
             'process': self.process_combo.currentText().strip() if self.process_combo.currentText().strip() != "공정 관리" else "",
@@ -2699,12 +6355,13 @@ class InteriorSettlementApp(QMainWindow):
             'vat_included': self.vat_included.isChecked(),
             'vat_amount': vat,
             'total_amount': total,
-            'memo': '',
+            'has_memo': False,
             'id': str(uuid.uuid4()),
             'created_at': datetime.now().isoformat()
-        }
+        })
         
         self.projects_data[self.current_project].append(item)
+        self.record_change('upsert', self.current_project, item)
         
         self.save_undo_state('add', item)
         self.save_all_data()
@@ -2774,30 +6431,8 @@ class InteriorSettlementApp(QMainWindow):
         if current_row_count != new_row_count:
             self.table.setRowCount(new_row_count)
         
-        weekdays = ['월', '화', '수', '목', '금', '토', '일']
-        
         for i, item in enumerate(data):
-            cells = [
-                (item.get('user', ''), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (self.format_date_with_weekday(item.get('date', ''), weekdays), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (item.get('process', ''), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (" " + item.get('name', '-'), Qt.AlignLeft | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (self.format_amount(item.get('material_amount', 0)) + " ", Qt.AlignRight | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (self.format_amount(item.get('labor_amount', 0)) + " ", Qt.AlignRight | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
-                (self.format_vat(item) + (" " if self.format_vat(item) else ""), Qt.AlignRight | Qt.AlignVCenter, Qt.NoItemFlags | Qt.ItemIsSelectable | Qt.ItemIsEnabled),
-                (f"{item.get('total_amount', 0):,}원 ", Qt.AlignRight | Qt.AlignVCenter, Qt.NoItemFlags | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            ]
-            
-            for col, (text, alignment, flags) in enumerate(cells):
-                # 최적화: 기존 아이템이 있고 텍스트가 같으면 건너뛰기
-                existing_item = self.table.item(i, col)
-                if existing_item and existing_item.text() == text:
-                    continue
-                    
-                item_widget = QTableWidgetItem(text)
-                item_widget.setTextAlignment(alignment)
-                item_widget.setFlags(flags)
-                self.table.setItem(i, col, item_widget)
+            self.update_table_row(i, item)
         
         self.table.itemChanged.connect(self.on_table_item_changed)
         
@@ -2807,6 +6442,126 @@ class InteriorSettlementApp(QMainWindow):
                 if row_data in selected_items:
                     self.table.selectRow(i)
 
+    def _capture_view_state(self, with_rows=False):
+        """원격 변경을 반영하기 전 표 선택/현재 셀/스크롤과 메모 커서를 항목 id 기준으로 기록
+        with_rows: 바뀐 행만 다시 그리도록 표 순서대로 항목 id와 내용 해시도 기록"""
+        data = self.get_current_data()
+        row_id = lambda row: data[row].get('id') if 0 <= row < len(data) else None
+        cursor = self.memo_text_edit.textCursor()
+        return {
+            'project': self.current_project,
+            'order': [(item.get('id'), content_digest(item.to_dict())) for item in data] if with_rows else [],
+            'selected': [row_id(row) for row in sorted({cell.row() for cell in self.table.selectedItems()})],
+            'current': (row_id(self.table.currentRow()), self.table.currentColumn()),
+            'top': row_id(self.table.rowAt(0)),
+            'scroll': (self.table.verticalScrollBar().value(), self.table.horizontalScrollBar().value()),
+            'memo': row_id(self.current_memo_row),
+            'memo_text': self.get_item_memo(data[self.current_memo_row]) if 0 <= self.current_memo_row < len(data) else None,
+            'memo_cursor': (cursor.anchor(), cursor.position()),
+            'memo_scroll': self.memo_text_edit.verticalScrollBar().value(),
+        }
+    
+    def _refresh_table_diff(self, state):
+        """교체된 현재 프로젝트 항목을 기록해 둔 표와 항목 id로 비교 - 순서가 같으면 바뀐 행만 다시 그림
+        반환: 표에 바뀐 것이 있는지"""
+        data = self.get_current_data()
+        if self.sort_column >= 0 and data:
+            data.sort(key=lambda item: self.get_sort_key(item, self.sort_column), reverse=(self.sort_order == Qt.DescendingOrder))
+        order = [(item.get('id'), content_digest(item.to_dict())) for item in data]
+        if state['project'] != self.current_project or self.table.rowCount() != len(data) or \
+                [item_id for item_id, _ in order] != [item_id for item_id, _ in state['order']]:
+            self.update_table()
+            self._restore_view_state(state)
+            return True
+        
+        changed_rows = [row for row, (old, new) in enumerate(zip(state['order'], order)) if old != new]
+        if changed_rows:
+            self.table.itemChanged.disconnect()
+            for row in changed_rows:
+                self.update_table_row(row, data[row])
+            self.table.itemChanged.connect(self.on_table_item_changed)
+        return bool(changed_rows)
+    
+    def _restore_view_state(self, state):
+        """다시 그린 표에서 같은 항목을 다시 선택하고 보던 위치로 스크롤"""
+        if state['project'] != self.current_project:
+            return
+        rows = {item.get('id'): row for row, item in enumerate(self.get_current_data())}
+        model = self.table.model()
+        selection = self.table.selectionModel()
+        selection.clearSelection()
+        for item_id in state['selected']:
+            if item_id in rows:
+                selection.select(model.index(rows[item_id], 0), QItemSelectionModel.Select | QItemSelectionModel.Rows)
+        current_id, column = state['current']
+        if current_id in rows:
+            selection.setCurrentIndex(model.index(rows[current_id], max(column, 0)), QItemSelectionModel.NoUpdate)
+        
+        vertical, horizontal = state['scroll']
+        self.table.horizontalScrollBar().setValue(horizontal)
+        if state['top'] in rows and self.table.rowAt(0) != rows[state['top']]:
+            # 위쪽에 행이 추가/삭제되어도 보던 항목이 맨 위에 오도록
+            self.table.scrollTo(model.index(rows[state['top']], 0), QAbstractItemView.PositionAtTop)
+        else:
+            self.table.verticalScrollBar().setValue(vertical)
+    
+    def _refresh_memo_diff(self, state):
+        """열린 메모의 항목 위치를 다시 찾고, 본문이 바뀐 경우에만 다시 불러와 커서/스크롤 위치 유지"""
+        if state['memo'] is None or state['project'] != self.current_project:
+            return
+        data = self.get_current_data()
+        row = next((row for row, item in enumerate(data) if item.get('id') == state['memo']), -1)
+        self.current_memo_row = row
+        if row < 0:
+            self.memo_text_edit.clear()
+            return
+        memo = self.get_item_memo(data[row])
+        if memo == state['memo_text']:
+            return
+        
+        self.load_memo_into_editor(memo)
+        if hasattr(self, 'memo_save_timer'):
+            # 불러온 원격 메모를 자동 저장으로 다시 보내지 않음
+            self.memo_save_timer.stop()
+        length = self.memo_text_edit.document().characterCount() - 1
+        anchor, position = state['memo_cursor']
+        cursor = self.memo_text_edit.textCursor()
+        cursor.setPosition(min(anchor, length))
+        cursor.setPosition(min(position, length), QTextCursor.KeepAnchor)
+        self.memo_text_edit.setTextCursor(cursor)
+        self.memo_text_edit.verticalScrollBar().setValue(state['memo_scroll'])
+    
+    def update_table_row(self, i, item):
+        weekdays = ['월', '화', '수', '목', '금', '토', '일']
+        cells = [
+            (item.get('user', ''), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (self.format_item_date(item, weekdays), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (item.get('process', ''), Qt.AlignCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (" " + item.get('name', '-'), Qt.AlignLeft | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (self.format_amount(item.get('material_amount', 0)) + " ", Qt.AlignRight | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (self.format_amount(item.get('labor_amount', 0)) + " ", Qt.AlignRight | Qt.AlignVCenter, Qt.ItemIsSelectable | Qt.ItemIsEnabled | Qt.ItemIsEditable),
+            (self.format_vat(item) + (" " if self.format_vat(item) else ""), Qt.AlignRight | Qt.AlignVCenter, Qt.NoItemFlags | Qt.ItemIsSelectable | Qt.ItemIsEnabled),
+            (f"{item.get('total_amount', 0):,}원 ", Qt.AlignRight | Qt.AlignVCenter, Qt.NoItemFlags | Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+        ]
+        
+        for col, (text, alignment, flags) in enumerate(cells):
+            # 최적화: 기존 아이템이 있고 텍스트가 같으면 건너뛰기
+            existing_item = self.table.item(i, col)
+            if existing_item and existing_item.text() == text:
+                continue
+                
+            item_widget = QTableWidgetItem(text)
+            item_widget.setTextAlignment(alignment)
+            item_widget.setFlags(flags)
+            self.table.setItem(i, col, item_widget)
+
+    def format_item_date(self, item, weekdays):
+        # 서수로 저장된 날짜는 다시 파싱하지 않고 요일 계산
+        weekday = item.weekday()
+        if weekday is None:
+            return self.format_date_with_weekday(item.get('date', ''), weekdays)
+        return f"{item['date']} ({weekdays[weekday]})"
+
     def format_date_with_weekday(self, date_str, weekdays):
         if not date_str:
             return ''
@@ -2828,7 +6583,7 @@ class InteriorSettlementApp(QMainWindow):
     def get_sort_key(self, item, column):
         sort_keys = {
             0: lambda x: x.get('user', ''),
-            1: lambda x: self.parse_date(x.get('date', '')),
+            1: lambda x: x.date_key(),
             2: lambda x: x.get('process', ''),
             3: lambda x: x.get('name', ''),
             4: lambda x: x.get('material_amount', 0),
@@ -2838,12 +6593,6 @@ class InteriorSettlementApp(QMainWindow):
         }
         return sort_keys.get(column, lambda x: '')(item)
 
-    def parse_date(self, date_str):
-        try:
-            return datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else datetime.min.date()
-        except:
-            return datetime.min.date()
-
     def sort_table(self, column):
         selected_items = []
         selected_rows = set()
@@ -2884,15 +6633,20 @@ class InteriorSettlementApp(QMainWindow):
                 if item in selected_items:
                     self.table.selectRow(i)
 
+    def _store_is_current(self):
+        """SQL 집계를 바로 쓸 수 있는지 - 저장 대기 중인 변경이 있으면 메모리의 항목으로 계산
+        (화면 갱신 때마다 쓰기 스레드를 기다리지 않도록 flush하지 않음)"""
+        return (self.data_store.supports_queries and bool(self.current_project)
+                and not self._pending_records and not self.persistence_writer.has_pending())
+
     def update_summary(self):
-        data = self.get_current_data()
-        
-        totals = {
-            'material': sum(item.get('material_amount', 0) for item in data),
-            'labor': sum(item.get('labor_amount', 0) for item in data),
-            'vat': sum(item.get('vat_amount', 0) for item in data),
-            'grand': sum(item.get('total_amount', 0) for item in data)
-        }
+        if self._store_is_current():
+            totals = self.data_store.project_totals(self.current_project)
+        elif self.current_project and self.current_project not in self.projects_data:
+            # 불러오는 중에는 매니페스트에 저장된 합계 표시
+            totals = self.project_index.get(self.current_project, {}).get('totals') or calculate_totals([])
+        else:
+            totals = calculate_totals(self.get_current_data())
         
         self.material_total.setText(f"{totals['material']:,}원")
         self.labor_total.setText(f"{totals['labor']:,}원")
@@ -2922,6 +6676,7 @@ class InteriorSettlementApp(QMainWindow):
         
         for row in sorted(selected_rows, reverse=True):
             if row < len(data):
+                self.record_change('delete', self.current_project, data[row])
                 del data[row]
         
         if deleted_items:
@@ -2932,9 +6687,13 @@ class InteriorSettlementApp(QMainWindow):
         self.update_summary()
 
     def rename_project(self, old_name, new_name):
+        self.ensure_project_loaded(old_name)
         if old_name in self.projects_data:
             self.projects_data[new_name] = self.projects_data[old_name]
             del self.projects_data[old_name]
+            self.project_index.pop(old_name, None)
+            self._update_project_index(new_name)
+            self.record_change('project_rename', old_name, new_name=new_name)
             
             if self.current_project == old_name:
                 self.current_project = new_name
@@ -2949,7 +6708,8 @@ class InteriorSettlementApp(QMainWindow):
 
     def show_project_management_dialog(self):
         try:
-            dialog = ProjectManagementDialog(self.projects_data, self)
+            # 다이얼로그에는 프로젝트 이름만 필요
+            dialog = ProjectManagementDialog(dict.fromkeys(self.project_names()), self)
             dialog.setWindowModality(Qt.ApplicationModal)
             
             if self.isVisible():
@@ -2962,6 +6722,8 @@ class InteriorSettlementApp(QMainWindow):
             if dialog.exec_() == QDialog.Accepted:
                 if dialog.selected_action == 'add':
                     self.projects_data[dialog.selected_project] = []
+                    self._update_project_index(dialog.selected_project)
+                    self.record_change('project_add', dialog.selected_project)
                     self.update_project_combo()
                     self.project_combo.setCurrentText(dialog.selected_project)
                     self.on_project_changed(dialog.selected_project)
@@ -2974,7 +6736,9 @@ class InteriorSettlementApp(QMainWindow):
                     if dialog.selected_project == self.current_project:
                         self.current_project = None
                         
-                    del self.projects_data[dialog.selected_project]
+                    self.projects_data.pop(dialog.selected_project, None)
+                    self.project_index.pop(dialog.selected_project, None)
+                    self.record_change('project_delete', dialog.selected_project)
                     self.update_project_combo()
                     
                     if self.project_combo.count() > 1:
@@ -2994,10 +6758,11 @@ class InteriorSettlementApp(QMainWindow):
         if project_name == "프로젝트 관리":
             self.show_project_management_dialog()
             
-            if self.current_project and self.current_project in self.projects_data:
+            project_names = self.project_names()
+            if self.current_project and self.current_project in project_names:
                 self.project_combo.setCurrentText(self.current_project)
-            elif len(self.projects_data) > 0:
-                first_project = sorted(self.projects_data.keys())[0]
+            elif len(project_names) > 0:
+                first_project = project_names[0]
                 self.project_combo.setCurrentText(first_project)
             else:
                 self.current_project = None
@@ -3021,6 +6786,15 @@ class InteriorSettlementApp(QMainWindow):
                 
                 self.sort_column = 1
                 self.sort_order = Qt.DescendingOrder
+                
+                if self.current_project not in self.projects_data:
+                    # 항목은 백그라운드에서 불러오고 완료되면 표를 다시 그림
+                    self.request_project_load(self.current_project)
+                if self.firebase_sync:
+                    # 열린 프로젝트에만 리스너를 두고, 처음 받는 전체 항목을 로컬 항목과 병합
+                    self.firebase_sync.watch_project(self.current_project)
+                    self.firebase_sync.note_project_opened(self.current_project)
+                
                 self.update_table()
                 self.update_summary()
                 self.update_ui_state()
@@ -3037,21 +6811,104 @@ class InteriorSettlementApp(QMainWindow):
                     self.memo_text_edit.clear()
 
     def update_project_combo(self):
+        # 항목 데이터 없이 프로젝트 목록(매니페스트)만으로 구성 - 빠진/새 프로젝트만 제거/삽입하고 바뀐 툴팁만 갱신
         current = self.current_project
+        project_names = self.project_names()
+        combo = self.project_combo
+        
+        if not combo.count() or combo.itemText(combo.count() - 1) != "프로젝트 관리":
+            combo.clear()
+            combo.addItem("프로젝트 관리")
+        
+        wanted = set(project_names)
+        for index in range(combo.count() - 2, -1, -1):
+            if combo.itemText(index) not in wanted:
+                combo.removeItem(index)
+        # 남은 항목은 정렬된 순서이므로 앞에서부터 비교해 없는 프로젝트만 삽입
+        for position, project_name in enumerate(project_names):
+            if combo.itemText(position) != project_name:
+                combo.insertItem(position, project_name)
+            entry = self.project_index.get(project_name)
+            tooltip = f"항목 {entry['count']}개 · 총액 {entry['totals']['grand']:,}원" if entry else None
+            if combo.itemData(position, Qt.ToolTipRole) != tooltip:
+                combo.setItemData(position, tooltip, Qt.ToolTipRole)
+        
+        if current and current in project_names:
+            if combo.currentText() != current:
+                combo.setCurrentText(current)
+        elif len(project_names) > 0:
+            first_project = project_names[0]
+            combo.setCurrentText(first_project)
+    
+    def project_names(self):
+        return sorted(set(self.project_index) | set(self.projects_data))
+    
+    def request_project_load(self, project):
+        if project in self.projects_data or project in self._loading_projects:
+            return
+        if self._is_remote_only(project):
+            # 로컬에 없는 프로젝트는 열린 프로젝트 리스너가 처음 보내는 항목으로 받음 (도착하면 _apply_remote_project에서 표시)
+            if self.firebase_sync and self.firebase_sync.awaiting_fetch(project):
+                self._loading_projects.add(project)
+                self.statusBar().showMessage(f"⏳ '{project}' 클라우드에서 불러오는 중...")
+            return
+        self._loading_projects.add(project)
+        self.statusBar().showMessage(f"⏳ '{project}' 불러오는 중...")
+        self.project_loader.submit(self._load_project_in_background, project)
+    
+    def _load_project_in_background(self, project):
+        try:
+            self.project_data_loaded.emit(project, self.data_store.load_project(project), '')
+        except Exception as e:
+            self.project_data_loaded.emit(project, None, str(e))
+    
+    def on_project_data_loaded(self, project, items, error):
+        self._loading_projects.discard(project)
+        self.statusBar().clearMessage()
         
-        self.project_combo.clear()
-        
-        if self.projects_data:
-            for project_name in sorted(self.projects_data.keys()):
-                self.project_combo.addItem(project_name)
+        if items is None:
+            self.statusBar().showMessage(f"❌ '{project}' 불러오기 실패: {error}", 5000)
+            return
+        # 그 사이 원격 데이터로 교체되었거나 삭제된 프로젝트는 무시
+        if project in self.projects_data or project not in self.project_index:
+            return
         
-        self.project_combo.addItem("프로젝트 관리")
+        self._install_project(project, items)
         
-        if current and current in self.projects_data:
-            self.project_combo.setCurrentText(current)
-        elif len(self.projects_data) > 0:
-            first_project = sorted(self.projects_data.keys())[0]
-            self.project_combo.setCurrentText(first_project)
+        if project == self.current_project:
+            self.update_table()
+            self.update_summary()
+            self.update_ui_state()
+            if self.memo_visible and self.current_memo_row < 0 and self.get_current_data():
+                self.show_memo_dialog(0)
+    
+    def ensure_project_loaded(self, project):
+        """프로젝트 데이터가 필요할 때 즉시(동기) 불러옴 (클라우드에만 있는 프로젝트는 제외)"""
+        if project in self.projects_data or project not in self.project_index or self._is_remote_only(project):
+            return
+        self._install_project(project, self.data_store.load_project(project))
+    
+    def get_all_projects_data(self):
+        """전체 백업/동기화용 - 아직 불러오지 않은 프로젝트까지 모두 불러옴"""
+        for project in self.project_names():
+            self.ensure_project_loaded(project)
+        return self.projects_data
+    
+    def _install_project(self, project, items):
+        if project in self._loading_projects and self._is_remote_only(project):
+            self._loading_projects.discard(project)
+            self.statusBar().clearMessage()
+        loaded = to_settlement_items({project: items})
+        items = loaded[project]
+        self._ensure_item_ids(loaded)
+        if self._split_memos(loaded):
+            self._journal_needs_compaction = True
+        self.projects_data[project] = items
+        self._update_project_index(project)
+    
+    def _update_project_index(self, project):
+        items = self.projects_data.get(project, [])
+        self.project_index[project] = {'count': len(items), 'totals': calculate_totals(items)}
 
     def export_to_excel(self):
         if not self.current_project:
@@ -3084,7 +6941,7 @@ class InteriorSettlementApp(QMainWindow):
                     '인건비': item.get('labor_amount', 0) if item.get('labor_amount', 0) > 0 else '',
                     '부가세': item.get('vat_amount', 0) if item.get('vat_included', False) else '',
                     '총액': item.get('total_amount', 0),
-                    '메모': self.extract_text_from_html(item.get('memo', ''))
+                    '메모': self.extract_text_from_html(self.get_item_memo(item))
                 })
             
             df = pd.DataFrame(df_data)
@@ -3130,24 +6987,14 @@ class InteriorSettlementApp(QMainWindow):
         try:
             if hasattr(self, 'firebase_sync') and self.firebase_sync:
                 try:
-                    self.firebase_sync.save_to_firebase(self.projects_data)
+                    # 마지막 전송 이후 바뀐 항목만 전송 (오프라인이면 전송 대기열에 보관)
+                    self.firebase_sync.push_changes()
                 except:
                     pass
             
             try:
-                data_file = get_data_file_path()
-                with open(data_file, 'w', encoding='utf-8') as f:
-                    save_data = {}
-                    for project, items in self.projects_data.items():
-                        save_data[project] = []
-                        for item in items:
-                            item_copy = item.copy()
-                            if isinstance(item_copy.get('date'), QDate):
-                                item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
-                            save_data[project].append(item_copy)
-                    
-                    json.dump(save_data, f, ensure_ascii=False, indent=2)
-                    
+                self._flush_local_changes()
+                
                 if hasattr(self, 'sync_status_label'):
                     if not (hasattr(self, 'firebase_sync') and self.firebase_sync and self.firebase_sync.db_ref):
                         self.sync_status_label.setText("●")
@@ -3160,6 +7007,68 @@ class InteriorSettlementApp(QMainWindow):
         except:
             pass
 
+    def record_change(self, op, project, item=None, new_name=None, from_remote=False, old_item=None, index=None):
+        """로컬 저널에 기록할 변경 사항 등록 (실제 기록은 저장 시점에 수행)
+        from_remote: 원격에서 받은 변경이면 Firebase로 다시 보내지 않음
+        old_item: 수정 전 항목 - 바뀐 필드에 수정 시각을 기록해 동시 수정 시 필드 단위로 병합
+        index: 삭제 취소로 되살린 항목의 원래 위치 - 다시 읽을 때도 같은 자리에 복원"""
+        if old_item is not None and not from_remote:
+            stamp_changed_fields(item, old_item, self.firebase_sync.session_id if self.firebase_sync else '')
+        record = {'op': op, 'project': project}
+        if op == 'delete':
+            record['id'] = item.get('id')
+        elif item is not None:
+            record['item'] = self._item_for_save(item)
+        if new_name is not None:
+            record['new_name'] = new_name
+        if index is not None:
+            record['index'] = index
+        self._pending_records.append(record)
+        self._backup_dirty = True
+        if self.firebase_sync and not from_remote:
+            self.firebase_sync.track_change(record)
+    
+    def _flush_local_changes(self):
+        records = self._pending_records
+        self._pending_records = []
+        
+        if self._index_loaded and (self._journal_needs_compaction or self.data_store.needs_compaction()):
+            # 불러오지 않은 프로젝트는 None으로 전달해 기존 샤드 유지
+            snapshot = dict.fromkeys(project for project in self.project_index if not self._is_remote_only(project))
+            snapshot.update(self._projects_data_for_save())
+            self.persistence_writer.submit_snapshot(snapshot)
+            self._journal_needs_compaction = False
+        elif records:
+            # 변경된 프로젝트의 합계를 매니페스트용으로 함께 기록
+            for project in dict.fromkeys(record['project'] for record in records):
+                if project in self.projects_data:
+                    self._update_project_index(project)
+                    entry = self.project_index[project]
+                    records.append({'op': 'totals', 'project': project,
+                                    'count': entry['count'], 'totals': entry['totals']})
+            self.persistence_writer.submit_records(records)
+    
+    def on_local_save_failed(self, message):
+        self.statusBar().showMessage(f"❌ 로컬 저장 실패: {message}", 5000)
+        QMessageBox.warning(self, "경고", "데이터 저장에 실패했습니다.")
+    
+    def on_backup_failed(self, message):
+        self.statusBar().showMessage(f"❌ 자동 백업 실패: {message}", 5000)
+    
+    def _item_for_save(self, item):
+        item_copy = item.to_dict() if isinstance(item, SettlementItem) else item.copy()
+        if isinstance(item_copy.get('date'), QDate):
+            item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
+        return item_copy
+    
+    def _projects_data_for_save(self):
+        return {project: [self._item_for_save(item) for item in items] for project, items in self.projects_data.items()}
+    
+    def _ensure_item_ids(self, projects_data):
+        # 이전 버전 데이터에는 id가 없는 항목이 있어 저널 기록용 id 부여
+        if ensure_item_ids(projects_data):
+            self._journal_needs_compaction = True
+
     def load_all_data(self):
         # 업데이트 플래그 확인 및 삭제
         exe_dir = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
@@ -3173,63 +7082,13 @@ class InteriorSettlementApp(QMainWindow):
             except:
                 pass
         
-        # 데이터 로드 재시도
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                data_file = get_data_file_path()
-                if not os.path.exists(data_file):
-                    if retry_count == 0:
-                        self.project_combo.addItem("프로젝트 관리")
-                        self.current_project = None
-                        self.table.setRowCount(0)
-                        self.update_summary()
-                        self.update_ui_state()
-                    return
-                
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    self.projects_data = json.load(f)
-                
-                # 데이터 로드 성공
-                break
-                
-            except Exception as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    time.sleep(0.5)  # 0.5초 대기 후 재시도
-                else:
-                    # 최종 실패
-                    if retry_count == 1:
-                        self.project_combo.addItem("프로젝트 관리")
-                        self.current_project = None
-                        self.table.setRowCount(0)
-                        self.update_summary()
-                        self.update_ui_state()
-                    return
-        
-        # 데이터 로드 성공 시 UI 업데이트
-        self.update_project_combo()
-        
-        if len(self.projects_data) > 0:
-            first_project = sorted(self.projects_data.keys())[0]
-            self.project_combo.setCurrentText(first_project)
-            self.current_project = first_project
-            self.sort_column = 1
-            self.sort_order = Qt.DescendingOrder
-            self.update_table()
-            self.update_summary()
-            self.update_ui_state()
-            
-            data = self.get_current_data()
-            if data:
-                self.show_memo_dialog(0)
-        else:
-            self.current_project = None
-            self.table.setRowCount(0)
-            self.update_summary()
-            self.update_ui_state()
+        # 데이터가 도착하기 전까지 빈 화면 구성 (목록과 첫 프로젝트는 백그라운드에서 읽어 도착하는 대로 표시)
+        self.project_combo.addItem("프로젝트 관리")
+        self.current_project = None
+        self.table.setRowCount(0)
+        self.update_summary()
+        self.update_ui_state()
+        self.start_project_index_load()
         
         # 업데이트 완료 메시지
         if was_updated:
@@ -3237,7 +7096,100 @@ class InteriorSettlementApp(QMainWindow):
                 self, "업데이트 완료", 
                 f"프로그램이 성공적으로 업데이트되었습니다.\n현재 버전: {CURRENT_VERSION}"
             ))
+    
+    def start_project_index_load(self, attempt=0):
+        self.statusBar().showMessage("⏳ 데이터 불러오는 중...")
+        self.project_loader.submit(self._load_index_in_background, attempt)
+    
+    def _load_index_in_background(self, attempt):
+        """프로젝트 목록을 먼저 보내고 이어서 첫 프로젝트 항목을 읽어 보냄"""
+        try:
+            index = self.data_store.load_index() if self.data_store.exists() else {}
+        except Exception as e:
+            self.project_index_failed.emit(attempt, str(e))
+            return
+        self.project_index_loaded.emit(index)
+        
+        if index:
+            self._load_project_in_background(sorted(index)[0])
+    
+    def on_project_index_loaded(self, index):
+        self.statusBar().clearMessage()
+        self._index_loaded = True
+        QTimer.singleShot(5000, self.collect_unused_images)
+        
+        # 그 사이 클라우드 데이터로 전체가 교체되었으면 로컬 목록은 사용하지 않음
+        if self.projects_data:
+            return
+        
+        self.project_index = index
+        if index:
+            # 첫 프로젝트 항목은 목록을 읽은 스레드가 이어서 불러오는 중
+            self._loading_projects.add(sorted(index)[0])
+        if self.firebase_sync and self.firebase_sync.remote_index is not None:
+            # 클라우드 목록을 먼저 받은 경우 로컬 목록과 합침
+            self.on_firebase_project_index(self.firebase_sync.remote_index, True)
+            return
+        cached_index = self.firebase_sync.cached_index() if self.firebase_sync else {}
+        if cached_index:
+            # 지난번에 받은 클라우드 목록으로 먼저 표시 (삭제된 프로젝트는 목록을 받은 뒤 정리)
+            self.on_firebase_project_index(cached_index, False)
+            return
+        self.update_project_combo()
+        
+        project_names = self.project_names()
+        if project_names:
+            first_project = project_names[0]
+            self.project_combo.setCurrentText(first_project)
+            self.on_project_changed(first_project)
+    
+    def on_project_index_failed(self, attempt, message):
+        if attempt < 2:
+            # GUI를 멈추지 않고 0.5초 후 재시도
+            QTimer.singleShot(500, lambda: self.start_project_index_load(attempt + 1))
+            return
+        self.statusBar().showMessage(f"❌ 데이터 불러오기 실패: {message}", 5000)
 
+    def collect_unused_images(self):
+        """메모와 실행 취소 기록 어디에서도 참조하지 않는 이미지 파일 정리"""
+        live_ids = {item.get('id') for items in self.projects_data.values() for item in items}
+        unloaded_projects = [project for project in self.project_index
+                             if project not in self.projects_data and not self._is_remote_only(project)]
+        undo_memos = []
+        for undo_data in self.undo_stack:
+            data = undo_data['data']
+            if undo_data['action'] == 'add':
+                live_ids.add(data.get('id'))
+            elif undo_data['action'] == 'delete':
+                live_ids.update(item_data['item'].get('id') for item_data in data)
+            elif undo_data['action'] == 'edit':
+                undo_memos.extend([data.get('old_memo', ''), data.get('new_memo', '')])
+        editor_refs = set(self._memo_image_refs.values())
+        
+        def collect():
+            # 저장 스레드에서 실행 - 아직 불러오지 않은 프로젝트의 항목 id는 저장소에서 읽음
+            try:
+                for project in unloaded_projects:
+                    live_ids.update(item.get('id') for item in self.data_store.load_project(project))
+                
+                self.memo_store.garbage_collect(live_ids)
+                
+                # 아직 기록하지 않은 메모가 참조하는 이미지도 남김
+                memos = list(self.memo_store.all_memos()) + self.memo_store.pending_memos() + undo_memos
+                referenced = ImageBlobStore.referenced_hashes(memos)
+                referenced.update(editor_refs)
+                self.image_store.garbage_collect(referenced)
+                self.images_collected.emit(referenced)
+            except:
+                pass
+        
+        self.persistence_writer.submit_task('gc', collect)
+    
+    def on_images_collected(self, referenced):
+        # 지운 이미지는 전송 대기열의 올린 목록에서도 빼서 목록이 계속 커지지 않도록 함
+        if self.firebase_sync and self.firebase_sync.outbox.prune_uploaded_images(referenced):
+            self.firebase_sync.outbox.save(self.firebase_sync.remote_slots)
+    
     def on_table_item_changed(self, item):
         if not item:
             return
@@ -3330,6 +7282,7 @@ class InteriorSettlementApp(QMainWindow):
                 self.update_row_totals(row)
             
             if old_item != current_item:
+                self.record_change('upsert', self.current_project, current_item, old_item=old_item)
                 self.save_undo_state('edit', {
                     'old_item': old_item,
                     'new_item': current_item.copy()
@@ -3397,34 +7350,36 @@ class InteriorSettlementApp(QMainWindow):
     def save_data_as(self):
         try:
             if self.current_project:
-                default_filename = f"{self.current_project}_백업_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                default_filename = f"{self.current_project}_백업_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SNAPSHOT_EXTENSION}"
             else:
-                default_filename = f"정산데이터_백업_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+                default_filename = f"정산데이터_백업_{datetime.now().strftime('%Y%m%d_%H%M%S')}{SNAPSHOT_EXTENSION}"
             
-            filename, _ = QFileDialog.getSaveFileName(
+            filename, selected_filter = QFileDialog.getSaveFileName(
                 self,
                 "데이터 백업 저장",
                 default_filename,
-                "JSON 파일 (*.json);;모든 파일 (*.*)"
+                f"압축 백업 파일 (*{SNAPSHOT_EXTENSION});;JSON 파일 (*.json);;모든 파일 (*.*)"
             )
             
             if not filename:
                 return
             
-            if not filename.endswith('.json'):
-                filename += '.json'
-            
-            save_data = {}
-            for project, items in self.projects_data.items():
-                save_data[project] = []
-                for item in items:
-                    item_copy = item.copy()
-                    if isinstance(item_copy.get('date'), QDate):
-                        item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
-                    save_data[project].append(item_copy)
+            # 변경 기록을 저장소에 모두 반영한 뒤 저장소에서 프로젝트별로 읽어 기록
+            if self.current_memo_row >= 0:
+                self.save_current_memo()
+            self._flush_local_changes()
+            self.persistence_writer.flush()
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
+            if filename.endswith('.json') or selected_filter.startswith("JSON"):
+                if not filename.endswith('.json'):
+                    filename += '.json'
+                save_data = {project: self._backup_items(project, inline_images=True)
+                             for project in self.data_store.load_index()}
+                write_json_atomic(filename, save_data)
+            else:
+                if not filename.endswith(SNAPSHOT_EXTENSION):
+                    filename += SNAPSHOT_EXTENSION
+                self._write_backup_snapshot(filename, SNAPSHOT_CODEC_LZMA, inline_images=True)
             
             QMessageBox.information(
                 self,
@@ -3447,6 +7402,144 @@ class InteriorSettlementApp(QMainWindow):
                 f"백업 파일 생성 중 오류가 발생했습니다:\n{str(e)}"
             )
     
+    def _backup_items(self, project, inline_images=False):
+        """저장소의 프로젝트 항목에 메모 본문을 포함해 반환 (inline_images: 이미지도 파일에 포함)"""
+        items = self.data_store.load_project(project)
+        for item in items:
+            if item.get('has_memo'):
+                memo = self.memo_store.get(item['id'])
+                item['memo'] = self.image_store.inline_memo(memo) if inline_images else memo
+        return items
+    
+    def _write_backup_snapshot(self, path, codec=SNAPSHOT_CODEC_ZLIB, inline_images=False):
+        with SnapshotWriter(path, codec) as writer:
+            for project in self.data_store.load_index():
+                writer.write_project(project, self._backup_items(project, inline_images))
+    
+    def show_backup_menu(self, pos):
+        menu = QMenu(self)
+        restore_action = menu.addAction("백업 파일 불러오기...")
+        restore_point_action = menu.addAction("자동 백업 시점으로 복원...")
+        action = menu.exec_(self.save_btn.mapToGlobal(pos))
+        if action == restore_action:
+            self.restore_from_backup()
+        elif action == restore_point_action:
+            self.restore_from_backup_point()
+    
+    def restore_from_backup(self):
+        """백업 파일(압축 스냅샷 또는 이전 JSON)로 전체 데이터 교체"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self,
+            "백업 파일 불러오기",
+            "",
+            f"백업 파일 (*{SNAPSHOT_EXTENSION} *.json);;모든 파일 (*.*)"
+        )
+        if not filename:
+            return
+        
+        try:
+            data = read_backup_file(filename)
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"백업 파일을 읽을 수 없습니다:\n{str(e)}")
+            return
+        
+        self.replace_all_data(data, os.path.basename(filename))
+    
+    def restore_from_backup_point(self):
+        """증분 자동 백업의 원하는 시점을 골라 한 번에 복원"""
+        # 진행 중인 저장/백업이 끝난 뒤 시점 목록 조회
+        self._flush_local_changes()
+        self.persistence_writer.flush()
+        
+        points = list(reversed(self.backup_chain.points()))
+        if not points:
+            QMessageBox.information(self, "알림", "복원할 자동 백업이 없습니다.")
+            return
+        
+        labels = [f"{created.strftime('%Y-%m-%d %H:%M:%S')} ({'전체' if kind == 'base' else '변경분'})"
+                  for _, created, kind in points]
+        label, ok = QInputDialog.getItem(self, "자동 백업 시점으로 복원", "복원할 시점을 선택하세요:", labels, 0, False)
+        if not ok:
+            return
+        
+        try:
+            data = self.backup_chain.restore(points[labels.index(label)][0])
+        except Exception as e:
+            QMessageBox.critical(self, "오류", f"자동 백업을 복원할 수 없습니다:\n{str(e)}")
+            return
+        
+        self.replace_all_data(data, label)
+    
+    def replace_all_data(self, data, source_label):
+        """확인 후 전체 데이터를 백업 데이터로 교체 (교체 전 현재 상태를 자동 백업에 기록)"""
+        reply = QMessageBox.question(
+            self, "백업 불러오기",
+            f"현재 데이터를 백업({source_label})의 프로젝트 {len(data)}개로 교체합니다.\n계속하시겠습니까?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        self._backup_dirty = True
+        self.schedule_incremental_backup()
+        self.persistence_writer.flush()
+        
+        if self.current_memo_row >= 0:
+            self.save_current_memo()
+        self.projects_data = to_settlement_items(data)
+        self._ensure_item_ids(self.projects_data)
+        self._split_memos(self.projects_data)
+        self.project_index = {}
+        for project in self.projects_data:
+            self._update_project_index(project)
+        self._pending_records = []
+        self._journal_needs_compaction = True
+        self.undo_stack.clear()
+        
+        self.current_project = None
+        self.update_project_combo()
+        project_names = self.project_names()
+        if project_names:
+            self.project_combo.setCurrentText(project_names[0])
+            self.on_project_changed(project_names[0])
+        else:
+            self.table.setRowCount(0)
+            self.update_summary()
+            self.update_ui_state()
+        
+        self._backup_dirty = True
+        if self.firebase_sync:
+            self.firebase_sync.request_full_push()
+        self.save_all_data()
+        self.statusBar().showMessage(f"📂 백업 불러오기 완료: {source_label}", 5000)
+    
+    def schedule_incremental_backup(self):
+        """변경이 있을 때만 저장 스레드에서 증분 백업 기록"""
+        if not self._backup_dirty:
+            return
+        self._backup_dirty = False
+        self._flush_local_changes()
+        self.persistence_writer.submit_task('incremental_backup', self._run_incremental_backup)
+    
+    def _run_incremental_backup(self):
+        try:
+            self.backup_chain.capture()
+            self.backup_chain.apply_retention()
+            
+            # 이전 방식(종료 시 전체 복사)의 백업 파일은 7일 후 삭제
+            backup_dir = get_backup_dir()
+            current_time = time.time()
+            for filename in os.listdir(backup_dir):
+                if filename.startswith("auto_backup_") and filename.endswith((".json", SNAPSHOT_EXTENSION)):
+                    file_path = os.path.join(backup_dir, filename)
+                    if current_time - os.path.getmtime(file_path) > 7 * 24 * 60 * 60:  # 7일
+                        try:
+                            os.remove(file_path)
+                        except:
+                            pass
+        except Exception as e:
+            self.backup_failed.emit(str(e))
+    
     def closeEvent(self, event):
         self.hide()
         
@@ -3455,87 +7548,34 @@ class InteriorSettlementApp(QMainWindow):
                 self.memo_save_timer.stop()
             
             if self.current_memo_row >= 0:
-                data = self.get_current_data()
-                if self.current_memo_row < len(data):
-                    html_content = self.memo_text_edit.toHtml()
-                    if html_content:
-                        data[self.current_memo_row]['memo'] = json.dumps({
-                            'html': html_content,
-                            'images': {}
-                        }, ensure_ascii=False)
-            
-            # 자동 백업 생성
+                self.save_current_memo()
+            
+            # 종료를 늦추지 않도록 백업은 하지 않고, 백업할 변경이 남았다는 표시만 남겨 다음 실행에서 백업
             try:
-                exe_dir = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
-                backup_dir = os.path.join(exe_dir, "backups")
-                
-                # 백업 폴더가 없으면 생성
-                if not os.path.exists(backup_dir):
-                    os.makedirs(backup_dir)
-                
-                # 백업 파일명 생성
-                backup_filename = f"auto_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                backup_path = os.path.join(backup_dir, backup_filename)
-                
-                # 백업 데이터 저장
-                save_data = {}
-                for project, items in self.projects_data.items():
-                    save_data[project] = []
-                    for item in items:
-                        item_copy = item.copy()
-                        if isinstance(item_copy.get('date'), QDate):
-                            item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
-                        save_data[project].append(item_copy)
-                
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    json.dump(save_data, f, ensure_ascii=False, indent=2)
-                    f.flush()
-                    if hasattr(os, 'fsync'):
-                        os.fsync(f.fileno())
-                
-                # 7일 이상 된 백업 파일 삭제
-                current_time = time.time()
-                for filename in os.listdir(backup_dir):
-                    if filename.startswith("auto_backup_") and filename.endswith(".json"):
-                        file_path = os.path.join(backup_dir, filename)
-                        file_time = os.path.getmtime(file_path)
-                        if current_time - file_time > 7 * 24 * 60 * 60:  # 7일
-                            try:
-                                os.remove(file_path)
-                            except:
-                                pass
+                self.backup_timer.stop()
+                if self.persistence_writer.cancel_task('incremental_backup'):
+                    self._backup_dirty = True
+                if self._backup_dirty:
+                    self.backup_chain.mark_pending()
             except:
                 pass
             
-            # 메인 데이터 파일 저장
+            # 메인 데이터 파일 저장 (남은 변경 기록만 저널에 추가 후 쓰기 대기열 비우기)
             try:
-                data_file = get_data_file_path()
-                with open(data_file, 'w', encoding='utf-8') as f:
-                    save_data = {}
-                    for project, items in self.projects_data.items():
-                        save_data[project] = []
-                        for item in items:
-                            item_copy = item.copy()
-                            if isinstance(item_copy.get('date'), QDate):
-                                item_copy['date'] = item_copy['date'].toString('yyyy-MM-dd')
-                            save_data[project].append(item_copy)
-                    
-                    json.dump(save_data, f, ensure_ascii=False, indent=2)
-                    f.flush()
-                    if hasattr(os, 'fsync'):
-                        os.fsync(f.fileno())
+                if hasattr(self, '_save_timer'):
+                    self._save_timer.stop()
+                if self.firebase_sync:
+                    # 아직 보내지 못한 클라우드 변경은 다음 실행 때 전송
+                    self.firebase_sync.queue_pending_changes()
+                self._flush_local_changes()
+                self.persistence_writer.stop()
+                self.project_loader.shutdown(wait=False)
             except:
                 pass
             
             if hasattr(self, 'firebase_sync') and self.firebase_sync:
-                if hasattr(self.firebase_sync, 'reconnect_timer'):
-                    self.firebase_sync.reconnect_timer.stop()
-                
-                if hasattr(self.firebase_sync, 'listener') and self.firebase_sync.listener:
-                    try:
-                        self.firebase_sync.listener.close()
-                    except:
-                        pass
+                # 리스너 종료와 동기화 스레드 정리
+                self.firebase_sync.stop_sync()
             
         except:
             pass